@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import ApiDefinition, ApiTestCase, ApiTestResult
+from .models import ApiDefinition, ApiTestCase, ApiTestResult, LoadTestCase, LoadTestRun
 
 @admin.register(ApiDefinition)
 class ApiDefinitionAdmin(admin.ModelAdmin):
@@ -12,9 +12,21 @@ class ApiTestCaseAdmin(admin.ModelAdmin):
     list_display = ('name', 'api', 'created_by', 'created_at')
     list_filter = ('api', 'created_by')
     search_fields = ('name', 'description')
+    filter_horizontal = ('test_cases',)
 
 @admin.register(ApiTestResult)
 class ApiTestResultAdmin(admin.ModelAdmin):
     list_display = ('test_case', 'status', 'response_code', 'response_time', 'executed_by', 'executed_at')
     list_filter = ('status', 'executed_by')
-    search_fields = ('test_case__name', 'error_message') 
\ No newline at end of file
+    search_fields = ('test_case__name', 'error_message') 
+
+class LoadTestCaseInline(admin.TabularInline):
+    model = LoadTestCase
+    extra = 1
+
+@admin.register(LoadTestRun)
+class LoadTestRunAdmin(admin.ModelAdmin):
+    list_display = ('name', 'mode', 'status', 'total_requests', 'error_requests', 'latency_p99', 'created_at')
+    list_filter = ('mode', 'status')
+    search_fields = ('name',)
+    inlines = [LoadTestCaseInline]
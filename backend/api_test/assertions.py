@@ -0,0 +1,272 @@
+"""
+断言执行
+把用例的断言配置预先编译为执行计划，对同一个响应的所有断言共享一次解码和解析结果
+"""
+import re
+import time
+from functools import cached_property
+
+
+class ResponseView:
+    """
+    响应的只读视图
+
+    响应体文本和JSON解析结果在第一次访问时计算并缓存，
+    JSON解析失败时同样缓存异常，后续断言不会重复解析。
+    包装的是被截断的 ResponseCapture 时，包含类断言流式扫描完整响应体。
+    """
+
+    def __init__(self, response):
+        self.response = response
+
+    @property
+    def headers(self):
+        return self.response.headers
+
+    @cached_property
+    def text(self):
+        return self.response.text
+
+    @cached_property
+    def _json(self):
+        try:
+            return self.response.json(), None
+        except Exception as e:
+            return None, e
+
+    def json(self):
+        value, error = self._json
+        if error is not None:
+            raise error
+        return value
+
+    @property
+    def _streaming(self):
+        return getattr(self.response, 'truncated', False)
+
+    @property
+    def body_length(self):
+        """响应体长度（截断的响应返回完整响应体的字节数，避免加载全文）"""
+        if self._streaming:
+            return self.response.size
+        return len(self.text)
+
+    def contains(self, substring):
+        """判断响应体是否包含指定文本"""
+        if not self._streaming:
+            return substring in self.text
+        # 保留上一块末尾的 len(substring)-1 个字符，避免漏掉跨块的匹配
+        overlap = max(len(substring) - 1, 0)
+        tail = ''
+        for text in self.response.iter_text():
+            window = tail + text
+            if substring in window:
+                return True
+            tail = window[-overlap:] if overlap else ''
+        return False
+
+
+class CompiledAssertion:
+    """编译后的单个断言"""
+
+    # 是否需要读取响应体
+    needs_body = True
+
+    def __init__(self, assertion):
+        self.type = assertion.get('type')
+        self.expected = assertion.get('expected')
+
+    def evaluate(self, view):
+        """执行断言，返回与断言结果详情格式一致的字典"""
+        raise NotImplementedError
+
+
+class JsonPathAssertion(CompiledAssertion):
+    """JSON路径断言，路径在编译时拆分"""
+
+    def __init__(self, assertion):
+        super().__init__(assertion)
+        self.field = assertion.get('field', '')
+        # 预先转换列表下标，取值时不再重复判断
+        self.tokens = [(key, int(key) if key.isdigit() else None) for key in self.field.split('.')]
+
+    def resolve(self, data):
+        current = data
+        for key, index in self.tokens:
+            if isinstance(current, dict):
+                current = current.get(key)
+            elif isinstance(current, list) and index is not None:
+                current = current[index] if index < len(current) else None
+            else:
+                return None
+        return current
+
+    def evaluate(self, view):
+        try:
+            actual = self.resolve(view.json())
+        except Exception as e:
+            return {
+                'type': self.type,
+                'field': self.field,
+                'expected': self.expected,
+                'actual': None,
+                'passed': False,
+                'message': f"JSON路径断言执行失败: {str(e)}"
+            }
+        passed = actual == self.expected
+        return {
+            'type': self.type,
+            'field': self.field,
+            'expected': self.expected,
+            'actual': actual,
+            'passed': passed,
+            'message': f"JSON路径 {self.field} 断言{'通过' if passed else '失败'}"
+        }
+
+
+class ContainsAssertion(CompiledAssertion):
+    """包含断言"""
+
+    def evaluate(self, view):
+        passed = view.contains(self.expected)
+        return {
+            'type': self.type,
+            'expected': self.expected,
+            'actual': f"响应体长度: {view.body_length}",
+            'passed': passed,
+            'message': f"包含断言{'通过' if passed else '失败'}"
+        }
+
+
+class NotContainsAssertion(CompiledAssertion):
+    """不包含断言"""
+
+    def evaluate(self, view):
+        passed = not view.contains(self.expected)
+        return {
+            'type': self.type,
+            'expected': f"不包含: {self.expected}",
+            'actual': f"响应体长度: {view.body_length}",
+            'passed': passed,
+            'message': f"不包含断言{'通过' if passed else '失败'}"
+        }
+
+
+class RegexAssertion(CompiledAssertion):
+    """正则断言，正则表达式在编译时预编译"""
+
+    def __init__(self, assertion):
+        super().__init__(assertion)
+        self.pattern = re.compile(self.expected)
+
+    def evaluate(self, view):
+        match = self.pattern.search(view.text)
+        return {
+            'type': self.type,
+            'expected': self.expected,
+            'actual': match.group(0) if match else None,
+            'passed': match is not None,
+            'message': f"正则断言{'通过' if match else '失败'}"
+        }
+
+
+class HeaderAssertion(CompiledAssertion):
+    """响应头断言"""
+
+    needs_body = False
+
+    def __init__(self, assertion):
+        super().__init__(assertion)
+        self.header_name = assertion.get('header_name')
+
+    def evaluate(self, view):
+        actual = view.headers.get(self.header_name)
+        passed = actual == self.expected
+        return {
+            'type': self.type,
+            'field': self.header_name,
+            'expected': self.expected,
+            'actual': actual,
+            'passed': passed,
+            'message': f"响应头 {self.header_name} 断言{'通过' if passed else '失败'}"
+        }
+
+
+class InvalidAssertion(CompiledAssertion):
+    """无法执行的断言（类型不支持或配置错误），执行时总是失败"""
+
+    needs_body = False
+
+    def __init__(self, assertion, message):
+        super().__init__(assertion)
+        self.message = message
+
+    def evaluate(self, view):
+        return {
+            'type': self.type,
+            'expected': self.expected,
+            'actual': None,
+            'passed': False,
+            'message': self.message
+        }
+
+
+ASSERTION_TYPES = {
+    'json_path': JsonPathAssertion,
+    'contains': ContainsAssertion,
+    'not_contains': NotContainsAssertion,
+    'regex': RegexAssertion,
+    'header': HeaderAssertion,
+}
+
+
+def compile_assertion(assertion):
+    """编译单个断言配置"""
+    assertion_class = ASSERTION_TYPES.get(assertion.get('type'))
+    if assertion_class is None:
+        return InvalidAssertion(assertion, f"不支持的断言类型: {assertion.get('type')}")
+    try:
+        return assertion_class(assertion)
+    except Exception as e:
+        return InvalidAssertion(assertion, f"断言配置错误: {str(e)}")
+
+
+class AssertionPlan:
+    """
+    用例的断言执行计划
+
+    由断言配置编译一次后可对任意多个响应重复执行，线程安全。
+    """
+
+    def __init__(self, assertions):
+        self.assertions = [compile_assertion(assertion) for assertion in assertions or []]
+
+    def __len__(self):
+        return len(self.assertions)
+
+    @property
+    def needs_body(self):
+        """是否有断言需要读取完整响应体"""
+        return any(assertion.needs_body for assertion in self.assertions)
+
+    def evaluate(self, view):
+        """
+        对响应执行全部断言
+
+        Returns:
+            tuple: (断言结果列表, 执行耗时毫秒数)
+        """
+        start_time = time.perf_counter()
+        results = []
+        for assertion in self.assertions:
+            try:
+                results.append(assertion.evaluate(view))
+            except Exception as e:
+                results.append({
+                    'type': assertion.type or 'unknown',
+                    'expected': assertion.expected,
+                    'actual': None,
+                    'passed': False,
+                    'message': f"断言执行异常: {str(e)}"
+                })
+        return results, (time.perf_counter() - start_time) * 1000
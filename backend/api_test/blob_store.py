@@ -0,0 +1,114 @@
+"""
+测试结果内容存储
+响应体、响应头和断言详情按内容哈希去重，压缩后保存在 ResultBlob 中，结果记录只保存引用
+"""
+import hashlib
+import logging
+import zlib
+
+from django.conf import settings
+
+try:
+    import zstandard
+except ImportError:  # zstd为可选依赖，未安装时使用zlib
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# (内联字段, 引用字段)
+BLOB_FIELDS = [
+    ('response_body', 'response_body_blob'),
+    ('response_headers', 'response_headers_blob'),
+    ('assertion_results', 'assertion_results_blob'),
+]
+
+# 不超过该字节数的内容（如默认的 '{}'、'[]'）直接内联保存，引用的开销比内容本身还大
+INLINE_MAX_SIZE = 64
+
+# 查询时一次性取出的压缩内容数量上限，避免 IN 查询参数过多
+HASH_QUERY_BATCH_SIZE = 500
+
+
+def get_compression():
+    """获取配置的压缩算法，zstd不可用时回退为zlib"""
+    compression = getattr(settings, 'API_TEST_BLOB_COMPRESSION', 'zlib')
+    if compression == 'zstd' and zstandard is None:
+        logger.warning('未安装zstandard，结果内容改用zlib压缩')
+        return 'zlib'
+    return compression
+
+
+def compress(raw, compression):
+    """压缩内容，压缩后没有变小时不压缩"""
+    if compression == 'zstd':
+        data = zstandard.ZstdCompressor().compress(raw)
+    elif compression == 'zlib':
+        data = zlib.compress(raw, getattr(settings, 'API_TEST_BLOB_ZLIB_LEVEL', 6))
+    else:
+        return raw, 'none'
+    if len(data) >= len(raw):
+        return raw, 'none'
+    return data, compression
+
+
+def decompress(data, compression):
+    """解压内容"""
+    data = bytes(data)
+    if compression == 'zlib':
+        return zlib.decompress(data)
+    if compression == 'zstd':
+        if zstandard is None:
+            raise RuntimeError('结果内容使用zstd压缩，需要安装zstandard')
+        return zstandard.ZstdDecompressor().decompress(data)
+    return data
+
+
+def store_result_blobs(results):
+    """
+    把一批（尚未保存的）测试结果的内联内容写入内容存储
+
+    相同内容只压缩、写入一次；已存在的内容不会重复写入。
+    处理后结果的内联字段被清空，改为引用对应的 ResultBlob。
+
+    Returns:
+        int: 新写入的内容数量
+    """
+    from .models import ResultBlob
+
+    blobs = {}
+    for result in results:
+        for field, blob_field in BLOB_FIELDS:
+            text = getattr(result, field)
+            if not text:
+                continue
+            raw = text.encode('utf-8')
+            if len(raw) <= INLINE_MAX_SIZE:
+                continue
+            digest = hashlib.sha256(raw).hexdigest()
+            blob = blobs.get(digest)
+            if blob is None:
+                blob = blobs[digest] = ResultBlob(sha256=digest, size=len(raw))
+                blob.set_raw(raw)
+            setattr(result, blob_field, blob)
+            setattr(result, field, '')
+
+    if not blobs:
+        return 0
+
+    digests = list(blobs)
+    existing = set()
+    for start in range(0, len(digests), HASH_QUERY_BATCH_SIZE):
+        existing.update(ResultBlob.objects.filter(
+            sha256__in=digests[start:start + HASH_QUERY_BATCH_SIZE]
+        ).values_list('sha256', flat=True))
+
+    compression = get_compression()
+    new_blobs = []
+    for digest, blob in blobs.items():
+        if digest in existing:
+            continue
+        blob.compress(compression)
+        new_blobs.append(blob)
+    # 并发写入相同内容时忽略主键冲突
+    ResultBlob.objects.bulk_create(new_blobs, ignore_conflicts=True)
+    return len(new_blobs)
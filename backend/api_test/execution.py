@@ -0,0 +1,221 @@
+"""
+测试执行上下文
+保存一次测试执行过程中跨用例、跨工作线程共享的运行时资源
+"""
+import logging
+import threading
+from types import MappingProxyType
+
+from django.conf import settings
+
+from environments.views import log_environment_usage
+from utils.cache_utils import cache_environment_variables
+
+from .http_pool import SessionPool
+from .resilience import CircuitBreakerRegistry, RetryBudget
+from .result_sink import create_result_sink
+
+logger = logging.getLogger(__name__)
+
+
+class ExecutionContext:
+    """
+    测试执行上下文
+
+    由 ApiTestService 在一次执行（测试计划、批量执行或单个用例）开始时创建，
+    结束时关闭。上下文中的资源需要保证可以被多个工作线程同时使用。
+    """
+
+    def __init__(self, test_run=None, session_pool=None, write_mode=None, data_concurrency=1):
+        self.test_run = test_run
+        self.session_pool = session_pool or SessionPool()
+        self.sink = create_result_sink(test_run, write_mode)
+        self.progress = self.sink.progress
+        self.data_concurrency = data_concurrency
+        # 按主机熔断和重试预算在一次执行的所有用例、工作线程间共享
+        self.circuit_breakers = CircuitBreakerRegistry()
+        self.retry_budget = RetryBudget()
+        self._environment_snapshots = {}
+        self._environment_usage = {}
+        self._environment_lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """释放上下文持有的资源，并确保缓冲中的结果全部写入"""
+        try:
+            self.sink.close()
+            self.progress.flush()
+        finally:
+            self.session_pool.close()
+            self._flush_environment_usage()
+
+    def get_environment_snapshot(self, environment):
+        """
+        获取环境变量快照
+
+        每个环境在一次执行中只解析一次变量（优先读取带版本的变量缓存），
+        之后所有用例、数据行和工作线程共享同一个只读快照，
+        执行过程中对环境变量的修改不会影响正在进行的执行。
+        """
+        with self._environment_lock:
+            snapshot = self._environment_snapshots.get(environment.pk)
+            if snapshot is None:
+                snapshot = EnvironmentSnapshot(environment)
+                self._environment_snapshots[environment.pk] = snapshot
+            return snapshot
+
+    def record_environment_usage(self, environment, user, test_case, row_number=None):
+        """累计环境使用情况，执行结束时每个环境只写一条使用日志"""
+        with self._environment_lock:
+            usage = self._environment_usage.get(environment.pk)
+            if usage is None:
+                usage = self._environment_usage[environment.pk] = {
+                    'environment': environment,
+                    'user': user,
+                    'test_case_ids': set(),
+                    'row_count': 0,
+                    'apis': {},
+                }
+            usage['test_case_ids'].add(test_case.pk)
+            if row_number is not None:
+                usage['row_count'] += 1
+            api = test_case.api
+            usage['apis'].setdefault(api.pk, {'id': api.pk, 'name': api.name, 'method': api.method, 'url': api.url})
+
+    def _flush_environment_usage(self):
+        with self._environment_lock:
+            usages, self._environment_usage = self._environment_usage, {}
+        action = 'test_plan' if self.test_run is not None and self.test_run.test_plan_id else 'api_test'
+        for usage in usages.values():
+            if usage['user'] is None:
+                continue
+            context = {
+                'case_count': len(usage['test_case_ids']),
+                'row_count': usage['row_count'],
+                'apis': list(usage['apis'].values()),
+            }
+            if self.test_run is not None:
+                context['test_run_id'] = self.test_run.pk
+            try:
+                log_environment_usage(usage['environment'], usage['user'], action, context)
+            except Exception:
+                # 使用日志只用于统计，写入失败不影响执行结果
+                logger.exception(f"记录环境使用日志失败: {usage['environment'].pk}")
+
+
+class EnvironmentSnapshot:
+    """执行开始时环境变量的只读快照"""
+
+    def __init__(self, environment):
+        self.environment_id = environment.pk
+        self.name = environment.name
+        self.variables = MappingProxyType(dict(cache_environment_variables(environment.pk)))
+
+
+class DataDrivenAggregate:
+    """
+    数据驱动测试的流式统计
+
+    每个分片先在本地累计，结束后合并到总体统计中，
+    只保留计数、响应时间汇总和有限数量的失败行样本，内存占用与数据行数无关。
+    """
+
+    def __init__(self, sample_size=None):
+        self.sample_size = sample_size if sample_size is not None else getattr(
+            settings, 'API_TEST_DATA_RESULT_SAMPLE_SIZE', 100
+        )
+        self.total = 0
+        self.passed = 0
+        self.failed = 0
+        self.errors = 0
+        self.response_time_total = 0.0
+        self.response_time_count = 0
+        self.response_time_min = None
+        self.response_time_max = None
+        self.samples = []
+        self.omitted_samples = 0
+        self._lock = threading.Lock()
+
+    def add(self, row_number, result):
+        """累计一行数据的执行结果"""
+        self.total += 1
+        if result.status == 'passed':
+            self.passed += 1
+        elif result.status == 'failed':
+            self.failed += 1
+        else:
+            self.errors += 1
+
+        if result.response_time is not None:
+            self.response_time_total += result.response_time
+            self.response_time_count += 1
+            if self.response_time_min is None or result.response_time < self.response_time_min:
+                self.response_time_min = result.response_time
+            if self.response_time_max is None or result.response_time > self.response_time_max:
+                self.response_time_max = result.response_time
+
+        if result.status != 'passed':
+            if len(self.samples) < self.sample_size:
+                self.samples.append({
+                    'row': row_number,
+                    'status': result.status,
+                    'response_code': result.response_code,
+                    'response_time': result.response_time,
+                    'error_message': result.error_message or None
+                })
+            else:
+                self.omitted_samples += 1
+
+    def merge(self, other):
+        """合并另一个分片的统计（线程安全）"""
+        with self._lock:
+            self.total += other.total
+            self.passed += other.passed
+            self.failed += other.failed
+            self.errors += other.errors
+            self.response_time_total += other.response_time_total
+            self.response_time_count += other.response_time_count
+            for value in (other.response_time_min, other.response_time_max):
+                if value is None:
+                    continue
+                if self.response_time_min is None or value < self.response_time_min:
+                    self.response_time_min = value
+                if self.response_time_max is None or value > self.response_time_max:
+                    self.response_time_max = value
+            room = self.sample_size - len(self.samples)
+            self.samples.extend(other.samples[:room])
+            self.omitted_samples += other.omitted_samples + max(0, len(other.samples) - room)
+
+    @property
+    def overall_status(self):
+        if self.errors > 0:
+            return 'error'
+        if self.failed > 0:
+            return 'failed'
+        return 'passed'
+
+    def to_summary(self):
+        """生成汇总结果的响应内容"""
+        avg_response_time = None
+        if self.response_time_count:
+            avg_response_time = round(self.response_time_total / self.response_time_count, 2)
+        return {
+            'data_driven_summary': {
+                'total_tests': self.total,
+                'passed': self.passed,
+                'failed': self.failed,
+                'errors': self.errors,
+                'success_rate': f"{(self.passed / self.total * 100):.1f}%" if self.total else '0.0%',
+                'avg_response_time': avg_response_time,
+                'min_response_time': self.response_time_min,
+                'max_response_time': self.response_time_max,
+            },
+            # 只保留未通过的数据行样本，完整结果可通过各行的测试结果查询
+            'individual_results': sorted(self.samples, key=lambda item: item['row']),
+            'omitted_results': self.omitted_samples,
+        }
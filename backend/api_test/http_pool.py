@@ -0,0 +1,110 @@
+"""
+HTTP连接池
+为测试执行提供按目标主机和环境复用的 keep-alive 会话，避免每个请求都重新建立TCP/TLS连接
+"""
+import logging
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from urllib3.exceptions import ProtocolError
+from urllib3.util.retry import Retry
+
+from .http_timing import TimedHTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+class _RejectCookiesPolicy(DefaultCookiePolicy):
+    """不保存响应中的Cookie，保证复用会话时各用例之间互不影响"""
+
+    def set_ok(self, cookie, request):
+        return False
+
+
+class StaleConnectionRetry(Retry):
+    """
+    只对失效的keep-alive连接进行重试
+
+    服务端关闭空闲连接后，复用该连接发送请求会得到 ProtocolError。
+    这种情况对幂等方法重试一次即可；其他错误（超时、连接被拒绝等）
+    保持 requests 默认的不重试行为，不影响响应时间统计。
+    """
+
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if not isinstance(error, ProtocolError):
+            return Retry(0, read=False).increment(method, url, response, error, _pool, _stacktrace)
+        logger.debug(f'复用连接已失效，重试请求: {method} {url}')
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+
+
+class SessionPool:
+    """
+    按 (环境, 协议, 主机) 复用的 requests.Session 集合
+
+    同一次测试执行中的所有用例共享一个 SessionPool，可以在多个工作线程间安全使用：
+    会话的创建由锁保护，底层 urllib3 连接池本身是线程安全的，且会话不保存Cookie。
+    """
+
+    def __init__(self, pool_maxsize=None, keep_alive=None, stale_retries=None):
+        self.pool_maxsize = pool_maxsize or getattr(settings, 'API_TEST_HTTP_POOL_MAXSIZE', 32)
+        self.keep_alive = keep_alive if keep_alive is not None else getattr(settings, 'API_TEST_HTTP_KEEP_ALIVE', True)
+        self.stale_retries = stale_retries if stale_retries is not None else getattr(
+            settings, 'API_TEST_HTTP_STALE_RETRIES', 1
+        )
+        self._sessions = {}
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @staticmethod
+    def _make_key(url, environment=None):
+        parts = urlsplit(url)
+        environment_id = getattr(environment, 'id', environment)
+        return (environment_id, parts.scheme.lower(), parts.netloc.lower())
+
+    def _create_session(self):
+        session = requests.Session()
+        session.cookies.set_policy(_RejectCookiesPolicy())
+        adapter = TimedHTTPAdapter(
+            pool_connections=1,
+            pool_maxsize=self.pool_maxsize,
+            max_retries=StaleConnectionRetry(
+                total=self.stale_retries, connect=0, read=self.stale_retries, status=0, other=0
+            ),
+        )
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        if not self.keep_alive:
+            session.headers['Connection'] = 'close'
+        return session
+
+    def get_session(self, url, environment=None):
+        """获取目标地址对应的会话，不存在时创建"""
+        key = self._make_key(url, environment)
+        session = self._sessions.get(key)
+        if session is None:
+            with self._lock:
+                session = self._sessions.get(key)
+                if session is None:
+                    session = self._create_session()
+                    self._sessions[key] = session
+        return session
+
+    def request(self, method, url, environment=None, **kwargs):
+        """通过复用的会话发送请求，参数与 requests.request 一致"""
+        return self.get_session(url, environment).request(method=method, url=url, **kwargs)
+
+    def close(self):
+        """关闭所有会话及其连接"""
+        with self._lock:
+            sessions = list(self._sessions.values())
+            self._sessions.clear()
+        for session in sessions:
+            session.close()
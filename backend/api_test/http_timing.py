@@ -0,0 +1,153 @@
+"""
+请求分阶段计时
+通过自定义的 urllib3 连接类记录DNS解析、TCP连接和TLS握手耗时，
+由执行器补充等待首字节和内容传输耗时，用于区分慢服务和慢网络
+"""
+import ipaddress
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError, NewConnectionError
+
+_local = threading.local()
+
+
+class PhaseTiming:
+    """
+    单个请求的分阶段耗时（毫秒）
+
+    各阶段首尾相接：dns + connect + tls + wait + transfer 约等于总响应时间。
+    复用keep-alive连接时没有建立连接的开销，dns、connect、tls 均为 0。
+    """
+
+    def __init__(self):
+        self.dns = 0.0
+        self.connect = 0.0
+        self.tls = 0.0
+        self.wait = None
+        self.transfer = None
+        self.bytes_received = None
+        self.connection_reused = True
+
+    @property
+    def setup(self):
+        """建立连接的总耗时"""
+        return self.dns + self.connect + self.tls
+
+
+def current_timing():
+    """当前线程正在计时的请求，没有时返回 None"""
+    return getattr(_local, 'timing', None)
+
+
+@contextmanager
+def measure():
+    """
+    记录代码块内发送的请求的连接阶段耗时
+
+    用法：
+        with measure() as timing:
+            response = session.request(...)
+    """
+    timing = PhaseTiming()
+    previous = current_timing()
+    _local.timing = timing
+    try:
+        yield timing
+    finally:
+        _local.timing = previous
+
+
+def _is_ip_address(host):
+    try:
+        ipaddress.ip_address(host.strip('[]'))
+        return True
+    except ValueError:
+        return False
+
+
+class TimedConnectionMixin:
+    """在建立新连接时记录DNS解析和TCP连接耗时"""
+
+    def _new_conn(self):
+        timing = current_timing()
+        host = self._dns_host
+        if timing is None or _is_ip_address(host):
+            start = time.perf_counter()
+            sock = super()._new_conn()
+            if timing is not None:
+                timing.connection_reused = False
+                timing.dns = 0.0
+                timing.connect = (time.perf_counter() - start) * 1000
+            return sock
+
+        start = time.perf_counter()
+        try:
+            addresses = list(dict.fromkeys(
+                info[4][0] for info in socket.getaddrinfo(host, self.port, 0, socket.SOCK_STREAM)
+            ))
+        except socket.gaierror:
+            # 交给 urllib3 抛出原有的解析失败异常
+            return super()._new_conn()
+        resolved = time.perf_counter()
+
+        # 依次连接解析到的地址（与 socket.create_connection 的行为一致），不再重复解析；
+        # TLS 的 SNI 和证书校验使用的是 self.host，不受影响
+        last_error = None
+        try:
+            for address in addresses:
+                self._dns_host = address
+                try:
+                    sock = super()._new_conn()
+                    break
+                except (ConnectTimeoutError, NewConnectionError) as e:
+                    last_error = e
+            else:
+                raise last_error
+        finally:
+            self._dns_host = host
+
+        timing.connection_reused = False
+        timing.dns = (resolved - start) * 1000
+        timing.connect = (time.perf_counter() - resolved) * 1000
+        return sock
+
+
+class TimedHTTPConnection(TimedConnectionMixin, HTTPConnection):
+    pass
+
+
+class TimedHTTPSConnection(TimedConnectionMixin, HTTPSConnection):
+    """额外记录TLS握手耗时（建立连接总耗时减去DNS和TCP连接）"""
+
+    def connect(self):
+        timing = current_timing()
+        start = time.perf_counter()
+        super().connect()
+        if timing is not None:
+            total = (time.perf_counter() - start) * 1000
+            timing.tls = max(total - timing.dns - timing.connect, 0.0)
+
+
+class TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = TimedHTTPConnection
+
+
+class TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = TimedHTTPSConnection
+
+
+class TimedHTTPAdapter(HTTPAdapter):
+    """使用可计时连接的 HTTPAdapter；没有在 measure() 中发送的请求不受影响"""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            'http': TimedHTTPConnectionPool,
+            'https': TimedHTTPSConnectionPool,
+        }
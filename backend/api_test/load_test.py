@@ -0,0 +1,216 @@
+"""
+压力测试引擎
+按负载阶段以目标RPS（开放模型）或固定并发（封闭模型）持续发送请求，
+按秒统计吞吐量和错误数，延迟记录在对数分桶直方图中
+"""
+import math
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import connection
+
+from utils.histogram_utils import LatencyHistogram
+
+# 调度循环空闲时的最长等待时间（秒），决定停止和阶段切换的响应速度
+SCHEDULER_TICK = 0.05
+
+# 速率调度落后超过该时间（秒）时不再补发，避免被压服务恢复后收到突发流量
+MAX_SCHEDULE_LAG = 1.0
+
+
+class LoadProfile:
+    """
+    负载曲线
+
+    stages 为 [(持续秒数, 目标值), ...]，每个阶段内目标值从上一阶段的目标值线性变化到本阶段的目标值，
+    第一个阶段从 0 开始爬升。没有阶段时整个过程保持 target 不变。
+    duration 超过各阶段总时长时保持最后一个阶段的目标值。
+    """
+
+    def __init__(self, target=0, stages=None, duration=None):
+        self.stages = [(float(stage_duration), float(stage_target)) for stage_duration, stage_target in stages or []]
+        self.target = float(target or 0)
+        stage_total = sum(stage_duration for stage_duration, _ in self.stages)
+        if duration is not None:
+            self.duration = float(duration)
+        elif self.stages:
+            self.duration = stage_total
+        else:
+            self.duration = math.inf
+
+    @property
+    def peak(self):
+        """整个过程中的最大目标值"""
+        if not self.stages:
+            return self.target
+        return max(stage_target for _, stage_target in self.stages)
+
+    def target_at(self, elapsed):
+        if not self.stages:
+            return self.target
+        previous = 0.0
+        for stage_duration, stage_target in self.stages:
+            if elapsed < stage_duration:
+                return previous + (stage_target - previous) * elapsed / stage_duration
+            elapsed -= stage_duration
+            previous = stage_target
+        return previous
+
+
+class LoadTestStats:
+    """压测统计，可被多个工作线程同时写入"""
+
+    def __init__(self):
+        self.histogram = LatencyHistogram()
+        self.total = 0
+        self.errors = 0
+        self.errors_by_type = Counter()
+        self.seconds = {}
+        self._lock = threading.Lock()
+
+    def record(self, second, latency, error=None):
+        with self._lock:
+            self.total += 1
+            self.histogram.record(latency)
+            bucket = self.seconds.get(second)
+            if bucket is None:
+                bucket = self.seconds[second] = [0, 0, 0.0]
+            bucket[0] += 1
+            bucket[2] += latency
+            if error is not None:
+                self.errors += 1
+                self.errors_by_type[error] += 1
+                bucket[1] += 1
+
+    def timeline(self):
+        """按秒的吞吐量、失败数和平均延迟"""
+        with self._lock:
+            seconds = dict(self.seconds)
+        if not seconds:
+            return []
+        return [
+            {
+                'second': second,
+                'requests': seconds.get(second, (0, 0, 0.0))[0],
+                'errors': seconds.get(second, (0, 0, 0.0))[1],
+                'avg_latency': round(seconds[second][2] / seconds[second][0], 2) if second in seconds else None,
+            }
+            for second in range(max(seconds) + 1)
+        ]
+
+
+class LoadTestEngine:
+    """
+    压测执行器
+
+    action 为发送一次请求的可调用对象：成功时返回 None，失败时返回错误分类（如 "HTTP 500"），
+    执行器负责计时和统计。stop_event 被设置后尽快停止。
+    """
+
+    def __init__(self, action, profile, mode='rps', concurrency=10, request_count=None, stop_event=None):
+        self.action = action
+        self.profile = profile
+        self.mode = mode
+        self.concurrency = max(1, int(concurrency or 1))
+        self.request_count = request_count
+        self.stop_event = stop_event or threading.Event()
+        self.stats = LoadTestStats()
+        self._issued = 0
+        self._issued_lock = threading.Lock()
+
+    def run(self):
+        self._start = time.monotonic()
+        if self.mode == 'concurrency':
+            self._run_closed()
+        else:
+            self._run_open()
+        self.elapsed = time.monotonic() - self._start
+        return self.stats
+
+    def _finished(self):
+        if self.stop_event.is_set():
+            return True
+        if time.monotonic() - self._start >= self.profile.duration:
+            return True
+        return self.request_count is not None and self._issued >= self.request_count
+
+    def _take_request(self):
+        """领取一个请求名额，达到请求总数时返回 False"""
+        with self._issued_lock:
+            if self.request_count is not None and self._issued >= self.request_count:
+                return False
+            self._issued += 1
+            return True
+
+    def _fire(self):
+        start = time.monotonic()
+        try:
+            error = self.action()
+        except Exception as e:
+            error = type(e).__name__
+        end = time.monotonic()
+        self.stats.record(int(start - self._start), (end - start) * 1000, error)
+
+    def _run_open(self):
+        """固定速率：按目标RPS调度请求，进行中的请求数不超过 concurrency"""
+        slots = threading.BoundedSemaphore(self.concurrency)
+
+        def fire():
+            try:
+                self._fire()
+            finally:
+                slots.release()
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            # due 为按负载曲线积分得到的应发送请求数，阶段内速率变化时也能准确跟随
+            due = 0.0
+            sent = 0
+            last_time, last_rate = self._start, self.profile.target_at(0)
+            while not self._finished():
+                now = time.monotonic()
+                rate = self.profile.target_at(now - self._start)
+                due += (rate + last_rate) / 2 * (now - last_time)
+                last_time, last_rate = now, rate
+                # 落后太多时放弃补发，避免被压服务恢复后收到突发流量
+                due = min(due, sent + max(rate * MAX_SCHEDULE_LAG, 1))
+                if sent + 1 > due:
+                    wait = (sent + 1 - due) / rate if rate > 0 else SCHEDULER_TICK
+                    time.sleep(min(wait, SCHEDULER_TICK))
+                    continue
+                if not slots.acquire(timeout=SCHEDULER_TICK):
+                    # 所有请求都在进行中，被压服务已跟不上目标速率
+                    continue
+                if not self._take_request():
+                    slots.release()
+                    break
+                executor.submit(fire)
+                sent += 1
+
+    def _run_closed(self):
+        """固定并发：每个虚拟用户循环发送请求，活跃用户数随负载阶段变化"""
+        users = max(1, math.ceil(self.profile.peak)) if self.profile.stages else self.concurrency
+
+        def active_users():
+            if not self.profile.stages:
+                return users
+            return math.ceil(self.profile.target_at(time.monotonic() - self._start))
+
+        def user_loop(index):
+            try:
+                while not self._finished():
+                    if index >= active_users():
+                        time.sleep(SCHEDULER_TICK)
+                        continue
+                    if not self._take_request():
+                        return
+                    self._fire()
+            finally:
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=users) as executor:
+            futures = [executor.submit(user_loop, index) for index in range(users)]
+            for future in futures:
+                future.result()
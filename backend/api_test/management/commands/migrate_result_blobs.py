@@ -0,0 +1,64 @@
+"""
+测试结果内容迁移
+
+把历史测试结果中内联保存的响应体、响应头和断言详情迁移到内容存储：
+
+    python manage.py migrate_result_blobs
+    python manage.py migrate_result_blobs --batch-size 200 --prune
+"""
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Length
+
+from api_test.blob_store import BLOB_FIELDS, INLINE_MAX_SIZE, store_result_blobs
+from api_test.models import ApiTestResult, ResultBlob
+
+
+class Command(BaseCommand):
+    help = '把测试结果的内联内容迁移到去重、压缩的内容存储'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=500,
+            help='每批迁移的结果数量，默认500'
+        )
+        parser.add_argument(
+            '--prune', action='store_true',
+            help='迁移完成后删除没有被任何结果引用的内容'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        lengths = {f'{field}_length': Length(field) for field, _ in BLOB_FIELDS}
+        pending = Q()
+        for field, blob_field in BLOB_FIELDS:
+            pending |= Q(**{f'{blob_field}__isnull': True, f'{field}_length__gt': INLINE_MAX_SIZE})
+        update_fields = [name for pair in BLOB_FIELDS for name in pair]
+
+        migrated = 0
+        created = 0
+        last_id = 0
+        while True:
+            batch = list(
+                ApiTestResult.objects.annotate(**lengths).filter(pending, id__gt=last_id).order_by('id')[:batch_size]
+            )
+            if not batch:
+                break
+            with transaction.atomic():
+                created += store_result_blobs(batch)
+                ApiTestResult.objects.bulk_update(batch, update_fields)
+            migrated += len(batch)
+            last_id = batch[-1].id
+            self.stdout.write(f'已迁移 {migrated} 条测试结果')
+
+        self.stdout.write(self.style.SUCCESS(f'迁移完成: {migrated} 条测试结果，新增 {created} 个内容'))
+
+        if options['prune']:
+            referenced = Q()
+            for _, blob_field in BLOB_FIELDS:
+                referenced |= Q(sha256__in=ApiTestResult.objects.filter(
+                    **{f'{blob_field}__isnull': False}
+                ).values(f'{blob_field}_id'))
+            deleted, _ = ResultBlob.objects.exclude(referenced).delete()
+            self.stdout.write(self.style.SUCCESS(f'已清理 {deleted} 个未被引用的内容'))
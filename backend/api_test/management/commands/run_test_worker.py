@@ -0,0 +1,120 @@
+"""
+测试执行worker
+
+从数据库执行队列中领取并执行测试计划/批量执行任务，可以启动多个进程并行消费：
+
+    python manage.py run_test_worker
+    python manage.py run_test_worker --once
+"""
+import os
+import signal
+import socket
+import threading
+import time
+from contextlib import contextmanager
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections
+
+from api_test.models import TestRunJob
+from api_test.views import ApiTestService
+
+
+class Command(BaseCommand):
+    help = '从执行队列中领取并执行测试任务'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--poll-interval', type=float, default=2.0,
+            help='队列为空时的轮询间隔（秒），默认2秒'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='处理完当前队列中的任务后退出'
+        )
+        parser.add_argument(
+            '--requeue-stale', type=int, default=0,
+            help='将超过指定秒数没有心跳的任务重新入队（0表示不处理），需大于心跳间隔的2倍'
+        )
+        parser.add_argument(
+            '--heartbeat-interval', type=float, default=10.0,
+            help='执行任务期间更新心跳的间隔（秒），默认10秒'
+        )
+        parser.add_argument(
+            '--name', default='',
+            help='worker名称，默认使用 主机名:进程号'
+        )
+
+    def handle(self, *args, **options):
+        worker_name = options['name'] or f'{socket.gethostname()}:{os.getpid()}'
+        poll_interval = options['poll_interval']
+        if options['requeue_stale'] and options['requeue_stale'] <= options['heartbeat_interval'] * 2:
+            raise CommandError('--requeue-stale 必须大于 --heartbeat-interval 的2倍，否则正常执行的任务也会被重新入队')
+        self._stopping = False
+
+        previous_handlers = {
+            signum: signal.signal(signum, self._request_stop)
+            for signum in (signal.SIGTERM, signal.SIGINT)
+        }
+        try:
+            self._run(worker_name, poll_interval, options)
+        finally:
+            for signum, handler in previous_handlers.items():
+                signal.signal(signum, handler)
+
+    def _run(self, worker_name, poll_interval, options):
+        self.stdout.write(f'测试执行worker已启动: {worker_name}')
+
+        while not self._stopping:
+            close_old_connections()
+
+            if options['requeue_stale']:
+                requeued = TestRunJob.requeue_stale(options['requeue_stale'])
+                if requeued:
+                    self.stdout.write(self.style.WARNING(f'重新入队 {requeued} 个超时任务'))
+
+            job = TestRunJob.claim_next(worker_name)
+            if job is None:
+                if options['once']:
+                    break
+                time.sleep(poll_interval)
+                continue
+
+            if job.load_test_id:
+                self.stdout.write(f'开始执行任务 #{job.id}（压测记录 #{job.load_test_id}）')
+            else:
+                self.stdout.write(f'开始执行任务 #{job.id}（测试执行记录 #{job.test_run_id}）')
+            with self._heartbeat(job, options['heartbeat_interval']):
+                job = ApiTestService.process_job(job)
+            if job.status == 'completed':
+                self.stdout.write(self.style.SUCCESS(f'任务 #{job.id} 执行完成'))
+            else:
+                self.stdout.write(self.style.ERROR(f'任务 #{job.id} 执行失败: {job.error_message}'))
+
+        self.stdout.write('测试执行worker已退出')
+
+    @contextmanager
+    def _heartbeat(self, job, interval):
+        """执行任务期间在后台线程中定期更新心跳，避免长时间执行的任务被其他worker重新入队"""
+        done = threading.Event()
+
+        def beat():
+            try:
+                while not done.wait(interval):
+                    if not job.heartbeat():
+                        self.stderr.write(f'任务 #{job.id} 已被重新入队，当前执行的结果可能被覆盖')
+                        break
+            finally:
+                close_old_connections()
+
+        thread = threading.Thread(target=beat, name=f'job-heartbeat-{job.id}', daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            done.set()
+            thread.join()
+
+    def _request_stop(self, signum, frame):
+        """收到退出信号后在当前任务结束时退出"""
+        self._stopping = True
@@ -0,0 +1,63 @@
+# Generated by Django 4.2.11 on 2026-10-16 22:50
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_test', '0005_alter_testrun_start_time'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='apidefinition',
+            options={'ordering': ['-created_at'], 'verbose_name': '接口定义', 'verbose_name_plural': '接口定义'},
+        ),
+        migrations.AlterModelOptions(
+            name='apitestcase',
+            options={'ordering': ['-created_at'], 'verbose_name': '接口测试用例', 'verbose_name_plural': '接口测试用例'},
+        ),
+        migrations.AlterModelOptions(
+            name='apitestresult',
+            options={'ordering': ['-executed_at'], 'verbose_name': '接口测试结果', 'verbose_name_plural': '接口测试结果'},
+        ),
+        migrations.AddField(
+            model_name='testrun',
+            name='completed_cases',
+            field=models.IntegerField(default=0, verbose_name='已执行用例数'),
+        ),
+        migrations.AddField(
+            model_name='testrun',
+            name='planned_cases',
+            field=models.IntegerField(default=0, verbose_name='计划执行用例数'),
+        ),
+        migrations.AlterField(
+            model_name='testrun',
+            name='status',
+            field=models.CharField(choices=[('queued', '排队中'), ('running', '运行中'), ('completed', '已完成'), ('failed', '执行失败')], default='running', max_length=20, verbose_name='执行状态'),
+        ),
+        migrations.CreateModel(
+            name='TestRunJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_type', models.CharField(choices=[('test_plan', '执行测试计划'), ('batch', '批量执行用例')], max_length=20, verbose_name='任务类型')),
+                ('payload', models.JSONField(default=dict, verbose_name='任务参数')),
+                ('status', models.CharField(choices=[('pending', '排队中'), ('running', '执行中'), ('completed', '已完成'), ('failed', '执行失败')], default='pending', max_length=20, verbose_name='任务状态')),
+                ('worker', models.CharField(blank=True, max_length=100, verbose_name='执行进程')),
+                ('attempts', models.IntegerField(default=0, verbose_name='领取次数')),
+                ('error_message', models.TextField(blank=True, verbose_name='错误信息')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('claimed_at', models.DateTimeField(blank=True, null=True, verbose_name='领取时间')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='结束时间')),
+                ('test_run', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='job', to='api_test.testrun', verbose_name='测试执行记录')),
+            ],
+            options={
+                'verbose_name': '测试执行任务',
+                'verbose_name_plural': '测试执行任务',
+                'ordering': ['created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='api_test_job_queue_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-16 22:53
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_test', '0006_testrunjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testrun',
+            name='result_write_mode',
+            field=models.CharField(choices=[('immediate', '逐条写入'), ('buffered', '批量写入')], default='buffered', help_text='批量写入可减少数据库写入次数，逐条写入可实时看到每条结果', max_length=20, verbose_name='结果写入模式'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-16 23:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_test', '0007_testrun_result_write_mode'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apitestresult',
+            name='assertion_time',
+            field=models.FloatField(blank=True, null=True, verbose_name='断言耗时(ms)'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.11 on 2026-10-16 23:04
+
+from django.db import migrations, models
+
+
+def backfill_test_case_links(apps, schema_editor):
+    """按原来测试计划的名称匹配规则（接口用例名称包含功能用例标题）建立关联"""
+    ApiTestCase = apps.get_model('api_test', 'ApiTestCase')
+    TestCase = apps.get_model('testcases', 'TestCase')
+    Link = ApiTestCase.test_cases.through
+
+    test_cases = list(TestCase.objects.values_list('id', 'title'))
+    links = []
+    for api_case_id, name in ApiTestCase.objects.values_list('id', 'name'):
+        name = name.lower()
+        for test_case_id, title in test_cases:
+            if title.lower() in name:
+                links.append(Link(apitestcase_id=api_case_id, testcase_id=test_case_id))
+
+    Link.objects.bulk_create(links, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testcases', '0004_testdatafile_metadata'),
+        ('api_test', '0008_apitestresult_assertion_time'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apitestcase',
+            name='test_cases',
+            field=models.ManyToManyField(blank=True, related_name='api_test_cases', to='testcases.testcase', verbose_name='关联测试用例'),
+        ),
+        migrations.RunPython(backfill_test_case_links, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.11 on 2026-10-16 23:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_test', '0009_apitestcase_test_cases'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apitestcase',
+            name='response_capture_limit',
+            field=models.PositiveIntegerField(blank=True, help_text='测试结果中保存的响应体最大长度，为空时使用系统默认值', null=True, verbose_name='响应捕获上限(字节)'),
+        ),
+        migrations.AddField(
+            model_name='apitestresult',
+            name='response_hash',
+            field=models.CharField(blank=True, max_length=64, verbose_name='响应体SHA256'),
+        ),
+        migrations.AddField(
+            model_name='apitestresult',
+            name='response_size',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='响应体大小(字节)'),
+        ),
+        migrations.AddField(
+            model_name='apitestresult',
+            name='response_truncated',
+            field=models.BooleanField(default=False, verbose_name='响应体已截断'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 4.2.11 on 2026-10-16 23:07
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_test', '0010_response_capture'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResultBlob',
+            fields=[
+                ('sha256', models.CharField(max_length=64, primary_key=True, serialize=False, verbose_name='内容哈希')),
+                ('compression', models.CharField(choices=[('none', '不压缩'), ('zlib', 'zlib'), ('zstd', 'zstd')], default='none', max_length=10, verbose_name='压缩算法')),
+                ('data', models.BinaryField(verbose_name='内容')),
+                ('size', models.IntegerField(default=0, verbose_name='原始大小(字节)')),
+                ('stored_size', models.IntegerField(default=0, verbose_name='存储大小(字节)')),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'verbose_name': '测试结果内容',
+                'verbose_name_plural': '测试结果内容',
+            },
+        ),
+        migrations.AddField(
+            model_name='apitestresult',
+            name='assertion_results_blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='api_test.resultblob', verbose_name='断言结果详情'),
+        ),
+        migrations.AddField(
+            model_name='apitestresult',
+            name='response_body_blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='api_test.resultblob', verbose_name='响应内容'),
+        ),
+        migrations.AddField(
+            model_name='apitestresult',
+            name='response_headers_blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='+', to='api_test.resultblob', verbose_name='响应头'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.11 on 2026-10-16 23:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_test', '0011_resultblob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testrun',
+            name='body_bytes_saved',
+            field=models.BigIntegerField(default=0, verbose_name='保留策略节省的存储(字节)'),
+        ),
+        migrations.AddField(
+            model_name='testrun',
+            name='body_retention',
+            field=models.CharField(choices=[('full', '保留全部响应体'), ('failures_only', '只保留失败/错误结果的响应体'), ('truncate_passed', '通过的结果只保留前N KB')], default='full', help_text='响应头和断言详情始终保留', max_length=20, verbose_name='响应体保留策略'),
+        ),
+        migrations.AddField(
+            model_name='testrun',
+            name='body_retention_kb',
+            field=models.PositiveIntegerField(default=0, verbose_name='通过结果保留大小(KB)'),
+        ),
+    ]
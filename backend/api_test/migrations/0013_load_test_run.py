@@ -0,0 +1,83 @@
+# Generated by Django 4.2.11 on 2026-10-16 23:14
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('environments', '0001_initial'),
+        ('api_test', '0012_testrun_body_retention'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='testrunjob',
+            name='job_type',
+            field=models.CharField(choices=[('test_plan', '执行测试计划'), ('batch', '批量执行用例'), ('load_test', '压力测试')], max_length=20, verbose_name='任务类型'),
+        ),
+        migrations.AlterField(
+            model_name='testrunjob',
+            name='test_run',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='job', to='api_test.testrun', verbose_name='测试执行记录'),
+        ),
+        migrations.CreateModel(
+            name='LoadTestRun',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=200, verbose_name='压测名称')),
+                ('mode', models.CharField(choices=[('rps', '固定速率（RPS）'), ('concurrency', '固定并发')], default='rps', max_length=20, verbose_name='负载模式')),
+                ('target_rps', models.FloatField(blank=True, help_text='固定速率模式下每秒发送的请求数', null=True, verbose_name='目标RPS')),
+                ('concurrency', models.PositiveIntegerField(default=10, help_text='固定并发模式下的虚拟用户数；固定速率模式下为同时进行中的请求上限', verbose_name='并发数')),
+                ('duration', models.FloatField(blank=True, null=True, verbose_name='持续时间(秒)')),
+                ('request_count', models.PositiveIntegerField(blank=True, null=True, verbose_name='请求总数')),
+                ('stages', models.JSONField(blank=True, default=list, help_text='如 [{"duration": 30, "target": 50}, {"duration": 60, "target": 50}]，target 在各阶段内从上一阶段的值线性爬升', verbose_name='负载阶段')),
+                ('timeout', models.FloatField(default=30, verbose_name='请求超时(秒)')),
+                ('status', models.CharField(choices=[('pending', '待执行'), ('queued', '排队中'), ('running', '运行中'), ('completed', '已完成'), ('failed', '执行失败')], default='pending', max_length=20, verbose_name='执行状态')),
+                ('start_time', models.DateTimeField(blank=True, null=True, verbose_name='开始时间')),
+                ('end_time', models.DateTimeField(blank=True, null=True, verbose_name='结束时间')),
+                ('total_requests', models.IntegerField(default=0, verbose_name='请求总数')),
+                ('error_requests', models.IntegerField(default=0, verbose_name='失败请求数')),
+                ('errors_by_type', models.JSONField(blank=True, default=dict, verbose_name='错误分类统计')),
+                ('latency_min', models.FloatField(blank=True, null=True, verbose_name='最小延迟(ms)')),
+                ('latency_mean', models.FloatField(blank=True, null=True, verbose_name='平均延迟(ms)')),
+                ('latency_max', models.FloatField(blank=True, null=True, verbose_name='最大延迟(ms)')),
+                ('latency_p50', models.FloatField(blank=True, null=True, verbose_name='P50延迟(ms)')),
+                ('latency_p90', models.FloatField(blank=True, null=True, verbose_name='P90延迟(ms)')),
+                ('latency_p99', models.FloatField(blank=True, null=True, verbose_name='P99延迟(ms)')),
+                ('latency_p999', models.FloatField(blank=True, null=True, verbose_name='P99.9延迟(ms)')),
+                ('latency_histogram', models.JSONField(blank=True, default=dict, verbose_name='延迟直方图')),
+                ('timeline', models.JSONField(blank=True, default=list, help_text='每秒的请求数、失败数和平均延迟', verbose_name='每秒统计')),
+                ('error_message', models.TextField(blank=True, verbose_name='错误信息')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='创建时间')),
+                ('created_by', models.ForeignKey(null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='load_tests', to=settings.AUTH_USER_MODEL, verbose_name='创建者')),
+                ('environment', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='load_tests', to='environments.environment', verbose_name='测试环境')),
+            ],
+            options={
+                'verbose_name': '压力测试',
+                'verbose_name_plural': '压力测试',
+                'ordering': ['-created_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='LoadTestCase',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('weight', models.PositiveIntegerField(default=1, verbose_name='权重')),
+                ('load_test', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cases', to='api_test.loadtestrun', verbose_name='压测记录')),
+                ('test_case', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='load_tests', to='api_test.apitestcase', verbose_name='接口用例')),
+            ],
+            options={
+                'verbose_name': '压测用例',
+                'verbose_name_plural': '压测用例',
+            },
+        ),
+        migrations.AddField(
+            model_name='testrunjob',
+            name='load_test',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='job', to='api_test.loadtestrun', verbose_name='压测记录'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 4.2.11 on 2026-10-16 23:19
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+from utils.histogram_utils import LatencyHistogram
+
+
+def backfill_sketches(apps, schema_editor):
+    """由已有的测试结果生成各执行记录、各接口的响应时间分布"""
+    ApiTestResult = apps.get_model('api_test', 'ApiTestResult')
+    ResponseTimeSketch = apps.get_model('api_test', 'ResponseTimeSketch')
+
+    rows = ApiTestResult.objects.filter(
+        test_run__isnull=False, response_time__isnull=False
+    ).order_by('test_run_id', 'test_case__api_id').values_list(
+        'test_run_id', 'test_case__api_id', 'response_time'
+    )
+    sketches = []
+    current, histogram = None, None
+    for test_run_id, api_id, response_time in rows.iterator(chunk_size=2000):
+        if (test_run_id, api_id) != current:
+            if histogram is not None:
+                sketches.append(ResponseTimeSketch(
+                    test_run_id=current[0], api_id=current[1], count=histogram.count, data=histogram.to_dict()
+                ))
+            current, histogram = (test_run_id, api_id), LatencyHistogram()
+        histogram.record(response_time)
+        if len(sketches) >= 500:
+            ResponseTimeSketch.objects.bulk_create(sketches)
+            sketches = []
+    if histogram is not None:
+        sketches.append(ResponseTimeSketch(
+            test_run_id=current[0], api_id=current[1], count=histogram.count, data=histogram.to_dict()
+        ))
+    ResponseTimeSketch.objects.bulk_create(sketches)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_test', '0013_load_test_run'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ResponseTimeSketch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('count', models.IntegerField(default=0, verbose_name='样本数')),
+                ('data', models.JSONField(default=dict, verbose_name='直方图数据')),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('api', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='response_time_sketches', to='api_test.apidefinition', verbose_name='接口')),
+                ('test_run', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='response_time_sketches', to='api_test.testrun', verbose_name='测试执行记录')),
+            ],
+            options={
+                'verbose_name': '响应时间分布',
+                'verbose_name_plural': '响应时间分布',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='responsetimesketch',
+            constraint=models.UniqueConstraint(fields=('test_run', 'api'), name='unique_response_time_sketch'),
+        ),
+        migrations.RunPython(backfill_sketches, migrations.RunPython.noop),
+    ]
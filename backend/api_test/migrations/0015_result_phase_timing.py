@@ -0,0 +1,48 @@
+# Generated by Django 4.2.11 on 2026-10-16 23:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_test', '0014_responsetimesketch'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apitestresult',
+            name='bytes_received',
+            field=models.BigIntegerField(blank=True, null=True, verbose_name='接收字节数'),
+        ),
+        migrations.AddField(
+            model_name='apitestresult',
+            name='connect_time',
+            field=models.FloatField(blank=True, null=True, verbose_name='TCP连接耗时(ms)'),
+        ),
+        migrations.AddField(
+            model_name='apitestresult',
+            name='connection_reused',
+            field=models.BooleanField(blank=True, null=True, verbose_name='是否复用连接'),
+        ),
+        migrations.AddField(
+            model_name='apitestresult',
+            name='dns_time',
+            field=models.FloatField(blank=True, null=True, verbose_name='DNS解析耗时(ms)'),
+        ),
+        migrations.AddField(
+            model_name='apitestresult',
+            name='tls_time',
+            field=models.FloatField(blank=True, null=True, verbose_name='TLS握手耗时(ms)'),
+        ),
+        migrations.AddField(
+            model_name='apitestresult',
+            name='transfer_time',
+            field=models.FloatField(blank=True, null=True, verbose_name='内容传输耗时(ms)'),
+        ),
+        migrations.AddField(
+            model_name='apitestresult',
+            name='wait_time',
+            field=models.FloatField(blank=True, help_text='不含建立连接的耗时', null=True, verbose_name='等待首字节耗时(ms)'),
+        ),
+    ]
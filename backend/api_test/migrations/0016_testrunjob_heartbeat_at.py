@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-16 23:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api_test', '0015_result_phase_timing'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testrunjob',
+            name='heartbeat_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='最近心跳时间'),
+        ),
+    ]
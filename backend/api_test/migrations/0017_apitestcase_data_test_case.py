@@ -0,0 +1,50 @@
+# Generated by Django 4.2.11 on 2026-10-16 23:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+def backfill_data_test_case(apps, schema_editor):
+    """
+    按原来数据文件的名称匹配规则设置数据文件来源用例
+
+    原规则取标题包含接口用例名称的第一个功能用例（按创建时间倒序）。之前的迁移曾把这类匹配也写入了
+    测试计划的关联，这里一并删除这些不符合测试计划规则（接口用例名称包含功能用例标题）的关联。
+    """
+    ApiTestCase = apps.get_model('api_test', 'ApiTestCase')
+    TestCase = apps.get_model('testcases', 'TestCase')
+    TestDataFile = apps.get_model('testcases', 'TestDataFile')
+    Link = ApiTestCase.test_cases.through
+
+    test_cases = list(TestCase.objects.order_by('-created_at', '-id').values_list('id', 'title'))
+    with_data_file = set(TestDataFile.objects.values_list('test_case_id', flat=True))
+    for api_case_id, name in ApiTestCase.objects.values_list('id', 'name'):
+        name = name.lower()
+        first_match = next(
+            ((test_case_id, title.lower()) for test_case_id, title in test_cases if name in title.lower()), None
+        )
+        if first_match is None:
+            continue
+        test_case_id, title = first_match
+        if test_case_id not in with_data_file:
+            continue
+        ApiTestCase.objects.filter(id=api_case_id).update(data_test_case_id=test_case_id)
+        if title not in name:
+            Link.objects.filter(apitestcase_id=api_case_id, testcase_id=test_case_id).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testcases', '0005_testplan_body_retention'),
+        ('api_test', '0016_testrunjob_heartbeat_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apitestcase',
+            name='data_test_case',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='data_api_test_cases', to='testcases.testcase', verbose_name='数据文件来源用例'),
+        ),
+        migrations.RunPython(backfill_data_test_case, migrations.RunPython.noop),
+    ]
@@ -1,8 +1,13 @@
 from django.db import models
 from django.conf import settings
 from django.utils import timezone
+from datetime import timedelta
 import json
 
+from testcases.models import BODY_RETENTION_CHOICES
+from utils.histogram_utils import LatencyHistogram
+from .progress import publish_progress
+
 class ApiDefinition(models.Model):
     """接口定义模型"""
     name = models.CharField(max_length=200, verbose_name='接口名称')
@@ -66,6 +71,26 @@ class ApiTestCase(models.Model):
     max_response_time = models.IntegerField(null=True, blank=True, verbose_name='最大响应时间(ms)')
     # 新增字段：是否启用
     is_active = models.BooleanField(default=True, verbose_name='是否启用')
+    response_capture_limit = models.PositiveIntegerField(
+        null=True, blank=True, verbose_name='响应捕获上限(字节)',
+        help_text='测试结果中保存的响应体最大长度，为空时使用系统默认值'
+    )
+    # 关联的功能测试用例：测试计划通过它找到要执行的接口用例
+    test_cases = models.ManyToManyField(
+        'testcases.TestCase',
+        related_name='api_test_cases',
+        blank=True,
+        verbose_name='关联测试用例'
+    )
+    # 数据驱动测试读取该功能用例的数据文件，与测试计划的关联相互独立
+    data_test_case = models.ForeignKey(
+        'testcases.TestCase',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='data_api_test_cases',
+        verbose_name='数据文件来源用例'
+    )
     created_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='api_test_cases')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
@@ -119,11 +144,14 @@ class TestRun(models.Model):
     )
     name = models.CharField(max_length=200, verbose_name='执行名称', help_text='如：回归测试 2025-01-10')
     STATUS_CHOICES = [
+        ('queued', '排队中'),
         ('running', '运行中'),
         ('completed', '已完成'),
         ('failed', '执行失败'),
     ]
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='running', verbose_name='执行状态')
+    planned_cases = models.IntegerField(default=0, verbose_name='计划执行用例数')
+    completed_cases = models.IntegerField(default=0, verbose_name='已执行用例数')
     total_tests = models.IntegerField(default=0, verbose_name='总用例数')
     passed_tests = models.IntegerField(default=0, verbose_name='通过用例数') 
     failed_tests = models.IntegerField(default=0, verbose_name='失败用例数')
@@ -139,6 +167,26 @@ class TestRun(models.Model):
     )
     description = models.TextField(blank=True, verbose_name='执行描述')
     error_message = models.TextField(blank=True, verbose_name='错误信息')
+    WRITE_MODE_CHOICES = [
+        ('immediate', '逐条写入'),
+        ('buffered', '批量写入'),
+    ]
+    result_write_mode = models.CharField(
+        max_length=20,
+        choices=WRITE_MODE_CHOICES,
+        default='buffered',
+        verbose_name='结果写入模式',
+        help_text='批量写入可减少数据库写入次数，逐条写入可实时看到每条结果'
+    )
+    body_retention = models.CharField(
+        max_length=20,
+        choices=BODY_RETENTION_CHOICES,
+        default='full',
+        verbose_name='响应体保留策略',
+        help_text='响应头和断言详情始终保留'
+    )
+    body_retention_kb = models.PositiveIntegerField(default=0, verbose_name='通过结果保留大小(KB)')
+    body_bytes_saved = models.BigIntegerField(default=0, verbose_name='保留策略节省的存储(字节)')
     
     class Meta:
         verbose_name = '测试执行记录'
@@ -184,20 +232,64 @@ class TestRun(models.Model):
     
     @property
     def avg_response_time(self):
-        """平均响应时间 - 优化查询性能"""
+        """平均响应时间，优先使用响应时间分布，没有分布的历史记录回退为聚合查询"""
+        histogram = self.get_latency_histogram()
+        if histogram.count:
+            return histogram.mean
         from django.db.models import Avg
         result = self.results.filter(response_time__isnull=False).aggregate(
             avg_time=Avg('response_time')
         )
         return result['avg_time'] or 0
+
+    def get_latency_histogram(self, api=None):
+        """合并本次执行各接口的响应时间分布"""
+        sketches = self.response_time_sketches.all()
+        if api is not None:
+            sketches = sketches.filter(api=api)
+        return ResponseTimeSketch.merge(sketches)
     
     @property
     def is_running(self):
         """是否正在运行"""
         return self.status == 'running'
+
+    def get_progress(self):
+        """获取执行进度：已完成/总数、通过失败数以及预计剩余时间"""
+        done = self.completed_cases
+        total = self.planned_cases
+        eta_seconds = None
+        if self.status == 'running' and 0 < done < total:
+            elapsed = (timezone.now() - self.start_time).total_seconds()
+            eta_seconds = round(elapsed / done * (total - done), 1)
+        elif self.status != 'queued' and total and done >= total:
+            eta_seconds = 0
+
+        return {
+            'id': self.id,
+            'status': self.status,
+            'done': done,
+            'total': total,
+            'percent': round(done / total * 100, 1) if total else 0,
+            'results': self.total_tests,
+            'passed': self.passed_tests,
+            'failed': self.failed_tests,
+            'error': self.error_tests,
+            'eta_seconds': eta_seconds,
+            'start_time': self.start_time,
+            'end_time': self.end_time,
+        }
     
+    # 执行过程中随结果写入以F()表达式累加的计数
+    COUNTER_FIELDS = ['completed_cases', 'total_tests', 'passed_tests', 'failed_tests', 'error_tests']
+
     def update_statistics(self):
-        """更新统计信息 - 优化查询性能"""
+        """
+        按测试结果重新统计计数
+
+        计数在执行过程中已增量更新，正常结束时不需要调用；手动标记完成或失败时调用，
+        修复手动补录、导入结果等导致的计数偏差。
+        """
         from django.db.models import Count, Q
         
         # 使用聚合查询一次性获取所有统计信息
@@ -218,8 +310,10 @@ class TestRun(models.Model):
         """标记执行完成"""
         self.status = 'completed'
         self.end_time = timezone.now()
-        self.update_statistics()
-        self.save()
+        # 只保存状态字段，避免覆盖执行过程中以F()表达式累加的计数
+        self.save(update_fields=['status', 'end_time'])
+        self.refresh_from_db(fields=self.COUNTER_FIELDS)
+        publish_progress(self.get_progress())
     
     def mark_failed(self, error_message=None):
         """标记执行失败"""
@@ -228,8 +322,87 @@ class TestRun(models.Model):
         if error_message:
             self.error_message = error_message
             self.description = f"{self.description}\n执行失败: {error_message}".strip()
-        self.update_statistics()
-        self.save()
+        self.save(update_fields=['status', 'end_time', 'error_message', 'description'])
+        self.refresh_from_db(fields=self.COUNTER_FIELDS)
+        publish_progress(self.get_progress())
+
+
+class ResponseTimeSketch(models.Model):
+    """
+    测试执行中单个接口的响应时间分布
+
+    以可合并的对数分桶直方图保存，执行过程中随结果写入更新；
+    单次执行、单个接口以及跨多次执行的分位数都通过合并直方图得到，不需要重新扫描测试结果。
+    """
+    test_run = models.ForeignKey(
+        TestRun, on_delete=models.CASCADE, related_name='response_time_sketches', verbose_name='测试执行记录'
+    )
+    api = models.ForeignKey(
+        ApiDefinition, on_delete=models.CASCADE, related_name='response_time_sketches', verbose_name='接口'
+    )
+    count = models.IntegerField(default=0, verbose_name='样本数')
+    data = models.JSONField(default=dict, verbose_name='直方图数据')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = '响应时间分布'
+        verbose_name_plural = '响应时间分布'
+        constraints = [
+            models.UniqueConstraint(fields=['test_run', 'api'], name='unique_response_time_sketch'),
+        ]
+
+    def __str__(self):
+        return f"{self.test_run_id} - {self.api_id} ({self.count})"
+
+    def get_histogram(self):
+        return LatencyHistogram.from_dict(self.data)
+
+    @staticmethod
+    def merge(sketches):
+        """合并一组分布（只读取直方图数据）"""
+        return LatencyHistogram.merge_all(
+            LatencyHistogram.from_dict(data) for data in sketches.values_list('data', flat=True)
+        )
+
+class ResultBlob(models.Model):
+    """测试结果内容（响应体、响应头、断言详情），按SHA256去重并压缩保存"""
+    COMPRESSION_CHOICES = [
+        ('none', '不压缩'),
+        ('zlib', 'zlib'),
+        ('zstd', 'zstd'),
+    ]
+    sha256 = models.CharField(max_length=64, primary_key=True, verbose_name='内容哈希')
+    compression = models.CharField(max_length=10, choices=COMPRESSION_CHOICES, default='none', verbose_name='压缩算法')
+    data = models.BinaryField(verbose_name='内容')
+    size = models.IntegerField(default=0, verbose_name='原始大小(字节)')
+    stored_size = models.IntegerField(default=0, verbose_name='存储大小(字节)')
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        verbose_name = '测试结果内容'
+        verbose_name_plural = '测试结果内容'
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.compression}, {self.size}B)"
+
+    def set_raw(self, raw):
+        """设置未压缩的原始内容（同时作为读取缓存）"""
+        self._raw = raw
+
+    def compress(self, compression):
+        """按指定算法压缩原始内容"""
+        from .blob_store import compress
+        self.data, self.compression = compress(self._raw, compression)
+        self.stored_size = len(self.data)
+
+    def get_text(self):
+        """获取解压后的文本内容"""
+        raw = getattr(self, '_raw', None)
+        if raw is None:
+            from .blob_store import decompress
+            raw = decompress(self.data, self.compression)
+            self._raw = raw
+        return raw.decode('utf-8')
 
 class ApiTestResult(models.Model):
     """接口测试结果模型"""
@@ -251,9 +424,31 @@ class ApiTestResult(models.Model):
     response_code = models.IntegerField(null=True, verbose_name='响应状态码')
     response_time = models.FloatField(null=True, verbose_name='响应时间(ms)')
     response_body = models.TextField(blank=True, verbose_name='响应内容')
+    response_size = models.BigIntegerField(null=True, blank=True, verbose_name='响应体大小(字节)')
+    response_hash = models.CharField(max_length=64, blank=True, verbose_name='响应体SHA256')
+    response_truncated = models.BooleanField(default=False, verbose_name='响应体已截断')
     response_headers = models.TextField(default='{}', verbose_name='响应头', help_text='JSON格式')
     error_message = models.TextField(blank=True, verbose_name='错误信息')
     assertion_results = models.TextField(default='[]', verbose_name='断言结果详情', help_text='JSON格式')
+    assertion_time = models.FloatField(null=True, blank=True, verbose_name='断言耗时(ms)')
+    # 分阶段耗时：dns + connect + tls + wait + transfer 约等于 response_time
+    dns_time = models.FloatField(null=True, blank=True, verbose_name='DNS解析耗时(ms)')
+    connect_time = models.FloatField(null=True, blank=True, verbose_name='TCP连接耗时(ms)')
+    tls_time = models.FloatField(null=True, blank=True, verbose_name='TLS握手耗时(ms)')
+    wait_time = models.FloatField(null=True, blank=True, verbose_name='等待首字节耗时(ms)', help_text='不含建立连接的耗时')
+    transfer_time = models.FloatField(null=True, blank=True, verbose_name='内容传输耗时(ms)')
+    bytes_received = models.BigIntegerField(null=True, blank=True, verbose_name='接收字节数')
+    connection_reused = models.BooleanField(null=True, blank=True, verbose_name='是否复用连接')
+    # 内容存储引用，设置后对应的内联字段为空
+    response_body_blob = models.ForeignKey(
+        ResultBlob, on_delete=models.PROTECT, null=True, blank=True, related_name='+', verbose_name='响应内容'
+    )
+    response_headers_blob = models.ForeignKey(
+        ResultBlob, on_delete=models.PROTECT, null=True, blank=True, related_name='+', verbose_name='响应头'
+    )
+    assertion_results_blob = models.ForeignKey(
+        ResultBlob, on_delete=models.PROTECT, null=True, blank=True, related_name='+', verbose_name='断言结果详情'
+    )
     executed_by = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='api_test_results')
     executed_at = models.DateTimeField(auto_now_add=True)
 
@@ -262,17 +457,244 @@ class ApiTestResult(models.Model):
         verbose_name = '接口测试结果'
         verbose_name_plural = '接口测试结果'
 
+    # 分阶段耗时字段
+    TIMING_FIELDS = ['dns_time', 'connect_time', 'tls_time', 'wait_time', 'transfer_time']
+
+    # 查询结果列表时需要一起加载的内容引用
+    BLOB_RELATIONS = ['response_body_blob', 'response_headers_blob', 'assertion_results_blob']
+
     def __str__(self):
         return f"{self.test_case.name} - {self.status}"
 
+    def save(self, *args, **kwargs):
+        # 新写入的内容统一进入内容存储
+        has_inline_content = self.response_body or self.response_headers or self.assertion_results
+        if has_inline_content and kwargs.get('update_fields') is None:
+            from .blob_store import store_result_blobs
+            store_result_blobs([self])
+        super().save(*args, **kwargs)
+
+    def _get_content(self, field, blob_field):
+        """读取内容：优先使用内容存储，兼容尚未迁移的内联内容"""
+        if getattr(self, f'{blob_field}_id'):
+            return getattr(self, blob_field).get_text()
+        return getattr(self, field)
+
+    def get_response_body(self):
+        return self._get_content('response_body', 'response_body_blob')
+
     def get_response_headers(self):
         try:
-            return json.loads(self.response_headers)
+            return json.loads(self._get_content('response_headers', 'response_headers_blob') or '{}')
         except (json.JSONDecodeError, TypeError):
             return {}
 
     def get_assertion_results(self):
         try:
-            return json.loads(self.assertion_results)
+            return json.loads(self._get_content('assertion_results', 'assertion_results_blob') or '[]')
         except (json.JSONDecodeError, TypeError):
-            return []
\ No newline at end of file
+            return []
+
+class TestRunJob(models.Model):
+    """测试执行任务，基于数据库的执行队列"""
+    test_run = models.OneToOneField(
+        TestRun,
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='job',
+        verbose_name='测试执行记录'
+    )
+    load_test = models.OneToOneField(
+        'LoadTestRun',
+        on_delete=models.CASCADE,
+        null=True,
+        blank=True,
+        related_name='job',
+        verbose_name='压测记录'
+    )
+    JOB_TYPE_CHOICES = [
+        ('test_plan', '执行测试计划'),
+        ('batch', '批量执行用例'),
+        ('load_test', '压力测试'),
+    ]
+    job_type = models.CharField(max_length=20, choices=JOB_TYPE_CHOICES, verbose_name='任务类型')
+    payload = models.JSONField(default=dict, verbose_name='任务参数')
+    STATUS_CHOICES = [
+        ('pending', '排队中'),
+        ('running', '执行中'),
+        ('completed', '已完成'),
+        ('failed', '执行失败'),
+    ]
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name='任务状态')
+    worker = models.CharField(max_length=100, blank=True, verbose_name='执行进程')
+    attempts = models.IntegerField(default=0, verbose_name='领取次数')
+    error_message = models.TextField(blank=True, verbose_name='错误信息')
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+    claimed_at = models.DateTimeField(null=True, blank=True, verbose_name='领取时间')
+    heartbeat_at = models.DateTimeField(null=True, blank=True, verbose_name='最近心跳时间')
+    finished_at = models.DateTimeField(null=True, blank=True, verbose_name='结束时间')
+
+    class Meta:
+        verbose_name = '测试执行任务'
+        verbose_name_plural = '测试执行任务'
+        ordering = ['created_at']
+        indexes = [
+            models.Index(fields=['status', 'created_at'], name='api_test_job_queue_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_job_type_display()} #{self.test_run_id or self.load_test_id} - {self.status}"
+
+    @classmethod
+    def claim_next(cls, worker_name):
+        """
+        领取下一个待执行任务
+
+        使用带状态条件的UPDATE实现原子领取，多个worker进程并发领取时
+        同一个任务只会被一个进程拿到，不依赖 select_for_update。
+
+        Returns:
+            TestRunJob 或 None
+        """
+        candidate_ids = list(
+            cls.objects.filter(status='pending').order_by('created_at').values_list('id', flat=True)[:10]
+        )
+        for job_id in candidate_ids:
+            now = timezone.now()
+            claimed = cls.objects.filter(id=job_id, status='pending').update(
+                status='running',
+                worker=worker_name,
+                claimed_at=now,
+                heartbeat_at=now,
+                attempts=models.F('attempts') + 1
+            )
+            if claimed:
+                return cls.objects.select_related('test_run', 'load_test').get(id=job_id)
+        return None
+
+    @classmethod
+    def requeue_stale(cls, stale_after_seconds):
+        """
+        将超过指定秒数没有心跳的任务（worker异常退出或卡死）重新放回队列
+
+        执行中的worker会定期更新 heartbeat_at，执行时间再长也不会被重新入队。
+        """
+        threshold = timezone.now() - timedelta(seconds=stale_after_seconds)
+        return cls.objects.filter(status='running').filter(
+            models.Q(heartbeat_at__lt=threshold) | models.Q(heartbeat_at__isnull=True, claimed_at__lt=threshold)
+        ).update(status='pending', worker='')
+
+    def heartbeat(self):
+        """
+        更新心跳时间
+
+        Returns:
+            bool: 任务仍由当前worker执行时返回 True；已被重新入队或领取时返回 False
+        """
+        return bool(TestRunJob.objects.filter(id=self.id, status='running', worker=self.worker).update(
+            heartbeat_at=timezone.now()
+        ))
+
+    def mark_finished(self, error_message=None):
+        """标记任务结束"""
+        self.status = 'failed' if error_message else 'completed'
+        self.error_message = error_message or ''
+        self.finished_at = timezone.now()
+        self.save(update_fields=['status', 'error_message', 'finished_at'])
+
+
+class LoadTestRun(models.Model):
+    """压力测试记录：按目标RPS或并发数持续驱动一个或一组加权的接口用例"""
+    name = models.CharField(max_length=200, verbose_name='压测名称')
+    MODE_CHOICES = [
+        ('rps', '固定速率（RPS）'),
+        ('concurrency', '固定并发'),
+    ]
+    mode = models.CharField(max_length=20, choices=MODE_CHOICES, default='rps', verbose_name='负载模式')
+    target_rps = models.FloatField(null=True, blank=True, verbose_name='目标RPS', help_text='固定速率模式下每秒发送的请求数')
+    concurrency = models.PositiveIntegerField(
+        default=10, verbose_name='并发数', help_text='固定并发模式下的虚拟用户数；固定速率模式下为同时进行中的请求上限'
+    )
+    duration = models.FloatField(null=True, blank=True, verbose_name='持续时间(秒)')
+    request_count = models.PositiveIntegerField(null=True, blank=True, verbose_name='请求总数')
+    stages = models.JSONField(
+        default=list, blank=True, verbose_name='负载阶段',
+        help_text='如 [{"duration": 30, "target": 50}, {"duration": 60, "target": 50}]，target 在各阶段内从上一阶段的值线性爬升'
+    )
+    timeout = models.FloatField(default=30, verbose_name='请求超时(秒)')
+    environment = models.ForeignKey(
+        'environments.Environment', on_delete=models.SET_NULL, null=True, blank=True,
+        related_name='load_tests', verbose_name='测试环境'
+    )
+    STATUS_CHOICES = [
+        ('pending', '待执行'),
+        ('queued', '排队中'),
+        ('running', '运行中'),
+        ('completed', '已完成'),
+        ('failed', '执行失败'),
+    ]
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending', verbose_name='执行状态')
+    start_time = models.DateTimeField(null=True, blank=True, verbose_name='开始时间')
+    end_time = models.DateTimeField(null=True, blank=True, verbose_name='结束时间')
+    total_requests = models.IntegerField(default=0, verbose_name='请求总数')
+    error_requests = models.IntegerField(default=0, verbose_name='失败请求数')
+    errors_by_type = models.JSONField(default=dict, blank=True, verbose_name='错误分类统计')
+    latency_min = models.FloatField(null=True, blank=True, verbose_name='最小延迟(ms)')
+    latency_mean = models.FloatField(null=True, blank=True, verbose_name='平均延迟(ms)')
+    latency_max = models.FloatField(null=True, blank=True, verbose_name='最大延迟(ms)')
+    latency_p50 = models.FloatField(null=True, blank=True, verbose_name='P50延迟(ms)')
+    latency_p90 = models.FloatField(null=True, blank=True, verbose_name='P90延迟(ms)')
+    latency_p99 = models.FloatField(null=True, blank=True, verbose_name='P99延迟(ms)')
+    latency_p999 = models.FloatField(null=True, blank=True, verbose_name='P99.9延迟(ms)')
+    latency_histogram = models.JSONField(default=dict, blank=True, verbose_name='延迟直方图')
+    timeline = models.JSONField(
+        default=list, blank=True, verbose_name='每秒统计', help_text='每秒的请求数、失败数和平均延迟'
+    )
+    error_message = models.TextField(blank=True, verbose_name='错误信息')
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, on_delete=models.SET_NULL, null=True, related_name='load_tests', verbose_name='创建者'
+    )
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
+
+    class Meta:
+        verbose_name = '压力测试'
+        verbose_name_plural = '压力测试'
+        ordering = ['-created_at']
+
+    def __str__(self):
+        return f"{self.name} - {self.status}"
+
+    @property
+    def error_rate(self):
+        if not self.total_requests:
+            return 0
+        return round(self.error_requests / self.total_requests * 100, 2)
+
+    @property
+    def throughput(self):
+        """平均吞吐量（请求/秒）"""
+        if not (self.start_time and self.end_time):
+            return None
+        seconds = (self.end_time - self.start_time).total_seconds()
+        return round(self.total_requests / seconds, 2) if seconds > 0 else None
+
+    def mark_failed(self, error_message):
+        self.status = 'failed'
+        self.end_time = timezone.now()
+        self.error_message = error_message
+        self.save(update_fields=['status', 'end_time', 'error_message'])
+
+
+class LoadTestCase(models.Model):
+    """压测中的接口用例及其权重"""
+    load_test = models.ForeignKey(LoadTestRun, on_delete=models.CASCADE, related_name='cases', verbose_name='压测记录')
+    test_case = models.ForeignKey(ApiTestCase, on_delete=models.CASCADE, related_name='load_tests', verbose_name='接口用例')
+    weight = models.PositiveIntegerField(default=1, verbose_name='权重')
+
+    class Meta:
+        verbose_name = '压测用例'
+        verbose_name_plural = '压测用例'
+
+    def __str__(self):
+        return f"{self.test_case.name} x{self.weight}"
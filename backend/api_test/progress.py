@@ -0,0 +1,98 @@
+"""
+测试执行进度发布
+执行过程中把进度快照写入缓存，进度推送（SSE）直接读取缓存，不需要反复查询数据库；
+多个进程（Web 服务和执行 worker）之间共享进度需要配置共享缓存（如 Redis）
+"""
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+PROGRESS_KEY = 'test_run_progress:{}'
+
+# 执行结束的状态，推送到这些状态后结束推送
+FINAL_STATUSES = ('completed', 'failed')
+
+
+def progress_key(test_run_id):
+    return PROGRESS_KEY.format(test_run_id)
+
+
+def publish_progress(progress):
+    """
+    发布执行进度快照
+
+    Args:
+        progress: TestRun.get_progress() 的返回值，version 为发布时间（纳秒），用于判断进度是否有更新
+    """
+    progress = {**progress, 'version': time.time_ns()}
+    cache.set(progress_key(progress['id']), progress, getattr(settings, 'API_TEST_PROGRESS_CACHE_TIMEOUT', 86400))
+    return progress
+
+
+def get_published_progress(test_run_id):
+    """获取最近发布的执行进度，没有时返回 None"""
+    return cache.get(progress_key(test_run_id))
+
+
+async def aget_published_progress(test_run_id):
+    return await cache.aget(progress_key(test_run_id))
+
+
+class ProgressTracker:
+    """
+    一次执行的进度
+
+    结果写入和用例完成时在内存中累加执行记录的计数（与数据库中 F() 表达式的累加同步），
+    并按 API_TEST_PROGRESS_PUBLISH_INTERVAL 限制发布频率。可以被多个工作线程同时使用。
+    """
+
+    COUNTER_FIELDS = {
+        'passed': 'passed_tests',
+        'failed': 'failed_tests',
+        'error': 'error_tests',
+    }
+
+    def __init__(self, test_run=None, publish_interval=None):
+        self.test_run = test_run
+        self.publish_interval = publish_interval if publish_interval is not None else getattr(
+            settings, 'API_TEST_PROGRESS_PUBLISH_INTERVAL', 0.5
+        )
+        self._last_published = 0.0
+        self._lock = threading.Lock()
+
+    def record_results(self, status_counts):
+        """累加已写入的结果数，status_counts 为 {状态: 数量}"""
+        if self.test_run is None:
+            return
+        with self._lock:
+            for status, count in status_counts.items():
+                self.test_run.total_tests += count
+                field = self.COUNTER_FIELDS.get(status)
+                if field:
+                    setattr(self.test_run, field, getattr(self.test_run, field) + count)
+            self._maybe_publish()
+
+    def case_completed(self):
+        """累加已执行用例数"""
+        if self.test_run is None:
+            return
+        with self._lock:
+            self.test_run.completed_cases += 1
+            self._maybe_publish()
+
+    def flush(self):
+        """立即发布当前进度"""
+        if self.test_run is None:
+            return
+        with self._lock:
+            self._publish()
+
+    def _maybe_publish(self):
+        if time.monotonic() - self._last_published >= self.publish_interval:
+            self._publish()
+
+    def _publish(self):
+        self._last_published = time.monotonic()
+        publish_progress(self.test_run.get_progress())
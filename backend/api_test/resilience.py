@@ -0,0 +1,166 @@
+"""
+测试执行的熔断与重试
+目标服务不可用时按主机熔断，剩余用例快速失败，不再逐个等待超时；
+网络错误的重试受重试预算限制，并使用带随机抖动的指数退避
+"""
+import random
+import threading
+import time
+
+import requests
+from django.conf import settings
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+from .http_pool import SessionPool
+
+# 重复发送不会产生副作用的方法
+IDEMPOTENT_METHODS = frozenset(['GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE', 'TRACE'])
+
+
+class CircuitOpenError(Exception):
+    """熔断期间请求被直接拒绝"""
+
+    def __init__(self, breaker):
+        self.breaker = breaker
+        super().__init__(
+            f'目标服务连续 {breaker.failures} 次连接失败或超时，已熔断，'
+            f'{breaker.recovery_timeout:g} 秒后重新探测'
+        )
+
+
+class CircuitBreaker:
+    """
+    单个目标主机的熔断器
+
+    closed：正常放行，连续失败达到阈值后进入 open；
+    open：直接拒绝请求，经过 recovery_timeout 秒后进入 half_open；
+    half_open：只放行一个探测请求，成功则恢复 closed，失败则重新 open。
+    探测请求因其他原因没有结果时，下一个恢复周期会再放行一个探测请求。
+    只有连接失败和超时计为失败，收到任何HTTP响应（包括5xx）都说明服务可达。
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=5, recovery_timeout=30.0):
+        self.failure_threshold = max(1, int(failure_threshold))
+        self.recovery_timeout = float(recovery_timeout)
+        self.state = self.CLOSED
+        self.failures = 0
+        self._opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """当前是否可以发送请求"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True
+            now = time.monotonic()
+            if now - self._opened_at < self.recovery_timeout:
+                return False
+            # 放行一个探测请求，探测结束前其余请求继续快速失败
+            self.state = self.HALF_OPEN
+            self._opened_at = now
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+
+
+class CircuitBreakerRegistry:
+    """按 (环境, 协议, 主机) 划分的熔断器集合，与 SessionPool 的会话划分一致"""
+
+    def __init__(self, failure_threshold=None, recovery_timeout=None):
+        self.failure_threshold = failure_threshold if failure_threshold is not None else getattr(
+            settings, 'API_TEST_CIRCUIT_FAILURE_THRESHOLD', 5
+        )
+        self.recovery_timeout = recovery_timeout if recovery_timeout is not None else getattr(
+            settings, 'API_TEST_CIRCUIT_RECOVERY_TIMEOUT', 30
+        )
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, url, environment=None):
+        key = SessionPool._make_key(url, environment)
+        breaker = self._breakers.get(key)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.get(key)
+                if breaker is None:
+                    breaker = self._breakers[key] = CircuitBreaker(self.failure_threshold, self.recovery_timeout)
+        return breaker
+
+
+class RetryBudget:
+    """
+    重试预算
+
+    每个请求向预算存入 ratio 次重试额度，每次重试消耗 1 次，另有 min_retries 次初始额度，
+    整个执行过程中的重试次数不超过 min_retries + ratio * 请求数，
+    避免目标服务故障时重试成倍放大请求量。
+    """
+
+    def __init__(self, ratio=None, min_retries=None, max_retries=None, backoff_base=None, backoff_max=None):
+        self.ratio = ratio if ratio is not None else getattr(settings, 'API_TEST_RETRY_BUDGET_RATIO', 0.1)
+        self.min_retries = min_retries if min_retries is not None else getattr(
+            settings, 'API_TEST_RETRY_BUDGET_MIN', 10
+        )
+        self.max_retries = max_retries if max_retries is not None else getattr(settings, 'API_TEST_RETRY_MAX', 2)
+        self.backoff_base = backoff_base if backoff_base is not None else getattr(
+            settings, 'API_TEST_RETRY_BACKOFF_BASE', 0.2
+        )
+        self.backoff_max = backoff_max if backoff_max is not None else getattr(
+            settings, 'API_TEST_RETRY_BACKOFF_MAX', 5
+        )
+        self._balance = float(self.min_retries)
+        self._lock = threading.Lock()
+
+    def record_request(self):
+        """记录一个新请求（不含重试），存入重试额度"""
+        with self._lock:
+            self._balance += self.ratio
+
+    def try_acquire(self):
+        """申请一次重试额度，预算耗尽时返回 False"""
+        with self._lock:
+            if self._balance < 1:
+                return False
+            self._balance -= 1
+            return True
+
+    def backoff(self, attempt):
+        """第 attempt 次重试（从 0 开始）前的等待秒数：指数退避上限内的随机值"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+
+def is_network_error(error):
+    """连接失败或超时（计入熔断、可以重试）"""
+    return isinstance(error, (requests.exceptions.ConnectionError, requests.exceptions.Timeout))
+
+
+def is_safe_to_retry(method, error):
+    """
+    请求是否可以安全重试
+
+    幂等方法的网络错误都可以重试；其他方法只在请求确定没有发出（连接建立失败）时重试。
+    """
+    if not is_network_error(error):
+        return False
+    if method.upper() in IDEMPOTENT_METHODS:
+        return True
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = error.args[0] if error.args else None
+    if isinstance(reason, MaxRetryError):
+        reason = reason.reason
+    return isinstance(reason, NewConnectionError)
@@ -0,0 +1,127 @@
+"""
+响应体捕获
+流式读取响应体，计算完整的大小和哈希，只在内存中保留有限长度的前缀
+"""
+import codecs
+import hashlib
+import json
+import tempfile
+
+from django.conf import settings
+
+CHUNK_SIZE = 64 * 1024
+
+
+def get_capture_limit(test_case=None):
+    """获取用例的响应捕获上限（字节），用例未设置时使用 API_TEST_RESPONSE_CAPTURE_LIMIT"""
+    limit = getattr(test_case, 'response_capture_limit', None)
+    if limit is None:
+        limit = getattr(settings, 'API_TEST_RESPONSE_CAPTURE_LIMIT', 1024 * 1024)
+    return limit
+
+
+class ResponseCapture:
+    """
+    已读取完毕的响应
+
+    读取时只保留前 capture_limit 字节；keep_body 为 True 时完整响应体写入
+    SpooledTemporaryFile（超过内存阈值后落盘），供需要完整响应体的断言流式读取。
+    对外提供与 requests.Response 相同的 headers、status_code、text 和 json()。
+    可作为上下文管理器使用，退出时关闭临时文件。
+    """
+
+    def __init__(self, response, capture_limit, keep_body=False):
+        self.response = response
+        self.capture_limit = capture_limit
+        self.status_code = response.status_code
+        self.headers = response.headers
+        self.encoding = response.encoding or 'utf-8'
+        self.size = 0
+        self.truncated = False
+        self._spool = None
+
+        hasher = hashlib.sha256()
+        captured = bytearray()
+        if keep_body:
+            self._spool = tempfile.SpooledTemporaryFile(max_size=max(capture_limit, CHUNK_SIZE))
+        try:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                if not chunk:
+                    continue
+                self.size += len(chunk)
+                hasher.update(chunk)
+                room = capture_limit - len(captured)
+                if room > 0:
+                    captured.extend(chunk[:room])
+                if len(chunk) > room:
+                    self.truncated = True
+                if self._spool is not None:
+                    self._spool.write(chunk)
+        except BaseException:
+            self.close()
+            raise
+        finally:
+            response.close()
+
+        # 实际从网络读取的字节数（压缩传输时小于解压后的 size）
+        try:
+            self.bytes_received = response.raw.tell()
+        except Exception:
+            self.bytes_received = self.size
+        self.content_hash = hasher.hexdigest()
+        self.captured = bytes(captured)
+        if not self.truncated and self._spool is not None:
+            # 完整响应体已在内存中，不再需要临时文件
+            self._spool.close()
+            self._spool = None
+
+    @property
+    def captured_text(self):
+        """捕获部分的文本（截断处不完整的多字节字符会被丢弃）"""
+        decoder = codecs.getincrementaldecoder(self.encoding)(errors='replace')
+        return decoder.decode(self.captured, final=not self.truncated)
+
+    @property
+    def has_full_body(self):
+        return not self.truncated or self._spool is not None
+
+    def iter_content(self):
+        """按块读取完整响应体"""
+        if not self.truncated:
+            yield self.captured
+            return
+        if self._spool is None:
+            raise ValueError('响应体超过捕获上限，完整内容未保留')
+        self._spool.seek(0)
+        while True:
+            chunk = self._spool.read(CHUNK_SIZE)
+            if not chunk:
+                return
+            yield chunk
+
+    def iter_text(self):
+        """按块读取完整响应体的文本"""
+        decoder = codecs.getincrementaldecoder(self.encoding)(errors='replace')
+        for chunk in self.iter_content():
+            yield decoder.decode(chunk)
+        yield decoder.decode(b'', final=True)
+
+    @property
+    def text(self):
+        return ''.join(self.iter_text())
+
+    def json(self):
+        if not self.truncated:
+            return json.loads(self.captured)
+        return json.loads(b''.join(self.iter_content()))
+
+    def close(self):
+        if self._spool is not None:
+            self._spool.close()
+            self._spool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
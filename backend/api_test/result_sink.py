@@ -0,0 +1,196 @@
+"""
+测试结果写入器
+负责把执行产生的 ApiTestResult 持久化，并增量更新 TestRun 的统计计数
+"""
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import F
+
+from .blob_store import store_result_blobs
+from .error_handlers import TestExecutionError
+from utils.histogram_utils import LatencyHistogram
+
+from .models import ApiTestResult, ResponseTimeSketch, TestRun
+from .progress import ProgressTracker
+from .retention import BodyRetentionPolicy
+
+logger = logging.getLogger(__name__)
+
+
+class ResultSink:
+    """结果写入器基类"""
+
+    def __init__(self, test_run=None):
+        self.test_run = test_run
+        self.persisted_count = 0
+        self.retention = BodyRetentionPolicy.for_test_run(test_run)
+        # 计数写入数据库后同步累加到内存中的进度并发布
+        self.progress = ProgressTracker(test_run)
+        # 每个接口的响应时间分布，随结果写入在内存中合并，按批（立即写入模式下在结束时）保存
+        self._sketches = {}
+        self._changed_sketches = set()
+        self._sketch_lock = threading.Lock()
+
+    def add(self, result):
+        """
+        提交一个尚未保存的测试结果
+
+        Returns:
+            ApiTestResult: 传入的结果对象（立即写入模式下已包含主键）
+        """
+        raise NotImplementedError
+
+    def flush(self):
+        """把尚未写入的结果写入数据库"""
+
+    def close(self):
+        """结束写入，保证所有结果和响应时间分布落库"""
+        self.flush()
+        self._save_sketches()
+
+    def _persist(self, results):
+        """批量写入结果并累加执行记录的统计计数"""
+        if not results:
+            return
+        bytes_saved = sum(self.retention.apply(result) for result in results)
+        with transaction.atomic():
+            # 内容先写入内容存储（去重、压缩），结果记录只保存引用
+            store_result_blobs(results)
+            if len(results) == 1:
+                results[0].save()
+            else:
+                ApiTestResult.objects.bulk_create(results)
+            counts = self._increment_counters(results, bytes_saved)
+        self._record_sketches(results)
+        self.persisted_count += len(results)
+        self.progress.record_results(counts)
+
+    def _increment_counters(self, results, bytes_saved=0):
+        """以F()表达式累加执行记录的计数，返回各状态的结果数"""
+        counts = Counter(result.status for result in results)
+        if self.test_run is None:
+            return counts
+        TestRun.objects.filter(pk=self.test_run.pk).update(
+            total_tests=F('total_tests') + len(results),
+            passed_tests=F('passed_tests') + counts['passed'],
+            failed_tests=F('failed_tests') + counts['failed'],
+            error_tests=F('error_tests') + counts['error'],
+            body_bytes_saved=F('body_bytes_saved') + bytes_saved,
+        )
+        return counts
+
+    def _record_sketches(self, results):
+        """把已写入结果的响应时间合并到内存中的分布"""
+        if self.test_run is None:
+            return
+        with self._sketch_lock:
+            for result in results:
+                if result.response_time is None:
+                    continue
+                api_id = result.test_case.api_id
+                histogram = self._sketches.get(api_id)
+                if histogram is None:
+                    histogram = self._sketches[api_id] = LatencyHistogram()
+                histogram.record(result.response_time)
+                self._changed_sketches.add(api_id)
+
+    def _save_sketches(self):
+        """覆盖写入有变化的接口分布，每个接口一次写入"""
+        # 加锁覆盖写入，保证并发写入时后写入的总是更新的分布
+        with self._sketch_lock:
+            for api_id in list(self._changed_sketches):
+                histogram = self._sketches[api_id]
+                ResponseTimeSketch.objects.update_or_create(
+                    test_run=self.test_run, api_id=api_id,
+                    defaults={'count': histogram.count, 'data': histogram.to_dict()}
+                )
+                # 写入失败的分布保留变化标记，下一批或结束时重新写入
+                self._changed_sketches.discard(api_id)
+
+
+class ImmediateResultSink(ResultSink):
+    """逐条立即写入，适用于交互式的单用例执行；响应时间分布在结束时一次保存"""
+
+    def add(self, result):
+        self._persist([result])
+        return result
+
+
+class BufferedResultSink(ResultSink):
+    """
+    缓冲批量写入
+
+    结果先缓存在内存中，达到数量阈值或距上次写入超过时间阈值时使用
+    bulk_create 批量写入。可被多个工作线程同时调用。
+    某一批写入失败时记录丢弃的条数并继续执行，结束时 close() 抛出异常，执行记录标记为失败。
+    """
+
+    def __init__(self, test_run=None, batch_size=None, flush_interval=None):
+        super().__init__(test_run)
+        self.batch_size = batch_size or getattr(settings, 'API_TEST_RESULT_BATCH_SIZE', 200)
+        self.flush_interval = flush_interval if flush_interval is not None else getattr(
+            settings, 'API_TEST_RESULT_FLUSH_INTERVAL', 2.0
+        )
+        self._buffer = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self.dropped_count = 0
+
+    def add(self, result):
+        with self._lock:
+            self._buffer.append(result)
+            should_flush = (
+                len(self._buffer) >= self.batch_size
+                or time.monotonic() - self._last_flush >= self.flush_interval
+            )
+        if should_flush:
+            self.flush()
+        return result
+
+    def flush(self):
+        # 写入过程串行化，保证计数与结果同步更新
+        with self._flush_lock:
+            with self._lock:
+                pending, self._buffer = self._buffer, []
+                self._last_flush = time.monotonic()
+            if not pending:
+                return
+            logger.debug(f'批量写入 {len(pending)} 条测试结果')
+            try:
+                self._persist(pending)
+            except Exception:
+                # 写入失败的事务已回滚，结果对象已被部分处理（内容存储引用等），不能重新写入
+                self.dropped_count += len(pending)
+                logger.exception(
+                    f'测试结果写入失败，丢弃 {len(pending)} 条（本次执行共丢弃 {self.dropped_count} 条）'
+                )
+                return
+            try:
+                self._save_sketches()
+            except Exception:
+                logger.exception('响应时间分布写入失败，将在下一批结果写入后重试')
+
+    def close(self):
+        super().close()
+        if self.dropped_count:
+            raise TestExecutionError(f'{self.dropped_count} 条测试结果写入失败，统计结果不完整')
+
+
+def create_result_sink(test_run=None, write_mode=None):
+    """
+    根据写入模式创建结果写入器
+
+    没有关联执行记录（交互式执行单个用例）时始终立即写入，保证调用方能拿到已保存的结果。
+    """
+    if test_run is None:
+        return ImmediateResultSink()
+    write_mode = write_mode or test_run.result_write_mode
+    if write_mode == 'buffered':
+        return BufferedResultSink(test_run)
+    return ImmediateResultSink(test_run)
@@ -0,0 +1,80 @@
+"""
+测试结果响应体保留策略
+通过的结果很少被查看，按策略丢弃或截断其响应体以节省存储；响应头和断言详情始终保留
+"""
+from django.conf import settings
+
+from testcases.models import BODY_RETENTION_CHOICES
+
+RETENTION_MODES = [mode for mode, _ in BODY_RETENTION_CHOICES]
+
+
+def resolve_body_retention(value=None, limit_kb=None, test_plan=None):
+    """
+    解析响应体保留策略
+
+    优先使用显式指定的值，其次是测试计划的配置，最后是 API_TEST_BODY_RETENTION 配置。
+
+    Returns:
+        tuple: (保留策略, 通过结果保留大小KB)
+    """
+    if value in (None, '') and test_plan is not None:
+        value = test_plan.body_retention
+    if value in (None, ''):
+        value = getattr(settings, 'API_TEST_BODY_RETENTION', 'full')
+    if value not in RETENTION_MODES:
+        raise ValueError(f"不支持的响应体保留策略: {value}，可选值: {', '.join(RETENTION_MODES)}")
+
+    if limit_kb in (None, '') and test_plan is not None:
+        limit_kb = test_plan.body_retention_kb
+    if limit_kb in (None, ''):
+        limit_kb = getattr(settings, 'API_TEST_BODY_RETENTION_KB', 4)
+    try:
+        limit_kb = int(limit_kb)
+    except (TypeError, ValueError):
+        raise ValueError('响应体保留大小必须是整数')
+    if limit_kb < 0:
+        raise ValueError('响应体保留大小不能小于0')
+    return value, limit_kb
+
+
+class BodyRetentionPolicy:
+    """
+    响应体保留策略
+
+    只作用于有实际响应的通过结果；数据驱动测试的汇总结果（没有响应码）不受影响。
+    """
+
+    def __init__(self, mode='full', limit_kb=0):
+        self.mode = mode
+        self.limit_bytes = limit_kb * 1024
+
+    @classmethod
+    def for_test_run(cls, test_run=None):
+        if test_run is None:
+            return cls()
+        return cls(test_run.body_retention, test_run.body_retention_kb)
+
+    def apply(self, result):
+        """
+        按策略处理（尚未保存的）测试结果的响应体
+
+        Returns:
+            int: 丢弃的响应体字节数
+        """
+        if self.mode == 'full' or result.status != 'passed' or result.response_code is None:
+            return 0
+        if not result.response_body:
+            return 0
+
+        raw = result.response_body.encode('utf-8')
+        if self.mode == 'truncate_passed':
+            if len(raw) <= self.limit_bytes:
+                return 0
+            # 截断处不完整的多字节字符直接丢弃
+            kept = raw[:self.limit_bytes].decode('utf-8', errors='ignore')
+        else:
+            kept = ''
+        result.response_body = kept
+        result.response_truncated = True
+        return len(raw) - len(kept.encode('utf-8'))
@@ -1,5 +1,9 @@
+import json
+
+from django.conf import settings
+from django.db import transaction
 from rest_framework import serializers
-from .models import ApiDefinition, ApiTestCase, ApiTestResult
+from .models import ApiDefinition, ApiTestCase, ApiTestResult, LoadTestCase, LoadTestRun
 
 class ApiDefinitionSerializer(serializers.ModelSerializer):
     class Meta:
@@ -20,8 +24,97 @@ class ApiTestCaseSerializer(serializers.ModelSerializer):
 class ApiTestResultSerializer(serializers.ModelSerializer):
     test_case_name = serializers.CharField(source='test_case.name', read_only=True)
     executed_by_username = serializers.CharField(source='executed_by.username', read_only=True)
+    # 内容保存在内容存储中，输出时还原为原来的文本格式
+    response_body = serializers.CharField(source='get_response_body', read_only=True)
+    response_headers = serializers.SerializerMethodField()
+    assertion_results = serializers.SerializerMethodField()
 
     class Meta:
         model = ApiTestResult
+        exclude = ('response_body_blob', 'response_headers_blob', 'assertion_results_blob')
+        read_only_fields = ('executed_by', 'executed_at')
+
+    def get_response_headers(self, obj):
+        return json.dumps(obj.get_response_headers())
+
+    def get_assertion_results(self, obj):
+        return json.dumps(obj.get_assertion_results()) 
+
+class LoadTestCaseSerializer(serializers.ModelSerializer):
+    test_case_name = serializers.CharField(source='test_case.name', read_only=True)
+
+    class Meta:
+        model = LoadTestCase
+        fields = ('id', 'test_case', 'test_case_name', 'weight')
+
+    def validate_weight(self, value):
+        if value < 1:
+            raise serializers.ValidationError('权重必须大于0')
+        return value
+
+class LoadTestRunSerializer(serializers.ModelSerializer):
+    cases = LoadTestCaseSerializer(many=True)
+    error_rate = serializers.ReadOnlyField()
+    throughput = serializers.ReadOnlyField()
+    created_by_username = serializers.CharField(source='created_by.username', read_only=True)
+
+    class Meta:
+        model = LoadTestRun
         fields = '__all__'
-        read_only_fields = ('executed_by', 'executed_at') 
\ No newline at end of file
+        read_only_fields = (
+            'status', 'start_time', 'end_time', 'total_requests', 'error_requests', 'errors_by_type',
+            'latency_min', 'latency_mean', 'latency_max', 'latency_p50', 'latency_p90', 'latency_p99',
+            'latency_p999', 'latency_histogram', 'timeline', 'error_message', 'created_by', 'created_at'
+        )
+
+    def validate_cases(self, value):
+        if not value:
+            raise serializers.ValidationError('请至少选择一个接口用例')
+        return value
+
+    def validate_stages(self, value):
+        stages = []
+        for stage in value or []:
+            try:
+                duration, target = float(stage['duration']), float(stage['target'])
+            except (TypeError, KeyError, ValueError):
+                raise serializers.ValidationError('负载阶段格式应为 {"duration": 秒数, "target": 目标值}')
+            if duration <= 0 or target < 0:
+                raise serializers.ValidationError('负载阶段的持续时间必须大于0，目标值不能小于0')
+            stages.append({'duration': duration, 'target': target})
+        return stages
+
+    def validate(self, attrs):
+        get = lambda name: attrs.get(name, getattr(self.instance, name, None))
+        mode = get('mode') or 'rps'
+        stages = get('stages')
+        if not (get('duration') or get('request_count') or stages):
+            raise serializers.ValidationError('请设置持续时间、请求总数或负载阶段')
+        if mode == 'rps' and not (get('target_rps') or stages):
+            raise serializers.ValidationError('固定速率模式需要设置目标RPS或负载阶段')
+
+        max_concurrency = getattr(settings, 'API_TEST_LOAD_MAX_CONCURRENCY', 200)
+        peak = max([stage['target'] for stage in stages or []] + [get('concurrency') or 0])
+        if (get('concurrency') or 0) > max_concurrency or (mode == 'concurrency' and peak > max_concurrency):
+            raise serializers.ValidationError(f'并发数不能超过 {max_concurrency}')
+        max_duration = getattr(settings, 'API_TEST_LOAD_MAX_DURATION', 3600)
+        total_duration = get('duration') or sum(stage['duration'] for stage in stages or [])
+        if total_duration > max_duration:
+            raise serializers.ValidationError(f'压测持续时间不能超过 {max_duration} 秒')
+        return attrs
+
+    @transaction.atomic
+    def create(self, validated_data):
+        cases = validated_data.pop('cases')
+        load_test = super().create(validated_data)
+        LoadTestCase.objects.bulk_create([LoadTestCase(load_test=load_test, **case) for case in cases])
+        return load_test
+
+    @transaction.atomic
+    def update(self, instance, validated_data):
+        cases = validated_data.pop('cases', None)
+        load_test = super().update(instance, validated_data)
+        if cases is not None:
+            load_test.cases.all().delete()
+            LoadTestCase.objects.bulk_create([LoadTestCase(load_test=load_test, **case) for case in cases])
+        return load_test
@@ -1,209 +1,256 @@
 from rest_framework import viewsets, status
 from rest_framework.decorators import action, api_view, permission_classes
 from rest_framework.response import Response
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import F
 from django.utils import timezone
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 import requests
+import itertools
 import json
+import random
+import threading
 import time
 import os
-from .models import ApiDefinition, ApiTestCase, ApiTestResult, TestRun
+from .models import ApiDefinition, ApiTestCase, ApiTestResult, LoadTestRun, TestRun, TestRunJob
 from .serializers import (
     ApiDefinitionSerializer, ApiTestCaseSerializer,
-    ApiTestResultSerializer
+    ApiTestResultSerializer, LoadTestRunSerializer
 )
+from .assertions import AssertionPlan, ResponseView
+from .response_capture import ResponseCapture, get_capture_limit
+from .retention import resolve_body_retention
+from .execution import ExecutionContext, DataDrivenAggregate
+from .http_pool import SessionPool
+from .http_timing import measure
+from .progress import publish_progress
+from .resilience import CircuitOpenError, is_network_error, is_safe_to_retry
+from .load_test import LoadProfile, LoadTestEngine
 from .error_handlers import (
     handle_request_exception, create_error_result, 
     TestExecutionError, APIError
 )
 from testcases.models import TestDataFile
 from environments.models import Environment
-from environments.views import log_environment_usage
-import re
+from utils.template_utils import TemplateCache, compile_template, render_template
 import logging
 
 logger = logging.getLogger(__name__)
 
+# 用例执行计划：预编译的请求模板、用例变量和断言计划
+CasePlan = namedtuple('CasePlan', ['request_template', 'variables', 'assertion_plan'])
+
+# 用例执行计划缓存，跨执行共享
+_case_plan_cache = TemplateCache()
+
 class ApiTestService:
     """API测试执行服务"""
     
     @staticmethod
-    def execute_test_case(test_case, user, test_run=None, environment=None):
+    def execute_test_case(test_case, user, test_run=None, environment=None, context=None):
         """执行单个测试用例（支持数据驱动和环境变量）"""
+        if context is None:
+            # 单独执行用例时使用临时的执行上下文
+            with ExecutionContext(test_run) as context:
+                return ApiTestService.execute_test_case(test_case, user, test_run, environment, context)
+        
         if not test_case.is_active:
-            return ApiTestResult.objects.create(
+            return context.sink.add(ApiTestResult(
                 test_case=test_case,
                 test_run=test_run,
                 status='error',
                 error_message='测试用例已禁用',
                 executed_by=user
-            )
+            ))
         
-        # 检查是否有关联的数据文件
-        # 注意：ApiTestCase没有直接的data_file关系，需要通过名称或其他方式关联
-        data_file = None
-        if hasattr(test_case, 'data_file_relation'):
-            # 如果有直接关系
-            data_file = test_case.data_file_relation
-        else:
-            # 尝试通过名称查找关联的TestCase和其数据文件
-            try:
-                from testcases.models import TestCase
-                related_test_case = TestCase.objects.filter(title__icontains=test_case.name).first()
-                if related_test_case and hasattr(related_test_case, 'data_file'):
-                    data_file = related_test_case.data_file
-            except:
-                pass
+        # 检查关联的功能测试用例是否有数据文件
+        data_file = ApiTestService.get_data_file(test_case)
         
         if data_file:
-            return ApiTestService._execute_data_driven_test(test_case, data_file, user, test_run, environment)
+            return ApiTestService._execute_data_driven_test(
+                test_case, data_file, user, test_run, environment, context
+            )
         else:
             # 没有数据文件，执行普通测试
-            return ApiTestService._execute_single_test(test_case, user, {}, test_run=test_run, environment=environment)
+            return ApiTestService._execute_single_test(
+                test_case, user, {}, test_run=test_run, environment=environment, context=context
+            )
 
     @staticmethod
-    def _execute_data_driven_test(test_case, data_file, user, test_run=None, environment=None):
-        """执行数据驱动测试"""
+    def _execute_data_driven_test(test_case, data_file, user, test_run=None, environment=None, context=None):
+        """
+        执行数据驱动测试
+
+        数据行按 API_TEST_DATA_SHARD_SIZE 切分为分片，按执行上下文的 data_concurrency
+        并发执行；每行结果直接交给结果写入器，汇总信息由各分片的流式统计合并得到。
+        """
         try:
-            # 解析数据文件
-            parsed_data = data_file.parse_file()
-            headers = parsed_data['headers']
-            rows = parsed_data['rows']
+            # 流式读取数据文件，数据行在分片被领取时才解析
+            headers, rows = data_file.open_rows()
+            first_row = next(rows, None)
             
-            if not rows:
-                return ApiTestResult.objects.create(
+            if first_row is None:
+                return context.sink.add(ApiTestResult(
                     test_case=test_case,
                     test_run=test_run,
                     status='error',
                     error_message='数据文件中没有找到测试数据',
                     executed_by=user
-                )
+                ))
             
-            # 为每一行数据执行测试
-            results = []
-            total_tests = len(rows)
-            passed_tests = 0
-            failed_tests = 0
-            error_tests = 0
+            aggregate = DataDrivenAggregate()
             
-            for row_index, row in enumerate(rows):
-                # 构建变量字典
-                variables = {}
-                for i, header in enumerate(headers):
-                    if i < len(row):
-                        variables[header] = row[i]
-                
-                # 执行单次测试
-                result = ApiTestService._execute_single_test(
-                    test_case, user, variables, row_index + 1, test_run, environment
-                )
-                results.append(result)
-                
-                # 统计结果
-                if result.status == 'passed':
-                    passed_tests += 1
-                elif result.status == 'failed':
-                    failed_tests += 1
-                else:
-                    error_tests += 1
+            def run_shard(shard):
+                shard_aggregate = DataDrivenAggregate(aggregate.sample_size)
+                for row_number, row in shard:
+                    # 构建变量字典
+                    variables = {}
+                    for i, header in enumerate(headers):
+                        if i < len(row):
+                            variables[header] = row[i]
+                    
+                    # 执行单次测试
+                    result = ApiTestService._execute_single_test(
+                        test_case, user, variables, row_number, test_run, environment, context
+                    )
+                    shard_aggregate.add(row_number, result)
+                aggregate.merge(shard_aggregate)
             
-            # 创建汇总结果
-            overall_status = 'passed' if failed_tests == 0 and error_tests == 0 else 'failed'
-            if error_tests > 0:
-                overall_status = 'error'
+            shard_size = getattr(settings, 'API_TEST_DATA_SHARD_SIZE', 100)
+            rows = itertools.chain([first_row], rows)
+            shards = ApiTestService._iter_shards(enumerate(rows, start=1), shard_size)
+            workers = max(1, context.data_concurrency)
+            if workers == 1:
+                for shard in shards:
+                    run_shard(shard)
+            else:
+                ApiTestService._run_in_workers(shards, workers, run_shard)
             
-            summary_result = ApiTestResult.objects.create(
+            # 创建汇总结果
+            overall_status = aggregate.overall_status
+            summary_result = context.sink.add(ApiTestResult(
                 test_case=test_case,
                 test_run=test_run,
                 status=overall_status,
                 response_code=None,
                 response_time=None,
-                response_body=json.dumps({
-                    'data_driven_summary': {
-                        'total_tests': total_tests,
-                        'passed': passed_tests,
-                        'failed': failed_tests,
-                        'errors': error_tests,
-                        'success_rate': f"{(passed_tests / total_tests * 100):.1f}%"
-                    },
-                    'individual_results': [
-                        {
-                            'row': i + 1,
-                            'status': result.status,
-                            'response_code': result.response_code,
-                            'response_time': result.response_time,
-                            'error_message': result.error_message or None
-                        }
-                        for i, result in enumerate(results)
-                    ]
-                }),
-                error_message=f'数据驱动测试完成: {passed_tests}/{total_tests} 通过' if overall_status != 'error' else '数据驱动测试执行出错',
+                response_body=json.dumps(aggregate.to_summary()),
+                error_message=f'数据驱动测试完成: {aggregate.passed}/{aggregate.total} 通过' if overall_status != 'error' else '数据驱动测试执行出错',
                 assertion_results=json.dumps([]),
                 executed_by=user
-            )
+            ))
             
             return summary_result
             
         except Exception as e:
-            return ApiTestResult.objects.create(
+            return context.sink.add(ApiTestResult(
                 test_case=test_case,
                 test_run=test_run,
                 status='error',
                 error_message=f'数据驱动测试执行失败: {str(e)}',
                 executed_by=user
-            )
+            ))
+
+    @staticmethod
+    def _iter_shards(items, shard_size):
+        """把迭代器按固定大小切分为分片，惰性生成"""
+        items = iter(items)
+        while True:
+            shard = list(itertools.islice(items, shard_size))
+            if not shard:
+                return
+            yield shard
+
+    @staticmethod
+    def _run_in_workers(items, workers, handler):
+        """
+        使用有界线程池并发处理一个（可以是惰性的）迭代器
+
+        工作线程在锁保护下逐个领取元素，迭代器不会被一次性展开；
+        每个线程结束时关闭自己的数据库连接。处理过程中的异常会在所有线程结束后抛出。
+        """
+        items = iter(items)
+        lock = threading.Lock()
+        finished = object()
+
+        def worker():
+            try:
+                while True:
+                    with lock:
+                        item = next(items, finished)
+                    if item is finished:
+                        return
+                    handler(item)
+            finally:
+                # 每个线程持有独立的数据库连接，需要显式释放
+                connection.close()
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='api-test') as executor:
+            futures = [executor.submit(worker) for _ in range(workers)]
+            for future in futures:
+                future.result()
 
     @staticmethod
-    def _execute_single_test(test_case, user, variables=None, row_number=None, test_run=None, environment=None):
+    def _execute_single_test(test_case, user, variables=None, row_number=None, test_run=None, environment=None,
+                             context=None):
         """执行单次测试（原有逻辑，增加了变量支持和环境变量支持）"""
         if variables is None:
             variables = {}
+        if context is None:
+            with ExecutionContext(test_run) as context:
+                return ApiTestService._execute_single_test(
+                    test_case, user, variables, row_number, test_run, environment, context
+                )
         
         api = test_case.api
         
-        # 准备请求数据
-        headers = {**api.get_headers(), **test_case.get_headers()}
-        params = {**api.get_params(), **test_case.get_params()}
-        body = test_case.get_body() or api.get_body()
+        # 获取预编译的执行计划（请求模板和断言）
+        case_plan = ApiTestService._get_case_plan(test_case)
         
         # 合并用例变量和数据驱动变量
-        all_variables = {**test_case.get_variables(), **variables}
+        all_variables = {**case_plan.variables, **variables}
         
-        # 获取环境变量
+        # 获取环境变量（每次执行只查询一次，所有用例和数据行共享快照）
         env_variables = {}
         if environment:
-            env_variables = {var.key: var.value for var in environment.variables.all()}
-            # 记录环境使用
-            log_environment_usage(environment, user, 'api_test', {
-                'test_case_id': test_case.id,
-                'test_case_name': test_case.name,
-                'api_url': api.url,
-                'api_method': api.method
-            })
+            env_variables = context.get_environment_snapshot(environment).variables
+            # 记录环境使用（执行结束时汇总写入）
+            context.record_environment_usage(environment, user, test_case, row_number)
         
         # 合并所有变量（环境变量优先级最高）
         all_variables = {**all_variables, **env_variables}
         
-        # 处理变量替换
-        if all_variables:
-            url = ApiTestService._replace_variables(api.url, all_variables)
-            headers = ApiTestService._replace_variables(headers, all_variables)
-            params = ApiTestService._replace_variables(params, all_variables)
-            body = ApiTestService._replace_variables(body, all_variables)
-        else:
-            url = api.url
+        # 处理变量替换（一次遍历渲染整个请求）
+        request_data = case_plan.request_template.render(all_variables)
+        url = request_data['url']
+        headers = request_data['headers']
+        params = request_data['params']
+        body = request_data['body']
         
+        response = None
         try:
-            # 发送请求
-            start_time = time.time()
-            response = requests.request(
+            # 发送请求（复用执行上下文中的keep-alive连接），同时记录建立连接各阶段的耗时
+            raw_response, timing, start_time = ApiTestService._send_request(
+                context,
                 method=api.method,
                 url=url,
+                environment=environment,
                 headers=headers,
                 params=params,
                 json=body if api.method in ['POST', 'PUT', 'PATCH'] and body else None,
-                timeout=30  # 设置超时时间
+                stream=True
+            )
+            headers_time = time.time()
+            # 流式读取响应体，只保留捕获上限内的内容；有断言需要完整响应体时暂存到临时文件
+            response = ResponseCapture(
+                raw_response, get_capture_limit(test_case), keep_body=case_plan.assertion_plan.needs_body
             )
             end_time = time.time()
+            # 等待首字节（不含建立连接）和内容传输耗时
+            timing.wait = max((headers_time - start_time) * 1000 - timing.setup, 0.0)
+            timing.transfer = (end_time - headers_time) * 1000
             
             # 计算响应时间
             response_time = (end_time - start_time) * 1000
@@ -260,10 +307,11 @@ class ApiTestService:
                     'message': '响应时间检查通过'
                 })
             
-            # 3. 执行自定义断言
-            custom_assertions = test_case.get_assertions()
-            for assertion in custom_assertions:
-                assertion_result = ApiTestService._execute_assertion(assertion, response)
+            # 3. 执行自定义断言（响应体最多解码、解析一次）
+            response_view = ResponseView(response)
+            custom_results, assertion_time = case_plan.assertion_plan.evaluate(response_view)
+            response.close()
+            for assertion_result in custom_results:
                 if row_number and not assertion_result['passed']:
                     assertion_result['message'] = f"[数据行{row_number}] {assertion_result['message']}"
                 assertion_results.append(assertion_result)
@@ -276,184 +324,309 @@ class ApiTestService:
             response_headers = dict(response.headers)
             
             # 创建测试结果
-            result = ApiTestResult.objects.create(
+            result = context.sink.add(ApiTestResult(
                 test_case=test_case,
                 test_run=test_run,
                 status=status_result,
                 response_code=response.status_code,
                 response_time=response_time,
-                response_body=response.text,
+                response_body=response.captured_text,
+                response_size=response.size,
+                response_hash=response.content_hash,
+                response_truncated=response.truncated,
+                dns_time=timing.dns,
+                connect_time=timing.connect,
+                tls_time=timing.tls,
+                wait_time=timing.wait,
+                transfer_time=timing.transfer,
+                bytes_received=response.bytes_received,
+                connection_reused=timing.connection_reused,
                 response_headers=json.dumps(response_headers),
                 error_message=error_message,
                 assertion_results=json.dumps(assertion_results),
+                assertion_time=assertion_time,
                 executed_by=user
-            )
+            ))
             
             return result
             
+        except CircuitOpenError as e:
+            error_msg = f'跳过请求: {e}'
+            if row_number:
+                error_msg = f"[数据行{row_number}] {error_msg}"
+            return context.sink.add(ApiTestResult(
+                test_case=test_case,
+                test_run=test_run,
+                status='error',
+                error_message=error_msg,
+                executed_by=user
+            ))
         except requests.exceptions.Timeout:
             error_msg = '请求超时'
             if row_number:
                 error_msg = f"[数据行{row_number}] {error_msg}"
-            return ApiTestResult.objects.create(
+            return context.sink.add(ApiTestResult(
                 test_case=test_case,
                 test_run=test_run,
                 status='error',
                 error_message=error_msg,
                 executed_by=user
-            )
+            ))
         except requests.exceptions.ConnectionError:
             error_msg = '连接错误，无法访问目标服务器'
             if row_number:
                 error_msg = f"[数据行{row_number}] {error_msg}"
-            return ApiTestResult.objects.create(
+            return context.sink.add(ApiTestResult(
                 test_case=test_case,
                 test_run=test_run,
                 status='error',
                 error_message=error_msg,
                 executed_by=user
-            )
+            ))
         except Exception as e:
             error_msg = f'执行异常: {str(e)}'
             if row_number:
                 error_msg = f"[数据行{row_number}] {error_msg}"
-            return ApiTestResult.objects.create(
+            return context.sink.add(ApiTestResult(
                 test_case=test_case,
                 test_run=test_run,
                 status='error',
                 error_message=error_msg,
                 executed_by=user
-            )
+            ))
+        finally:
+            # 断言完成后已关闭临时文件；中途出错时在这里关闭，避免落盘的临时文件泄漏
+            if response is not None:
+                response.close()
     
+    @staticmethod
+    def _send_request(context, method, url, environment=None, **kwargs):
+        """
+        发送一次测试请求
+
+        目标主机已熔断时直接抛出 CircuitOpenError；连接失败或超时时在重试预算内
+        按指数退避重试（非幂等方法只重试确定没有发出的请求）。
+
+        Returns:
+            tuple: (响应, 最后一次请求的分阶段耗时, 最后一次请求的开始时间)
+        """
+        breaker = context.circuit_breakers.get(url, environment)
+        budget = context.retry_budget
+        kwargs.setdefault('timeout', (
+            getattr(settings, 'API_TEST_CONNECT_TIMEOUT', 10), getattr(settings, 'API_TEST_REQUEST_TIMEOUT', 30)
+        ))
+        budget.record_request()
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                raise CircuitOpenError(breaker)
+            start_time = time.time()
+            try:
+                with measure() as timing:
+                    response = context.session_pool.request(method, url, environment=environment, **kwargs)
+            except Exception as e:
+                if not is_network_error(e):
+                    raise
+                breaker.record_failure()
+                if attempt >= budget.max_retries or not is_safe_to_retry(method, e) or not budget.try_acquire():
+                    raise
+                delay = budget.backoff(attempt)
+                attempt += 1
+                logger.info(f'请求失败，{delay:.2f}秒后第{attempt}次重试: {method} {url} ({type(e).__name__})')
+                time.sleep(delay)
+                continue
+            breaker.record_success()
+            return response, timing, start_time
+    
+    @staticmethod
+    def _get_case_plan(test_case):
+        """
+        获取用例的执行计划（请求模板、用例变量和断言计划）
+
+        计划按 (用例, 用例更新时间, 接口, 接口更新时间) 缓存，用例或接口修改后自动重新编译。
+        """
+        api = test_case.api
+
+        def compile_plan():
+            request_template = compile_template({
+                'url': api.url,
+                'headers': {**api.get_headers(), **test_case.get_headers()},
+                'params': {**api.get_params(), **test_case.get_params()},
+                'body': test_case.get_body() or api.get_body(),
+            })
+            return CasePlan(request_template, test_case.get_variables(), AssertionPlan(test_case.get_assertions()))
+
+        if test_case.pk is None or api.pk is None:
+            return compile_plan()
+        key = (test_case.pk, test_case.updated_at, api.pk, api.updated_at)
+        return _case_plan_cache.get_or_compile(key, compile_plan)
+
     @staticmethod
     def _replace_variables(data, variables):
-        """替换数据中的变量，支持{{variable}}格式"""
-        if isinstance(data, dict):
-            return {k: ApiTestService._replace_variables(v, variables) for k, v in data.items()}
-        elif isinstance(data, list):
-            return [ApiTestService._replace_variables(item, variables) for item in data]
-        elif isinstance(data, str):
-            # 使用正则表达式替换{{variable}}格式的变量
-            def replace_match(match):
-                var_name = match.group(1)
-                return str(variables.get(var_name, match.group(0)))
-            
-            # 替换{{variable}}格式
-            data = re.sub(r'\{\{(\w+)\}\}', replace_match, data)
-            
-            # 兼容旧的{variable}格式
-            for var_name, var_value in variables.items():
-                data = data.replace(f"{{{var_name}}}", str(var_value))
-            
-            return data
-        return data
+        """替换数据中的变量，支持{{variable}}格式（兼容旧的{variable}格式）"""
+        return render_template(data, variables)
     
     @staticmethod
-    def _execute_assertion(assertion, response):
-        """执行单个断言"""
+    def resolve_concurrency(value=None, default=None):
+        """解析并发数，限制在 1 ~ API_TEST_MAX_CONCURRENCY 之间"""
+        if default is None:
+            default = getattr(settings, 'API_TEST_DEFAULT_CONCURRENCY', 1)
+        max_concurrency = getattr(settings, 'API_TEST_MAX_CONCURRENCY', 32)
+        if value in (None, ''):
+            value = default
         try:
-            assertion_type = assertion.get('type')
-            expected = assertion.get('expected')
-            field = assertion.get('field', '')
-            
-            if assertion_type == 'json_path':
-                # JSON路径断言
-                try:
-                    response_json = response.json()
-                    actual = ApiTestService._get_json_value(response_json, field)
-                    passed = actual == expected
-                    return {
-                        'type': assertion_type,
-                        'field': field,
-                        'expected': expected,
-                        'actual': actual,
-                        'passed': passed,
-                        'message': f"JSON路径 {field} 断言{'通过' if passed else '失败'}"
-                    }
-                except Exception as e:
-                    return {
-                        'type': assertion_type,
-                        'field': field,
-                        'expected': expected,
-                        'actual': None,
-                        'passed': False,
-                        'message': f"JSON路径断言执行失败: {str(e)}"
-                    }
-            
-            elif assertion_type == 'contains':
-                # 包含断言
-                actual = response.text
-                passed = expected in actual
-                return {
-                    'type': assertion_type,
-                    'expected': expected,
-                    'actual': f"响应体长度: {len(actual)}",
-                    'passed': passed,
-                    'message': f"包含断言{'通过' if passed else '失败'}"
-                }
-            
-            elif assertion_type == 'not_contains':
-                # 不包含断言
-                actual = response.text
-                passed = expected not in actual
-                return {
-                    'type': assertion_type,
-                    'expected': f"不包含: {expected}",
-                    'actual': f"响应体长度: {len(actual)}",
-                    'passed': passed,
-                    'message': f"不包含断言{'通过' if passed else '失败'}"
-                }
-            
-            elif assertion_type == 'header':
-                # 响应头断言
-                header_name = assertion.get('header_name')
-                actual = response.headers.get(header_name)
-                passed = actual == expected
-                return {
-                    'type': assertion_type,
-                    'field': header_name,
-                    'expected': expected,
-                    'actual': actual,
-                    'passed': passed,
-                    'message': f"响应头 {header_name} 断言{'通过' if passed else '失败'}"
-                }
-            
-            else:
-                return {
-                    'type': assertion_type,
-                    'expected': expected,
-                    'actual': None,
-                    'passed': False,
-                    'message': f"不支持的断言类型: {assertion_type}"
-                }
-                
+            value = int(value)
+        except (TypeError, ValueError):
+            raise ValueError(f'并发数必须是整数: {value}')
+        return max(1, min(value, max_concurrency))
+
+    @staticmethod
+    def resolve_data_concurrency(value=None):
+        """解析数据驱动测试的分片并发数，未指定时使用 API_TEST_DATA_CONCURRENCY 配置"""
+        return ApiTestService.resolve_concurrency(
+            value, default=getattr(settings, 'API_TEST_DATA_CONCURRENCY', 1)
+        )
+
+    @staticmethod
+    def resolve_write_mode(value=None):
+        """解析结果写入模式，未指定时使用 API_TEST_RESULT_WRITE_MODE 配置"""
+        if value in (None, ''):
+            value = getattr(settings, 'API_TEST_RESULT_WRITE_MODE', 'buffered')
+        valid_modes = [mode for mode, _ in TestRun.WRITE_MODE_CHOICES]
+        if value not in valid_modes:
+            raise ValueError(f"不支持的结果写入模式: {value}，可选值: {', '.join(valid_modes)}")
+        return value
+
+    @staticmethod
+    def _execute_case_safely(test_case, user, test_run=None, environment=None, context=None):
+        """执行单个用例，将未捕获的异常转换为错误结果"""
+        try:
+            return ApiTestService.execute_test_case(test_case, user, test_run, environment, context)
         except Exception as e:
-            return {
-                'type': assertion.get('type', 'unknown'),
-                'expected': assertion.get('expected'),
-                'actual': None,
-                'passed': False,
-                'message': f"断言执行异常: {str(e)}"
-            }
-    
+            logger.exception(f'用例执行异常: {test_case.id}')
+            return context.sink.add(ApiTestResult(
+                test_case=test_case,
+                test_run=test_run,
+                status='error',
+                error_message=f'用例执行异常: {str(e)}',
+                executed_by=user
+            ))
+
     @staticmethod
-    def _get_json_value(data, path):
-        """根据路径获取JSON值，支持点号分隔的路径"""
-        keys = path.split('.')
-        current = data
-        for key in keys:
-            if isinstance(current, dict):
-                current = current.get(key)
-            elif isinstance(current, list) and key.isdigit():
-                index = int(key)
-                current = current[index] if 0 <= index < len(current) else None
-            else:
-                return None
-        return current
-    
+    def execute_test_cases(test_cases, user, test_run=None, environment=None, concurrency=1, context=None,
+                           data_concurrency=1):
+        """
+        按指定并发数执行一组测试用例
+
+        concurrency 为 1 时保持原有的串行执行；大于 1 时使用有界线程池，
+        每个工作线程循环领取用例，结束时关闭自己的数据库连接。
+        所有用例共享同一个执行上下文（连接池等）；data_concurrency 为数据驱动用例的分片并发数。
+
+        Returns:
+            list: 与 test_cases 顺序一致的结果列表
+        """
+        if context is None:
+            with ExecutionContext(test_run, data_concurrency=data_concurrency) as context:
+                return ApiTestService.execute_test_cases(
+                    test_cases, user, test_run, environment, concurrency, context
+                )
+        
+        test_cases = list(test_cases)
+        workers = min(concurrency, len(test_cases))
+        if workers <= 1:
+            results = []
+            for test_case in test_cases:
+                results.append(ApiTestService._execute_case_safely(
+                    test_case, user, test_run, environment, context
+                ))
+                ApiTestService._mark_case_completed(test_run, context)
+            return results
+
+        results = [None] * len(test_cases)
+
+        def run_case(item):
+            index, test_case = item
+            results[index] = ApiTestService._execute_case_safely(
+                test_case, user, test_run, environment, context
+            )
+            ApiTestService._mark_case_completed(test_run, context)
+
+        ApiTestService._run_in_workers(enumerate(test_cases), workers, run_case)
+
+        return results
+
     @staticmethod
-    def execute_test_plan(test_plan, user, run_name=None, environment=None):
-        """执行测试计划，创建测试执行记录"""
+    def _mark_case_completed(test_run, context):
+        """累加已执行用例数，供进度查询和推送使用"""
+        if test_run is not None:
+            TestRun.objects.filter(pk=test_run.pk).update(completed_cases=F('completed_cases') + 1)
+            context.progress.case_completed()
+
+    @staticmethod
+    def get_data_file(test_case):
+        """获取接口用例的数据文件（数据文件来源用例的数据文件）"""
+        if test_case.data_test_case is None:
+            return None
+        try:
+            return test_case.data_test_case.data_file
+        except TestDataFile.DoesNotExist:
+            return None
+
+    @staticmethod
+    def executable_cases():
+        """
+        用于执行的接口用例查询集
+
+        一次性加载接口定义、数据文件来源用例及其数据文件，执行过程中不再逐个查询。
+        """
+        return ApiTestCase.objects.select_related('api', 'data_test_case__data_file')
+
+    @staticmethod
+    def resolve_test_plan_cases(test_plan):
+        """
+        获取测试计划关联的所有API测试用例
+
+        已禁用的用例同样返回，执行时记录为“测试用例已禁用”的错误结果。
+        """
+        return list(ApiTestService.executable_cases().filter(test_cases__plans=test_plan).distinct())
+
+    @staticmethod
+    def run_test_cases(test_run, test_cases, user, environment=None, concurrency=1,
+                       empty_message='没有找到可执行的API测试用例', data_concurrency=1):
+        """在已创建的测试执行记录上执行一组用例，结束时更新执行状态"""
+        test_cases = list(test_cases)
+        test_run.status = 'running'
+        test_run.start_time = timezone.now()
+        test_run.planned_cases = len(test_cases)
+        test_run.completed_cases = 0
+        test_run.total_tests = test_run.passed_tests = test_run.failed_tests = test_run.error_tests = 0
+        test_run.save(update_fields=[
+            'status', 'start_time', 'planned_cases', 'completed_cases',
+            'total_tests', 'passed_tests', 'failed_tests', 'error_tests'
+        ])
+        # 任务被重新领取时清除上一次未完成执行写入的结果，计数与结果保持一致
+        test_run.results.all().delete()
+        test_run.response_time_sketches.all().delete()
+        # 覆盖缓存中上一次执行的进度，避免进度推送读到已结束的状态
+        publish_progress(test_run.get_progress())
+
+        if not test_cases:
+            test_run.mark_failed(empty_message)
+            return test_run
+
+        try:
+            ApiTestService.execute_test_cases(
+                test_cases, user, test_run, environment, concurrency, data_concurrency=data_concurrency
+            )
+            test_run.complete()
+        except Exception as e:
+            test_run.mark_failed(f"测试执行失败: {str(e)}")
+        return test_run
+
+    @staticmethod
+    def execute_test_plan(test_plan, user, run_name=None, environment=None, concurrency=1, test_run=None,
+                          data_concurrency=1):
+        """执行测试计划，创建（或沿用排队时创建的）测试执行记录"""
         from testcases.models import TestPlan
         
         # 如果传入的是测试计划ID，获取对象
@@ -461,55 +634,200 @@ class ApiTestService:
             test_plan = TestPlan.objects.get(id=test_plan)
         
         # 创建测试执行记录
-        if not run_name:
-            run_name = f"{test_plan.name} - {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}"
-        
-        test_run = TestRun.objects.create(
-            name=run_name,
-            test_plan=test_plan,
-            executed_by=user,
-            status='running'
-        )
+        if test_run is None:
+            if not run_name:
+                run_name = f"{test_plan.name} - {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}"
+            
+            body_retention, body_retention_kb = resolve_body_retention(test_plan=test_plan)
+            test_run = TestRun.objects.create(
+                name=run_name,
+                test_plan=test_plan,
+                executed_by=user,
+                status='running',
+                body_retention=body_retention,
+                body_retention_kb=body_retention_kb
+            )
         
         try:
-            # 获取测试计划关联的所有API测试用例
-            api_test_cases = []
-            for test_case in test_plan.test_cases.filter(is_active=True):
-                # 查找关联的API测试用例
-                related_api_cases = ApiTestCase.objects.filter(
-                    name__icontains=test_case.title
-                ).filter(is_active=True)
-                api_test_cases.extend(related_api_cases)
-            
-            if not api_test_cases:
-                test_run.mark_failed("测试计划中没有找到可执行的API测试用例")
-                return test_run
-            
-            results = []
-            # 执行每个测试用例
-            for api_test_case in api_test_cases:
-                try:
-                    result = ApiTestService.execute_test_case(api_test_case, user, test_run, environment)
-                    results.append(result)
-                except Exception as e:
-                    # 记录单个用例执行错误
-                    error_result = ApiTestResult.objects.create(
-                        test_case=api_test_case,
-                        test_run=test_run,
-                        status='error',
-                        error_message=f'用例执行异常: {str(e)}',
-                        executed_by=user
-                    )
-                    results.append(error_result)
-            
-            # 完成测试执行
-            test_run.complete()
-            return test_run
-            
+            api_test_cases = ApiTestService.resolve_test_plan_cases(test_plan)
         except Exception as e:
             test_run.mark_failed(f"测试计划执行失败: {str(e)}")
             return test_run
+        
+        return ApiTestService.run_test_cases(
+            test_run, api_test_cases, user, environment, concurrency,
+            empty_message="测试计划中没有找到可执行的API测试用例",
+            data_concurrency=data_concurrency
+        )
+
+    @staticmethod
+    def enqueue_job(job_type, run_name, user, payload, test_plan=None, write_mode=None, body_retention=None):
+        """
+        创建排队状态的测试执行记录及对应的执行任务
+
+        body_retention 为 resolve_body_retention 返回的 (保留策略, 保留大小KB)，
+        未指定时按测试计划和系统配置解析。
+        """
+        body_retention, body_retention_kb = body_retention or resolve_body_retention(test_plan=test_plan)
+        with transaction.atomic():
+            test_run = TestRun.objects.create(
+                name=run_name,
+                test_plan=test_plan,
+                executed_by=user,
+                status='queued',
+                result_write_mode=write_mode or ApiTestService.resolve_write_mode(),
+                body_retention=body_retention,
+                body_retention_kb=body_retention_kb
+            )
+            job = TestRunJob.objects.create(test_run=test_run, job_type=job_type, payload=payload)
+        return job
+
+    @staticmethod
+    def enqueue_load_test(load_test):
+        """把压测加入执行队列"""
+        with transaction.atomic():
+            load_test.status = 'queued'
+            load_test.error_message = ''
+            load_test.save(update_fields=['status', 'error_message'])
+            TestRunJob.objects.filter(load_test=load_test).delete()
+            return TestRunJob.objects.create(load_test=load_test, job_type='load_test')
+
+    @staticmethod
+    def execute_load_test(load_test):
+        """
+        执行压力测试
+
+        请求模板和环境变量在开始前渲染一次，之后按权重随机选择用例发送；
+        响应状态码与用例的期望状态码不一致时计为失败。结果汇总写入压测记录。
+        """
+        cases = list(load_test.cases.select_related('test_case__api'))
+        if not cases:
+            load_test.mark_failed('压测没有配置接口用例')
+            return load_test
+
+        load_test.status = 'running'
+        load_test.start_time = timezone.now()
+        load_test.end_time = None
+        load_test.save(update_fields=['status', 'start_time', 'end_time'])
+
+        environment = load_test.environment
+        session_pool = SessionPool(pool_maxsize=max(load_test.concurrency, getattr(
+            settings, 'API_TEST_HTTP_POOL_MAXSIZE', 32
+        )))
+        try:
+            with ExecutionContext(session_pool=session_pool) as context:
+                env_variables = {}
+                if environment:
+                    env_variables = context.get_environment_snapshot(environment).variables
+                targets = []
+                for item in cases:
+                    test_case = item.test_case
+                    case_plan = ApiTestService._get_case_plan(test_case)
+                    request_data = case_plan.request_template.render({**case_plan.variables, **env_variables})
+                    targets.append((test_case, request_data))
+                    if environment:
+                        context.record_environment_usage(environment, load_test.created_by, test_case)
+                cum_weights = list(itertools.accumulate(item.weight for item in cases))
+
+                def send():
+                    test_case, request_data = random.choices(targets, cum_weights=cum_weights)[0]
+                    api = test_case.api
+                    body = request_data['body']
+                    response = context.session_pool.request(
+                        method=api.method,
+                        url=request_data['url'],
+                        environment=environment,
+                        headers=request_data['headers'],
+                        params=request_data['params'],
+                        json=body if api.method in ['POST', 'PUT', 'PATCH'] and body else None,
+                        timeout=load_test.timeout
+                    )
+                    if response.status_code != test_case.expected_status_code:
+                        return f'HTTP {response.status_code}'
+                    return None
+
+                if load_test.mode == 'concurrency':
+                    target = load_test.concurrency
+                else:
+                    target = load_test.target_rps
+                profile = LoadProfile(
+                    target,
+                    [(stage['duration'], stage['target']) for stage in load_test.stages],
+                    load_test.duration
+                )
+                stats = LoadTestEngine(
+                    send, profile, load_test.mode, load_test.concurrency, load_test.request_count
+                ).run()
+        except Exception as e:
+            logger.exception(f'压测执行失败: {load_test.id}')
+            load_test.mark_failed(f'压测执行失败: {str(e)}')
+            return load_test
+
+        histogram = stats.histogram
+        percentiles = histogram.percentiles((50, 90, 99, 99.9))
+        load_test.status = 'completed'
+        load_test.end_time = timezone.now()
+        load_test.total_requests = stats.total
+        load_test.error_requests = stats.errors
+        load_test.errors_by_type = dict(stats.errors_by_type)
+        load_test.latency_min = histogram.min
+        load_test.latency_mean = histogram.mean
+        load_test.latency_max = histogram.max
+        load_test.latency_p50 = percentiles[50]
+        load_test.latency_p90 = percentiles[90]
+        load_test.latency_p99 = percentiles[99]
+        load_test.latency_p999 = percentiles[99.9]
+        load_test.latency_histogram = histogram.to_dict()
+        load_test.timeline = stats.timeline()
+        load_test.save()
+        return load_test
+
+    @staticmethod
+    def process_job(job):
+        """执行队列中的任务，由 run_test_worker 进程调用"""
+        if job.job_type == 'load_test':
+            load_test = ApiTestService.execute_load_test(job.load_test)
+            job.mark_finished(load_test.error_message if load_test.status == 'failed' else None)
+            return job
+
+        test_run = job.test_run
+        payload = job.payload or {}
+        user = test_run.executed_by
+
+        try:
+            environment = None
+            if payload.get('environment_id'):
+                environment = Environment.objects.get(id=payload['environment_id'])
+            concurrency = ApiTestService.resolve_concurrency(payload.get('concurrency'))
+            data_concurrency = ApiTestService.resolve_data_concurrency(payload.get('data_concurrency'))
 
+            if job.job_type == 'test_plan':
+                if test_run.test_plan is None:
+                    raise TestExecutionError('测试计划不存在或已被删除')
+                ApiTestService.execute_test_plan(
+                    test_run.test_plan, user, environment=environment,
+                    concurrency=concurrency, test_run=test_run, data_concurrency=data_concurrency
+                )
+            elif job.job_type == 'batch':
+                test_cases = ApiTestService.executable_cases().filter(
+                    id__in=payload.get('case_ids', [])
+                )
+                ApiTestService.run_test_cases(
+                    test_run, test_cases, user, environment, concurrency,
+                    empty_message='没有找到要执行的测试用例', data_concurrency=data_concurrency
+                )
+            else:
+                raise TestExecutionError(f'不支持的任务类型: {job.job_type}')
+        except Exception as e:
+            logger.exception(f'测试执行任务失败: {job.id}')
+            if test_run.status in ('queued', 'running'):
+                test_run.mark_failed(str(e))
+            job.mark_finished(str(e))
+            return job
+
+        test_run.refresh_from_db(fields=['status', 'error_message'])
+        job.mark_finished(test_run.error_message if test_run.status == 'failed' else None)
+        return job
 
 class ApiDefinitionViewSet(viewsets.ModelViewSet):
     queryset = ApiDefinition.objects.all().select_related('created_by').order_by('-created_at')
@@ -551,18 +869,22 @@ class ApiTestCaseViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
         
-        result = ApiTestService.execute_test_case(test_case, user, environment=environment)
+        try:
+            data_concurrency = ApiTestService.resolve_data_concurrency(request.data.get('data_concurrency'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        with ExecutionContext(data_concurrency=data_concurrency) as context:
+            result = ApiTestService.execute_test_case(test_case, user, environment=environment, context=context)
         return Response(ApiTestResultSerializer(result).data)
 
     @action(detail=False, methods=['post'])
     def batch_execute(self, request):
-        """批量执行测试用例"""
+        """批量执行测试用例（加入执行队列，由worker进程异步执行）"""
         case_ids = request.data.get('case_ids', [])
         if not case_ids:
             return Response({'error': '请提供要执行的测试用例ID列表'}, status=status.HTTP_400_BAD_REQUEST)
         
-        test_cases = ApiTestCase.objects.filter(id__in=case_ids)
-        results = []
         # 处理匿名用户的情况
         user = request.user if request.user.is_authenticated else None
         
@@ -578,23 +900,31 @@ class ApiTestCaseViewSet(viewsets.ModelViewSet):
                     status=status.HTTP_400_BAD_REQUEST
                 )
         
-        for test_case in test_cases:
-            result = ApiTestService.execute_test_case(test_case, user, environment=environment)
-            results.append(ApiTestResultSerializer(result).data)
+        try:
+            concurrency = ApiTestService.resolve_concurrency(request.data.get('concurrency'))
+            data_concurrency = ApiTestService.resolve_data_concurrency(request.data.get('data_concurrency'))
+            write_mode = ApiTestService.resolve_write_mode(request.data.get('write_mode'))
+            body_retention = resolve_body_retention(
+                request.data.get('body_retention'), request.data.get('body_retention_kb')
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
-        summary = {
-            'total_cases': len(results),
-            'passed': len([r for r in results if r['status'] == 'passed']),
-            'failed': len([r for r in results if r['status'] == 'failed']),
-            'errors': len([r for r in results if r['status'] == 'error']),
-            'results': results
-        }
+        run_name = request.data.get('run_name') or f"批量执行 - {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}"
+        job = ApiTestService.enqueue_job('batch', run_name, user, {
+            'case_ids': list(case_ids),
+            'environment_id': environment.id if environment else None,
+            'concurrency': concurrency,
+            'data_concurrency': data_concurrency,
+        }, write_mode=write_mode, body_retention=body_retention)
         
-        return Response(summary)
+        return Response(self._queued_response(job), status=status.HTTP_202_ACCEPTED)
 
     @action(detail=False, methods=['post'])
     def execute_test_plan(self, request):
-        """执行测试计划"""
+        """执行测试计划（加入执行队列，由worker进程异步执行）"""
+        from testcases.models import TestPlan
+        
         test_plan_id = request.data.get('test_plan_id')
         run_name = request.data.get('run_name')
         
@@ -604,6 +934,29 @@ class ApiTestCaseViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        try:
+            concurrency = ApiTestService.resolve_concurrency(request.data.get('concurrency'))
+            data_concurrency = ApiTestService.resolve_data_concurrency(request.data.get('data_concurrency'))
+            write_mode = ApiTestService.resolve_write_mode(request.data.get('write_mode'))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            test_plan = TestPlan.objects.get(id=test_plan_id)
+        except (TestPlan.DoesNotExist, ValueError):
+            return Response(
+                {'error': '指定的测试计划不存在'}, 
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        
+        try:
+            # 未指定时使用测试计划上配置的保留策略
+            body_retention = resolve_body_retention(
+                request.data.get('body_retention'), request.data.get('body_retention_kb'), test_plan
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
         try:
             user = request.user if request.user.is_authenticated else None
             
@@ -619,11 +972,16 @@ class ApiTestCaseViewSet(viewsets.ModelViewSet):
                         status=status.HTTP_400_BAD_REQUEST
                     )
             
-            test_run = ApiTestService.execute_test_plan(test_plan_id, user, run_name, environment)
+            if not run_name:
+                run_name = f"{test_plan.name} - {timezone.now().strftime('%Y-%m-%d %H:%M:%S')}"
+            
+            job = ApiTestService.enqueue_job('test_plan', run_name, user, {
+                'environment_id': environment.id if environment else None,
+                'concurrency': concurrency,
+                'data_concurrency': data_concurrency,
+            }, test_plan=test_plan, write_mode=write_mode, body_retention=body_retention)
             
-            from reports.serializers import TestRunDetailSerializer
-            serializer = TestRunDetailSerializer(test_run)
-            return Response(serializer.data, status=status.HTTP_201_CREATED)
+            return Response(self._queued_response(job), status=status.HTTP_202_ACCEPTED)
             
         except Exception as e:
             return Response(
@@ -631,9 +989,44 @@ class ApiTestCaseViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_500_INTERNAL_SERVER_ERROR
             )
 
+    def _queued_response(self, job):
+        """构造任务入队后的响应数据"""
+        return {
+            'id': job.test_run_id,
+            'test_run_id': job.test_run_id,
+            'job_id': job.id,
+            'status': job.test_run.status,
+            'message': '测试执行已加入队列',
+        }
+
+class LoadTestRunViewSet(viewsets.ModelViewSet):
+    """压力测试管理"""
+    queryset = LoadTestRun.objects.select_related('created_by').prefetch_related('cases__test_case').order_by('-created_at')
+    serializer_class = LoadTestRunSerializer
+    permission_classes = []  # 统一权限配置：不限制访问
+
+    def perform_create(self, serializer):
+        # 处理匿名用户的情况
+        user = self.request.user if self.request.user.is_authenticated else None
+        serializer.save(created_by=user)
+
+    @action(detail=True, methods=['post'])
+    def run(self, request, pk=None):
+        """开始压测（加入执行队列，由worker进程异步执行）"""
+        load_test = self.get_object()
+        if load_test.status in ('queued', 'running'):
+            return Response({'error': '压测正在排队或执行中'}, status=status.HTTP_400_BAD_REQUEST)
+        job = ApiTestService.enqueue_load_test(load_test)
+        return Response({
+            'id': load_test.id,
+            'job_id': job.id,
+            'status': load_test.status,
+            'message': '压测已加入队列',
+        }, status=status.HTTP_202_ACCEPTED)
+
 
 class ApiTestResultViewSet(viewsets.ReadOnlyModelViewSet):
-    queryset = ApiTestResult.objects.all().order_by('-executed_at')
+    queryset = ApiTestResult.objects.select_related(*ApiTestResult.BLOB_RELATIONS).order_by('-executed_at')
     serializer_class = ApiTestResultSerializer
     permission_classes = []  # 统一权限配置：不限制访问
 
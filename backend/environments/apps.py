@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class EnvironmentsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'environments'
-    verbose_name = '环境管理'
\ No newline at end of file
+    verbose_name = '环境管理'
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,27 @@
+"""
+环境变量缓存失效
+环境或环境变量保存、删除后递增环境的缓存版本号
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from utils.cache_utils import invalidate_environment_variables
+
+from .models import Environment, EnvironmentVariable
+
+
+def _invalidate(environment_id):
+    # 当前事务内立即失效；事务提交后再次递增，避免其他进程在提交前重新缓存旧的变量
+    invalidate_environment_variables(environment_id)
+    transaction.on_commit(lambda: invalidate_environment_variables(environment_id))
+
+
+@receiver([post_save, post_delete], sender=Environment)
+def invalidate_environment(sender, instance, **kwargs):
+    _invalidate(instance.pk)
+
+
+@receiver([post_save, post_delete], sender=EnvironmentVariable)
+def invalidate_environment_variable(sender, instance, **kwargs):
+    _invalidate(instance.environment_id)
@@ -12,6 +12,8 @@ from .serializers import (
     EnvironmentVariableSerializer, EnvironmentVariableCreateSerializer,
     EnvironmentUsageLogSerializer
 )
+from utils.cache_utils import cache_environment_variables
+from utils.template_utils import compile_template
 
 
 class EnvironmentViewSet(viewsets.ModelViewSet):
@@ -118,23 +120,16 @@ class EnvironmentViewSet(viewsets.ModelViewSet):
         if not text:
             return Response({'error': '请提供要替换的文本'}, status=status.HTTP_400_BAD_REQUEST)
         
-        # 获取环境变量字典
-        variables = {}
-        for var in environment.variables.all():
-            variables[var.key] = var.value
+        # 获取环境变量字典（带版本的缓存，变量修改后立即失效）
+        variables = cache_environment_variables(environment.id)
         
-        # 替换变量
-        import re
-        def replace_var(match):
-            var_name = match.group(1)
-            return variables.get(var_name, match.group(0))
-        
-        replaced_text = re.sub(r'\{\{(\w+)\}\}', replace_var, text)
+        # 替换变量（与测试执行使用同一模板引擎，只识别{{variable}}格式）
+        template = compile_template(text, legacy=False)
         
         return Response({
             'original_text': text,
-            'replaced_text': replaced_text,
-            'variables_used': list(re.findall(r'\{\{(\w+)\}\}', text))
+            'replaced_text': template.render(variables),
+            'variables_used': template.variable_names
         })
 
     @action(detail=False, methods=['get'])
@@ -4,4 +4,7 @@ from django.apps import AppConfig
 class MockServerConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'mock_server'
-    verbose_name = 'Mock Server'
\ No newline at end of file
+    verbose_name = 'Mock Server'
+
+    def ready(self):
+        from . import signals  # noqa: F401
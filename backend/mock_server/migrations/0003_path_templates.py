@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-16 23:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mock_server', '0002_remove_mockapi_unique_mock_path_method_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mockapi',
+            name='path',
+            field=models.CharField(help_text='例如: /api/user/profile、/users/{id}、/users/{id:\\d+}/orders、/files/*、/static/**', max_length=500, verbose_name='URL路径'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.11 on 2026-10-16 23:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mock_server', '0003_path_templates'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='mockapi',
+            name='bandwidth_kbps',
+            field=models.IntegerField(default=0, help_text='响应体的传输速率上限（千比特/秒），0表示不限速', verbose_name='带宽限制(kbps)'),
+        ),
+        migrations.AddField(
+            model_name='mockapi',
+            name='drop_rate',
+            field=models.FloatField(default=0, help_text='发送部分响应体后中断连接的概率（0~1）', verbose_name='连接中断概率'),
+        ),
+        migrations.AddField(
+            model_name='mockapi',
+            name='error_rate',
+            field=models.FloatField(default=0, help_text='返回错误状态码的概率（0~1）', verbose_name='错误注入概率'),
+        ),
+        migrations.AddField(
+            model_name='mockapi',
+            name='error_status_code',
+            field=models.IntegerField(default=503, verbose_name='注入错误状态码'),
+        ),
+        migrations.AddField(
+            model_name='mockapi',
+            name='latency',
+            field=models.JSONField(blank=True, default=dict, help_text='按分布随机生成延迟，例如 {"type": "lognormal", "median_ms": 80, "sigma": 0.6}，为空时使用固定的响应延迟', verbose_name='延迟分布'),
+        ),
+        migrations.AddField(
+            model_name='mockapi',
+            name='random_seed',
+            field=models.BigIntegerField(blank=True, help_text='指定后第n次请求的延迟和故障固定，便于重复压测', null=True, verbose_name='随机种子'),
+        ),
+    ]
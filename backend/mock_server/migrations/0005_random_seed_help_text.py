@@ -0,0 +1,18 @@
+# Generated by Django 4.2.11 on 2026-10-17 00:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('mock_server', '0004_network_simulation'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='mockapi',
+            name='random_seed',
+            field=models.BigIntegerField(blank=True, help_text='指定后相同请求（方法、路径、查询参数和请求头 X-Mock-Seed）的延迟和故障固定，便于重复压测', null=True, verbose_name='随机种子'),
+        ),
+    ]
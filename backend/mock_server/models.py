@@ -3,6 +3,8 @@ from django.conf import settings
 from django.core.exceptions import ValidationError
 import json
 
+from .routing import parse_path_pattern
+from .simulation import parse_latency
 
 
 class MockAPI(models.Model):
@@ -22,7 +24,7 @@ class MockAPI(models.Model):
     path = models.CharField(
         max_length=500, 
         verbose_name='URL路径',
-        help_text="例如: /api/user/profile 或 /user/profile/1"
+        help_text="例如: /api/user/profile、/users/{id}、/users/{id:\\d+}/orders、/files/*、/static/**"
     )
     method = models.CharField(
         max_length=10, 
@@ -59,6 +61,37 @@ class MockAPI(models.Model):
         verbose_name='响应延迟(毫秒)',
         help_text='模拟网络延迟，0表示无延迟'
     )
+    latency = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name='延迟分布',
+        help_text='按分布随机生成延迟，例如 {"type": "lognormal", "median_ms": 80, "sigma": 0.6}，为空时使用固定的响应延迟'
+    )
+    bandwidth_kbps = models.IntegerField(
+        default=0,
+        verbose_name='带宽限制(kbps)',
+        help_text='响应体的传输速率上限（千比特/秒），0表示不限速'
+    )
+    error_rate = models.FloatField(
+        default=0,
+        verbose_name='错误注入概率',
+        help_text='返回错误状态码的概率（0~1）'
+    )
+    error_status_code = models.IntegerField(
+        default=503,
+        verbose_name='注入错误状态码'
+    )
+    drop_rate = models.FloatField(
+        default=0,
+        verbose_name='连接中断概率',
+        help_text='发送部分响应体后中断连接的概率（0~1）'
+    )
+    random_seed = models.BigIntegerField(
+        null=True,
+        blank=True,
+        verbose_name='随机种子',
+        help_text='指定后相同请求（方法、路径、查询参数和请求头 X-Mock-Seed）的延迟和故障固定，便于重复压测'
+    )
     created_by = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -89,6 +122,10 @@ class MockAPI(models.Model):
         # 验证路径格式
         if not self.path.startswith('/'):
             raise ValidationError({'path': 'URL路径必须以/开头'})
+        try:
+            parse_path_pattern(self.path)
+        except ValueError as e:
+            raise ValidationError({'path': str(e)})
         
         # 验证状态码
         if not (100 <= self.response_status_code <= 599):
@@ -105,6 +142,19 @@ class MockAPI(models.Model):
         # 验证延迟时间
         if self.delay_ms < 0:
             raise ValidationError({'delay_ms': '延迟时间不能为负数'})
+        
+        # 验证网络状况模拟配置
+        try:
+            parse_latency(self.latency)
+        except ValueError as e:
+            raise ValidationError({'latency': str(e)})
+        if self.bandwidth_kbps < 0:
+            raise ValidationError({'bandwidth_kbps': '带宽限制不能为负数'})
+        for field in ('error_rate', 'drop_rate'):
+            if not (0 <= getattr(self, field) <= 1):
+                raise ValidationError({field: '概率必须在0-1范围内'})
+        if not (100 <= self.error_status_code <= 599):
+            raise ValidationError({'error_status_code': 'HTTP状态码必须在100-599范围内'})
     
     def save(self, *args, **kwargs):
         """保存前进行数据清理"""
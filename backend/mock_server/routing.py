@@ -0,0 +1,359 @@
+"""
+Mock路由表
+每个进程在内存中保存由启用的Mock编译成的路由树及预先生成的响应内容，命中Mock时不需要查询数据库；
+Mock保存或删除后递增共享缓存中的版本号，所有进程随后重新加载路由表
+"""
+import logging
+import re
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+
+from utils.template_utils import compile_template
+
+from .simulation import MockBehavior, ResponsePlan, astream_body, get_request_key, get_request_seed, stream_body
+
+logger = logging.getLogger(__name__)
+
+ROUTES_VERSION_KEY = 'mock_routes:version'
+
+# 404 响应中列出的可用Mock数量
+AVAILABLE_MOCKS_LIMIT = 10
+
+# 路径模板中的参数段：{name} 或 {name:正则}
+PARAM_SEGMENT = re.compile(r'^\{(?P<name>[A-Za-z_]\w*)(?::(?P<pattern>.+))?\}$')
+
+# 单段通配符和多段通配符（匹配剩余的一段或多段，只能出现在末尾）
+SINGLE_WILDCARD = '*'
+MULTI_WILDCARD = '**'
+
+
+def get_routes_version():
+    """获取路由表的版本号，不存在时以当前时间初始化（与 get_environment_version 一致）"""
+    version = cache.get(ROUTES_VERSION_KEY)
+    if version is None:
+        cache.add(ROUTES_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(ROUTES_VERSION_KEY)
+    return version
+
+
+def bump_routes_version():
+    """递增路由表版本号，所有进程在下次检查时重新加载"""
+    try:
+        return cache.incr(ROUTES_VERSION_KEY)
+    except ValueError:
+        version = time.time_ns()
+        cache.set(ROUTES_VERSION_KEY, version, None)
+        return version
+
+
+def normalize_path(path):
+    """与 MockAPI.save() 相同的路径标准化：以 / 开头，去掉尾部的 /"""
+    if not path.startswith('/'):
+        path = '/' + path
+    if path != '/' and path.endswith('/'):
+        path = path.rstrip('/')
+    return path
+
+
+def parse_path_pattern(path):
+    """
+    解析Mock路径模板
+
+    支持静态段、{name} 参数、{name:正则} 参数（正则需完整匹配整段）、* 单段通配符和 ** 多段通配符。
+
+    Returns:
+        list: [(类型, 值), ...]，类型为 static / param / wildcard / multi，
+              param 的值为 (参数名, 编译后的正则或 None)
+
+    Raises:
+        ValueError: 路径模板无效
+    """
+    segments = []
+    names = set()
+    parts = path.strip('/').split('/') if path.strip('/') else []
+    for index, part in enumerate(parts):
+        if part == MULTI_WILDCARD:
+            if index != len(parts) - 1:
+                raise ValueError('** 只能出现在路径末尾')
+            segments.append(('multi', None))
+            continue
+        if part == SINGLE_WILDCARD:
+            segments.append(('wildcard', None))
+            continue
+        match = PARAM_SEGMENT.match(part)
+        if match is None:
+            if '{' in part or '}' in part:
+                raise ValueError(f'无效的路径参数: {part}，格式为 {{name}} 或 {{name:正则}}')
+            segments.append(('static', part))
+            continue
+        name = match.group('name')
+        if name in names:
+            raise ValueError(f'路径参数重复: {name}')
+        names.add(name)
+        pattern = match.group('pattern')
+        try:
+            regex = re.compile(pattern) if pattern else None
+        except re.error as e:
+            raise ValueError(f'路径参数 {name} 的正则无效: {e}')
+        segments.append(('param', (name, regex)))
+    return segments
+
+
+class CompiledMock:
+    """
+    预先生成响应内容的Mock，只读，可被多个线程同时使用
+
+    路径模板带参数时，响应体和响应头中的 {{参数名}} 在命中时替换为匹配到的值。
+    配置了延迟分布、带宽限制或故障注入时由 behavior 生成每次命中的延迟和故障。
+    """
+
+    __slots__ = (
+        'id', 'name', 'method', 'path', 'status_code', 'content_type', 'headers', 'body', 'delay_ms',
+        'behavior', '_body_template', '_headers_template'
+    )
+
+    def __init__(self, mock_api, has_params=False):
+        self.id = mock_api.pk
+        self.name = mock_api.name
+        self.method = mock_api.method
+        self.path = mock_api.path
+        self.status_code = mock_api.response_status_code
+        self.delay_ms = mock_api.delay_ms
+        self.behavior = MockBehavior.from_mock(mock_api)
+        response_headers = mock_api.response_headers or {}
+        # 没有指定Content-Type时根据响应体推断
+        self.content_type = response_headers.get('Content-Type') or mock_api.get_content_type()
+        self.headers = tuple(
+            (header, str(value)) for header, value in response_headers.items() if header.lower() != 'content-type'
+        )
+        self.body = (mock_api.response_body or '').encode('utf-8')
+        self._body_template = self._headers_template = None
+        if has_params:
+            body_template = compile_template(mock_api.response_body or '', legacy=False)
+            if body_template.variable_names:
+                self._body_template = body_template
+                if 'Content-Type' not in response_headers:
+                    # 带占位符的响应体按占位符替换后的内容推断类型，如 {"id": {{id}}} 仍然是JSON
+                    probe = body_template.render(dict.fromkeys(body_template.variable_names, '0'))
+                    self.content_type = type(mock_api)(response_body=probe).get_content_type()
+            headers_template = compile_template(dict(self.headers), legacy=False)
+            if headers_template.variable_names:
+                self._headers_template = headers_template
+
+    def plan(self, request):
+        """生成本次命中的延迟和故障"""
+        if self.behavior is None:
+            return ResponsePlan(self.delay_ms / 1000.0, None)
+        return self.behavior.plan(get_request_seed(request), get_request_key(request))
+
+    def status_for(self, plan):
+        return self.behavior.error_status_code if plan.fault == 'error' else self.status_code
+
+    def build_response(self, params=None, plan=None, is_async=False):
+        """
+        生成响应
+
+        注入错误时返回错误状态码；限速或中断连接时以流式响应逐块发送响应体，
+        中断连接时声明完整的 Content-Length，但只发送一半响应体后中止。
+        """
+        if plan is not None and plan.fault == 'error':
+            return JsonResponse({
+                'error': 'Injected fault',
+                'message': f'Simulated error for {self.method} {self.path}'
+            }, status=self.behavior.error_status_code)
+
+        body, headers = self.body, self.headers
+        if params:
+            if self._body_template is not None:
+                body = self._body_template.render(params).encode('utf-8')
+            if self._headers_template is not None:
+                headers = self._headers_template.render(params).items()
+
+        bandwidth = self.behavior.bandwidth if self.behavior is not None else 0
+        truncate = plan is not None and plan.fault == 'drop'
+        if bandwidth or truncate:
+            stream = astream_body if is_async else stream_body
+            response = StreamingHttpResponse(
+                stream(body, bandwidth, truncate), status=self.status_code, content_type=self.content_type
+            )
+            response['Content-Length'] = str(len(body))
+        else:
+            response = HttpResponse(content=body, status=self.status_code, content_type=self.content_type)
+        for header, value in headers:
+            response[header] = value
+        return response
+
+
+class _TrieNode:
+    __slots__ = ('static', 'params', 'wildcard', 'multi', 'routes')
+
+    def __init__(self):
+        self.static = {}
+        # [(参数名, 正则, 正则文本, 子节点)]，带正则的参数排在前面
+        self.params = []
+        self.wildcard = None
+        # 多段通配符在末尾，直接保存 {方法: Mock}
+        self.multi = {}
+        self.routes = {}
+
+    def param_child(self, name, regex):
+        source = regex.pattern if regex is not None else None
+        for param_name, _, param_source, child in self.params:
+            if param_name == name and param_source == source:
+                return child
+        child = _TrieNode()
+        self.params.append((name, regex, source, child))
+        self.params.sort(key=lambda item: item[1] is None)
+        return child
+
+
+class RouteTrie:
+    """
+    按路径段组织的Mock路由树
+
+    查找只沿路径逐段向下，耗时与路径深度相关，与Mock数量无关。
+    同一位置按 静态段 > 带正则的参数 > 参数 > * > ** 的顺序优先匹配，
+    更具体的模板无法匹配（包括方法不匹配）时再尝试更宽泛的模板。
+    """
+
+    def __init__(self):
+        self.root = _TrieNode()
+
+    def insert(self, segments, method, compiled):
+        node = self.root
+        for kind, value in segments:
+            if kind == 'static':
+                node = node.static.setdefault(value, _TrieNode())
+            elif kind == 'param':
+                node = node.param_child(*value)
+            elif kind == 'wildcard':
+                if node.wildcard is None:
+                    node.wildcard = _TrieNode()
+                node = node.wildcard
+            else:
+                node.multi[method] = compiled
+                return
+        node.routes[method] = compiled
+
+    def match(self, method, path):
+        """
+        查找Mock
+
+        Returns:
+            tuple: (CompiledMock, 路径参数字典)，没有匹配时返回 None
+        """
+        segments = path.strip('/').split('/') if path.strip('/') else []
+        return self._match(self.root, segments, 0, method, {})
+
+    def _match(self, node, segments, index, method, params):
+        if index == len(segments):
+            compiled = node.routes.get(method)
+            return (compiled, params) if compiled is not None else None
+        segment = segments[index]
+        child = node.static.get(segment)
+        if child is not None:
+            found = self._match(child, segments, index + 1, method, params)
+            if found is not None:
+                return found
+        if not segment:
+            return None
+        for name, regex, _, child in node.params:
+            if regex is not None and not regex.fullmatch(segment):
+                continue
+            params[name] = segment
+            found = self._match(child, segments, index + 1, method, params)
+            if found is not None:
+                return found
+            del params[name]
+        if node.wildcard is not None:
+            found = self._match(node.wildcard, segments, index + 1, method, params)
+            if found is not None:
+                return found
+        compiled = node.multi.get(method)
+        return (compiled, params) if compiled is not None else None
+
+
+class MockRouteTable:
+    """启用的Mock路由树"""
+
+    def __init__(self, mocks=(), version=None):
+        self.version = version
+        self.trie = RouteTrie()
+        self.available = []
+        for mock_api in mocks:
+            try:
+                segments = parse_path_pattern(mock_api.path)
+            except ValueError as e:
+                logger.warning(f'忽略路径模板无效的Mock {mock_api.pk}: {e}')
+                continue
+            has_params = any(kind == 'param' for kind, _ in segments)
+            compiled = CompiledMock(mock_api, has_params)
+            self.trie.insert(segments, compiled.method, compiled)
+            if len(self.available) < AVAILABLE_MOCKS_LIMIT:
+                self.available.append(f'{compiled.method} {compiled.path} ({compiled.name})')
+
+    @classmethod
+    def load(cls):
+        """从数据库加载启用的Mock（先读取版本号，加载期间的修改会在下次检查时生效）"""
+        from .models import MockAPI
+
+        version = get_routes_version()
+        return cls(MockAPI.objects.filter(is_active=True), version)
+
+    def match(self, method, path):
+        """
+        查找Mock
+
+        Returns:
+            tuple: (CompiledMock, 路径参数字典)，没有匹配时返回 None
+        """
+        return self.trie.match(method, path)
+
+
+_table = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def get_route_table():
+    """
+    获取当前进程的路由表
+
+    距上次检查超过 MOCK_ROUTE_VERSION_CHECK_INTERVAL 秒时读取共享缓存中的版本号，
+    版本变化后重新加载；其余请求直接使用内存中的路由表。
+    """
+    global _table, _checked_at
+    table = _table
+    interval = getattr(settings, 'MOCK_ROUTE_VERSION_CHECK_INTERVAL', 1.0)
+    if table is not None and time.monotonic() - _checked_at < interval:
+        return table
+    with _lock:
+        if _table is None or _table.version != get_routes_version():
+            _table = MockRouteTable.load()
+        _checked_at = time.monotonic()
+        return _table
+
+
+async def aget_route_table():
+    """
+    异步视图中获取路由表
+
+    路由表仍然有效时直接返回；需要检查版本号或重新加载时在线程中执行，避免阻塞事件循环。
+    """
+    table = _table
+    interval = getattr(settings, 'MOCK_ROUTE_VERSION_CHECK_INTERVAL', 1.0)
+    if table is not None and time.monotonic() - _checked_at < interval:
+        return table
+    return await sync_to_async(get_route_table)()
+
+
+def invalidate_routes():
+    """Mock变更后丢弃当前进程的路由表，并通知其他进程"""
+    global _table
+    _table = None
+    bump_routes_version()
@@ -1,5 +1,7 @@
 from rest_framework import serializers
 from .models import MockAPI, MockAPIUsageLog
+from .routing import parse_path_pattern
+from .simulation import parse_latency
 import json
 
 
@@ -29,7 +31,8 @@ class MockAPIDetailSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'name', 'path', 'method', 'response_status_code',
             'response_headers', 'response_body', 'response_body_preview',
-            'description', 'is_active', 'delay_ms', 'full_url',
+            'description', 'is_active', 'delay_ms', 'latency', 'bandwidth_kbps',
+            'error_rate', 'error_status_code', 'drop_rate', 'random_seed', 'full_url',
             'content_type', 'created_by', 'created_by_username',
             'created_at', 'updated_at'
         ]
@@ -57,7 +60,8 @@ class MockAPICreateSerializer(serializers.ModelSerializer):
         fields = [
             'name', 'path', 'method', 'response_status_code',
             'response_headers', 'response_body', 'description',
-            'is_active', 'delay_ms'
+            'is_active', 'delay_ms', 'latency', 'bandwidth_kbps',
+            'error_rate', 'error_status_code', 'drop_rate', 'random_seed'
         ]
     
     def validate_path(self, value):
@@ -69,6 +73,12 @@ class MockAPICreateSerializer(serializers.ModelSerializer):
         if value != '/' and value.endswith('/'):
             value = value.rstrip('/')
         
+        # 验证路径模板（参数、正则和通配符）
+        try:
+            parse_path_pattern(value)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+        
         return value
     
     def validate_response_headers(self, value):
@@ -99,6 +109,29 @@ class MockAPICreateSerializer(serializers.ModelSerializer):
             raise serializers.ValidationError('延迟时间不能超过30秒')
         return value
     
+    def validate_latency(self, value):
+        """验证延迟分布"""
+        try:
+            parse_latency(value)
+        except ValueError as e:
+            raise serializers.ValidationError(str(e))
+        return value or {}
+    
+    def validate_bandwidth_kbps(self, value):
+        if value < 0:
+            raise serializers.ValidationError('带宽限制不能为负数')
+        return value
+    
+    def validate_error_rate(self, value):
+        if not (0 <= value <= 1):
+            raise serializers.ValidationError('概率必须在0-1范围内')
+        return value
+    
+    validate_drop_rate = validate_error_rate
+    
+    def validate_error_status_code(self, value):
+        return self.validate_response_status_code(value)
+    
     def validate(self, attrs):
         """验证路径和方法的唯一性"""
         path = attrs.get('path')
@@ -147,4 +180,5 @@ class MockAPIStatsSerializer(serializers.Serializer):
     requests_today = serializers.IntegerField()
     most_used_mock = serializers.DictField()
     method_distribution = serializers.DictField()
-    status_code_distribution = serializers.DictField()
\ No newline at end of file
+    status_code_distribution = serializers.DictField()
+    usage_log = serializers.DictField(required=False)
\ No newline at end of file
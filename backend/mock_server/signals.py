@@ -0,0 +1,17 @@
+"""
+Mock路由表失效
+MockAPI保存、删除后递增路由表版本号；通过 QuerySet.update() 批量修改时需要手动调用 invalidate_routes()
+"""
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import MockAPI
+from .routing import invalidate_routes
+
+
+@receiver([post_save, post_delete], sender=MockAPI)
+def invalidate_mock_routes(sender, instance, **kwargs):
+    # 当前进程立即失效；事务提交后再通知其他进程，避免其他进程加载到未提交前的数据
+    invalidate_routes()
+    transaction.on_commit(invalidate_routes)
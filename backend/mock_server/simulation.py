@@ -0,0 +1,294 @@
+"""
+Mock响应的网络状况模拟
+按分布随机生成响应延迟、按带宽限速发送响应体，并按概率注入错误响应或中断连接；
+配置随机种子后结果只由种子和请求决定，与命中顺序和处理请求的进程无关，压测可以重复
+"""
+import asyncio
+import bisect
+import math
+import random
+import time
+from collections import namedtuple
+
+# 模拟延迟的上限（与 delay_ms 的上限一致）
+MAX_DELAY_MS = 30000
+
+# 单个请求指定随机种子的请求头，同一种子的相同请求结果相同；压测工具可以发送请求序号区分每次请求
+SEED_HEADER = 'HTTP_X_MOCK_SEED'
+
+# 限速发送时每块数据的时间间隔（秒）
+THROTTLE_TICK = 0.05
+
+LATENCY_TYPES = ('fixed', 'uniform', 'normal', 'lognormal', 'percentile')
+
+# 一次命中的模拟结果：延迟（秒）和注入的故障（None / 'error' / 'drop'）
+ResponsePlan = namedtuple('ResponsePlan', ['delay', 'fault'])
+
+
+def _number(config, key, minimum=0.0, default=None):
+    value = config.get(key, default)
+    if value is None:
+        raise ValueError(f'缺少参数 {key}')
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f'参数 {key} 必须是数字')
+    if value < minimum or math.isinf(value) or math.isnan(value):
+        raise ValueError(f'参数 {key} 不能小于 {minimum}')
+    return float(value)
+
+
+class LatencyDistribution:
+    """延迟分布，sample() 返回毫秒数，结果限制在 [0, max_ms] 内"""
+
+    def __init__(self, max_ms=MAX_DELAY_MS):
+        self.max_ms = min(max_ms, MAX_DELAY_MS)
+
+    def sample(self, rng):
+        return min(max(self._sample(rng), 0.0), self.max_ms)
+
+    def _sample(self, rng):
+        raise NotImplementedError
+
+
+class FixedLatency(LatencyDistribution):
+    """固定延迟：{"type": "fixed", "ms": 100}"""
+
+    def __init__(self, ms, **kwargs):
+        super().__init__(**kwargs)
+        self.ms = ms
+
+    def _sample(self, rng):
+        return self.ms
+
+
+class UniformLatency(LatencyDistribution):
+    """均匀分布：{"type": "uniform", "min_ms": 50, "max_ms": 150}"""
+
+    def __init__(self, low, high, **kwargs):
+        super().__init__(**kwargs)
+        self.low, self.high = low, high
+
+    def _sample(self, rng):
+        return rng.uniform(self.low, self.high)
+
+
+class NormalLatency(LatencyDistribution):
+    """正态分布：{"type": "normal", "mean_ms": 100, "stddev_ms": 20}，负值按0处理"""
+
+    def __init__(self, mean, stddev, **kwargs):
+        super().__init__(**kwargs)
+        self.mean, self.stddev = mean, stddev
+
+    def _sample(self, rng):
+        return rng.gauss(self.mean, self.stddev)
+
+
+class LogNormalLatency(LatencyDistribution):
+    """
+    对数正态分布：{"type": "lognormal", "median_ms": 80, "sigma": 0.6}
+
+    sigma 越大长尾越明显，sigma=0.6 时 P99 约为中位数的4倍。
+    """
+
+    def __init__(self, median, sigma, **kwargs):
+        super().__init__(**kwargs)
+        self.mu, self.sigma = math.log(median), sigma
+
+    def _sample(self, rng):
+        return rng.lognormvariate(self.mu, self.sigma)
+
+
+class PercentileLatency(LatencyDistribution):
+    """
+    按分位数指定：{"type": "percentile", "percentiles": {"50": 20, "90": 80, "99": 300, "100": 1000}}
+
+    分位数之间线性插值，低于最小分位数时取最小分位数的延迟。
+    """
+
+    def __init__(self, points, **kwargs):
+        super().__init__(**kwargs)
+        self.percentiles = [percentile for percentile, _ in points]
+        self.values = [value for _, value in points]
+
+    def _sample(self, rng):
+        u = rng.random() * 100
+        index = bisect.bisect_left(self.percentiles, u)
+        if index == 0:
+            return self.values[0]
+        if index == len(self.percentiles):
+            return self.values[-1]
+        low_p, high_p = self.percentiles[index - 1], self.percentiles[index]
+        low_v, high_v = self.values[index - 1], self.values[index]
+        return low_v + (high_v - low_v) * (u - low_p) / (high_p - low_p)
+
+
+def parse_latency(config):
+    """
+    解析延迟分布配置
+
+    所有类型都可以额外指定 max_ms 限制最大延迟（不超过 MAX_DELAY_MS）。
+
+    Returns:
+        LatencyDistribution: 配置为空时返回 None
+
+    Raises:
+        ValueError: 配置无效
+    """
+    if not config:
+        return None
+    if not isinstance(config, dict):
+        raise ValueError('延迟分布必须是JSON对象')
+    latency_type = config.get('type')
+    if latency_type not in LATENCY_TYPES:
+        raise ValueError(f'不支持的延迟分布类型: {latency_type}，可选 {", ".join(LATENCY_TYPES)}')
+
+    options = {}
+    if latency_type != 'uniform' and 'max_ms' in config:
+        options['max_ms'] = _number(config, 'max_ms')
+
+    if latency_type == 'fixed':
+        return FixedLatency(_number(config, 'ms'), **options)
+    if latency_type == 'uniform':
+        low, high = _number(config, 'min_ms'), _number(config, 'max_ms')
+        if low > high:
+            raise ValueError('min_ms 不能大于 max_ms')
+        if high > MAX_DELAY_MS:
+            raise ValueError(f'max_ms 不能超过 {MAX_DELAY_MS}')
+        return UniformLatency(low, high)
+    if latency_type == 'normal':
+        return NormalLatency(_number(config, 'mean_ms'), _number(config, 'stddev_ms'), **options)
+    if latency_type == 'lognormal':
+        median = _number(config, 'median_ms')
+        if median <= 0:
+            raise ValueError('median_ms 必须大于0')
+        return LogNormalLatency(median, _number(config, 'sigma'), **options)
+
+    percentiles = config.get('percentiles')
+    if not isinstance(percentiles, dict) or not percentiles:
+        raise ValueError('percentiles 必须是 {分位数: 延迟毫秒} 格式的JSON对象')
+    points = []
+    for key in percentiles:
+        try:
+            percentile = float(key)
+        except (TypeError, ValueError):
+            raise ValueError(f'无效的分位数: {key}')
+        if not 0 <= percentile <= 100:
+            raise ValueError(f'分位数必须在0-100范围内: {key}')
+        points.append((percentile, _number(percentiles, key)))
+    points.sort()
+    if any(high[1] < low[1] for low, high in zip(points, points[1:])):
+        raise ValueError('延迟必须随分位数递增')
+    return PercentileLatency(points, **options)
+
+
+class MockBehavior:
+    """
+    Mock的网络状况模拟配置，只读，可被多个线程同时使用
+
+    每次命中依次决定是否中断连接、是否返回错误以及延迟时间。指定随机种子时使用由
+    (种子, 请求方法, 路径和查询参数, 请求头 X-Mock-Seed) 生成的随机数，不依赖进程内的状态，
+    多个worker进程、Mock重新保存后结果都相同。相同的请求结果相同，需要每次请求结果不同时
+    由客户端在 X-Mock-Seed 中发送请求序号；没有配置种子时只有带 X-Mock-Seed 的请求结果固定。
+    """
+
+    __slots__ = ('mock_id', 'latency', 'delay_ms', 'bandwidth', 'error_rate', 'error_status_code',
+                 'drop_rate', 'seed')
+
+    def __init__(self, mock_id, latency=None, delay_ms=0, bandwidth_kbps=0, error_rate=0.0,
+                 error_status_code=503, drop_rate=0.0, seed=None):
+        self.mock_id = mock_id
+        self.latency = latency
+        self.delay_ms = delay_ms
+        # 千比特/秒 转换为 字节/秒
+        self.bandwidth = bandwidth_kbps * 1000 / 8 if bandwidth_kbps else 0
+        self.error_rate = error_rate
+        self.error_status_code = error_status_code
+        self.drop_rate = drop_rate
+        self.seed = seed
+
+    @classmethod
+    def from_mock(cls, mock_api):
+        """根据MockAPI生成，没有配置任何模拟（只有固定延迟）时返回 None"""
+        latency = parse_latency(mock_api.latency)
+        if latency is None and not (mock_api.bandwidth_kbps or mock_api.error_rate or mock_api.drop_rate):
+            return None
+        return cls(
+            mock_api.pk, latency=latency, delay_ms=mock_api.delay_ms, bandwidth_kbps=mock_api.bandwidth_kbps,
+            error_rate=mock_api.error_rate, error_status_code=mock_api.error_status_code,
+            drop_rate=mock_api.drop_rate, seed=mock_api.random_seed
+        )
+
+    def _rng(self, request_seed=None, request_key=''):
+        if self.seed is None and request_seed is None:
+            return _unseeded
+        # 字符串种子按 SHA-512 转换，不受 PYTHONHASHSEED 影响，所有进程结果一致
+        return random.Random(f'{self.mock_id}:{self.seed}:{request_key}:{request_seed}')
+
+    def plan(self, request_seed=None, request_key=''):
+        """
+        生成一次命中的模拟结果
+
+        Args:
+            request_seed: 请求头 X-Mock-Seed 的值
+            request_key: 请求方法、路径和查询参数，见 get_request_key()
+        """
+        rng = self._rng(request_seed, request_key)
+        # 不论是否触发故障都按相同顺序取随机数，保证同一种子的延迟序列不受故障概率影响
+        drop, error = rng.random(), rng.random()
+        delay_ms = self.latency.sample(rng) if self.latency is not None else self.delay_ms
+        if drop < self.drop_rate:
+            fault = 'drop'
+        elif error < self.error_rate:
+            fault = 'error'
+        else:
+            fault = None
+        return ResponsePlan(delay_ms / 1000.0, fault)
+
+
+_unseeded = random.Random()
+
+
+def get_request_seed(request):
+    return request.META.get(SEED_HEADER) or None
+
+
+def get_request_key(request):
+    """请求方法、路径和查询参数，与种子一起决定模拟结果"""
+    return f"{request.method} {request.path}?{request.META.get('QUERY_STRING', '')}"
+
+
+def _chunks(body, bytes_per_sec, truncate):
+    """按速率切分响应体，返回 [(数据块, 距开始发送的秒数)]；中断连接时只发送前一半"""
+    if truncate:
+        body = body[:len(body) // 2]
+    if not bytes_per_sec:
+        return [(body, 0.0)] if body else []
+    size = max(1, int(bytes_per_sec * THROTTLE_TICK))
+    return [(body[offset:offset + size], offset / bytes_per_sec) for offset in range(0, len(body), size)]
+
+
+class MockConnectionDropped(ConnectionAbortedError):
+    """模拟的连接中断，服务器在发送部分响应体后中止响应"""
+
+
+def stream_body(body, bytes_per_sec=0, truncate=False):
+    """同步视图使用的限速响应体迭代器"""
+    started = time.monotonic()
+    for chunk, due in _chunks(body, bytes_per_sec, truncate):
+        wait = started + due - time.monotonic()
+        if wait > 0:
+            time.sleep(wait)
+        yield chunk
+    if truncate:
+        raise MockConnectionDropped('模拟连接中断')
+
+
+async def astream_body(body, bytes_per_sec=0, truncate=False):
+    """异步视图使用的限速响应体迭代器，等待期间不占用线程"""
+    started = time.monotonic()
+    for chunk, due in _chunks(body, bytes_per_sec, truncate):
+        wait = started + due - time.monotonic()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        yield chunk
+    if truncate:
+        raise MockConnectionDropped('模拟连接中断')
@@ -0,0 +1,262 @@
+"""
+Mock使用日志写入
+命中Mock时只把日志放入有界队列，由后台线程批量写入数据库，不占用请求的响应时间；
+支持按比例采样，队列已满时直接丢弃并计数，保证压测时Mock服务的延迟稳定
+"""
+import atexit
+import codecs
+import logging
+import queue
+import random
+import threading
+import time
+from collections import namedtuple
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections
+
+logger = logging.getLogger(__name__)
+
+# 不记录的敏感请求头
+SENSITIVE_HEADERS = {'authorization', 'cookie'}
+
+# 请求体记录的最大长度
+MAX_LOGGED_BODY = 1000
+
+# 请求线程中保留的请求体字节数：UTF-8 每个字符最多4个字节，多保留3个字节保证截断处的字符完整
+MAX_CAPTURED_BODY_BYTES = MAX_LOGGED_BODY * 4 + 3
+
+# 进程退出时等待后台线程写完当前批次的最长时间（秒）
+SHUTDOWN_TIMEOUT = 10
+
+# 通知后台线程退出的队列标记
+_STOP = object()
+
+
+def get_client_ip(meta):
+    """根据请求的 META 获取客户端IP地址"""
+    x_forwarded_for = meta.get('HTTP_X_FORWARDED_FOR')
+    if x_forwarded_for:
+        ip = x_forwarded_for.split(',')[0]
+    else:
+        ip = meta.get('REMOTE_ADDR')
+    return ip
+
+
+# 一次命中的原始数据，请求头和请求体在后台线程中再格式化
+CapturedUsage = namedtuple(
+    'CapturedUsage', ['mock_api_id', 'meta', 'body', 'body_truncated', 'path', 'method', 'status_code']
+)
+
+
+def capture_usage(mock_api_id, request, path, method, status_code):
+    """在请求线程中保存生成使用日志需要的数据，只浅复制 request.META，不遍历请求头"""
+    body = request.body
+    return CapturedUsage(
+        mock_api_id, request.META.copy(), body[:MAX_CAPTURED_BODY_BYTES], len(body) > MAX_CAPTURED_BODY_BYTES,
+        path, method, status_code
+    )
+
+
+def build_usage_log(captured):
+    """根据命中时保存的数据生成（尚未保存的）使用日志"""
+    from .models import MockAPIUsageLog
+
+    request_headers = {}
+    for header, value in captured.meta.items():
+        if header.startswith('HTTP_'):
+            header_name = header[5:].replace('_', '-').title()
+            if header_name.lower() not in SENSITIVE_HEADERS:
+                request_headers[header_name] = value
+
+    try:
+        # 请求体被截断时末尾可能是不完整的字符，不作为解码错误
+        request_body = codecs.getincrementaldecoder('utf-8')().decode(
+            captured.body, final=not captured.body_truncated
+        )
+        if captured.body_truncated or len(request_body) > MAX_LOGGED_BODY:
+            request_body = request_body[:MAX_LOGGED_BODY] + '...[truncated]'
+    except UnicodeDecodeError:
+        request_body = '[Binary data]'
+
+    return MockAPIUsageLog(
+        mock_api_id=captured.mock_api_id,
+        request_path=captured.path,
+        request_method=captured.method,
+        request_headers=request_headers,
+        request_body=request_body,
+        response_status_code=captured.status_code,
+        client_ip=get_client_ip(captured.meta),
+        user_agent=captured.meta.get('HTTP_USER_AGENT', '')
+    )
+
+
+class UsageLogWriter:
+    """
+    批量写入使用日志的后台写入器
+
+    命中数据进入有界队列，后台线程攒够 batch_size 条或距第一条超过 flush_interval 秒时
+    格式化请求头、请求体并 bulk_create 写入。
+    队列已满时丢弃新日志并计入 dropped，不阻塞请求。
+    """
+
+    def __init__(self, queue_size=None, batch_size=None, flush_interval=None):
+        self.batch_size = batch_size or getattr(settings, 'MOCK_USAGE_LOG_BATCH_SIZE', 500)
+        self.flush_interval = flush_interval if flush_interval is not None else getattr(
+            settings, 'MOCK_USAGE_LOG_FLUSH_INTERVAL', 1.0
+        )
+        self._queue = queue.Queue(maxsize=queue_size or getattr(settings, 'MOCK_USAGE_LOG_QUEUE_SIZE', 10000))
+        self._write_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._thread = None
+        self.stats = {'queued': 0, 'written': 0, 'dropped': 0, 'sampled_out': 0, 'failed': 0}
+
+    def start(self):
+        """启动后台写入线程，进程退出时写入队列中剩余的日志"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='mock-usage-log-writer', daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+        return self
+
+    def stop(self, timeout=SHUTDOWN_TIMEOUT):
+        """通知后台线程写完当前批次后退出，等待其结束后写入队列中剩余的日志"""
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            try:
+                # 队列已满时后台线程仍在消费，最多等待 timeout 秒
+                self._queue.put(_STOP, timeout=timeout)
+            except queue.Full:
+                pass
+            thread.join(timeout)
+            if thread.is_alive():
+                logger.warning(f'Mock使用日志写入线程未在 {timeout} 秒内结束，剩余 {self._queue.qsize()} 条日志未写入')
+                return
+        self.flush()
+
+    def _count(self, key, value=1):
+        with self._stats_lock:
+            self.stats[key] += value
+
+    def submit(self, captured):
+        """放入命中时保存的数据（CapturedUsage），队列已满时丢弃，返回是否已放入"""
+        try:
+            self._queue.put_nowait(captured)
+        except queue.Full:
+            self._count('dropped')
+            return False
+        self._count('queued')
+        return True
+
+    def record_sampled_out(self):
+        self._count('sampled_out')
+
+    def get_stats(self):
+        with self._stats_lock:
+            return {**self.stats, 'pending': self._queue.qsize()}
+
+    def flush(self):
+        """在当前线程写入队列中所有的日志"""
+        batch = []
+        while True:
+            try:
+                usage_log = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if usage_log is _STOP:
+                continue
+            batch.append(usage_log)
+            if len(batch) >= self.batch_size:
+                self._write(batch)
+                batch = []
+        self._write(batch)
+
+    def _run(self):
+        while True:
+            usage_log = self._queue.get()
+            if usage_log is _STOP:
+                return
+            batch = [usage_log]
+            stopping = False
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    usage_log = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                if usage_log is _STOP:
+                    stopping = True
+                    break
+                batch.append(usage_log)
+            self._write(batch)
+            if stopping:
+                return
+
+    def _write(self, batch):
+        if not batch:
+            return
+        from .models import MockAPI, MockAPIUsageLog
+
+        with self._write_lock:
+            try:
+                # 排队期间被删除的Mock对应的日志直接丢弃
+                existing = set(MockAPI.objects.filter(
+                    pk__in={captured.mock_api_id for captured in batch}
+                ).values_list('pk', flat=True))
+                rows = [build_usage_log(captured) for captured in batch if captured.mock_api_id in existing]
+                MockAPIUsageLog.objects.bulk_create(rows, batch_size=self.batch_size)
+                self._count('written', len(rows))
+                self._count('dropped', len(batch) - len(rows))
+            except Exception:
+                self._count('failed', len(batch))
+                logger.exception(f'写入Mock使用日志失败，丢弃 {len(batch)} 条')
+            finally:
+                if threading.current_thread() is self._thread:
+                    close_old_connections()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_usage_log_writer():
+    """当前进程的使用日志写入器（首次使用时启动后台线程）"""
+    global _writer
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = UsageLogWriter().start()
+    return _writer
+
+
+def record_usage(mock_api_id, request, path, method, status_code):
+    """
+    记录一次Mock命中
+
+    MOCK_USAGE_LOG_MODE 为 buffered（默认）时异步批量写入，immediate 时立即写入，off 时不记录；
+    buffered 模式下 MOCK_USAGE_LOG_SAMPLE_RATE 小于 1 时只记录该比例的请求。
+    """
+    mode = getattr(settings, 'MOCK_USAGE_LOG_MODE', 'buffered')
+    if mode == 'off':
+        return
+    if mode == 'immediate':
+        build_usage_log(capture_usage(mock_api_id, request, path, method, status_code)).save()
+        return
+    writer = get_usage_log_writer()
+    sample_rate = getattr(settings, 'MOCK_USAGE_LOG_SAMPLE_RATE', 1.0)
+    if sample_rate < 1 and random.random() >= sample_rate:
+        writer.record_sampled_out()
+        return
+    writer.submit(capture_usage(mock_api_id, request, path, method, status_code))
+
+
+async def arecord_usage(mock_api_id, request, path, method, status_code):
+    """异步视图中记录Mock命中，只有立即写入时才需要在线程中访问数据库"""
+    if getattr(settings, 'MOCK_USAGE_LOG_MODE', 'buffered') == 'immediate':
+        await sync_to_async(record_usage)(mock_api_id, request, path, method, status_code)
+    else:
+        record_usage(mock_api_id, request, path, method, status_code)
@@ -11,11 +11,14 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import filters
+import asyncio
 import json
 import time
 import logging
 
 from .models import MockAPI, MockAPIUsageLog
+from .routing import aget_route_table, get_route_table, normalize_path
+from .usage_log import arecord_usage, get_usage_log_writer, record_usage
 from .serializers import (
     MockAPIListSerializer, MockAPIDetailSerializer,
     MockAPICreateSerializer, MockAPIUpdateSerializer,
@@ -25,16 +28,6 @@ from .serializers import (
 logger = logging.getLogger(__name__)
 
 
-def get_client_ip(request):
-    """获取客户端IP地址"""
-    x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
-    if x_forwarded_for:
-        ip = x_forwarded_for.split(',')[0]
-    else:
-        ip = request.META.get('REMOTE_ADDR')
-    return ip
-
-
 @method_decorator(csrf_exempt, name='dispatch')
 class ServeMockAPIView(View):
     """核心Mock服务视图 - 处理所有Mock API请求"""
@@ -42,128 +35,91 @@ class ServeMockAPIView(View):
     def dispatch(self, request, full_path, *args, **kwargs):
         """处理所有HTTP方法的Mock请求"""
         try:
-            # 确保路径以/开头
-            if not full_path.startswith('/'):
-                full_path = '/' + full_path
-            
-            # 移除尾部斜杠(除非是根路径)
-            if full_path != '/' and full_path.endswith('/'):
-                full_path = full_path.rstrip('/')
-            
+            full_path = normalize_path(full_path)
             method = request.method.upper()
             
             logger.info(f"Mock request: {method} {full_path}")
             
-            # 查找匹配的Mock API
-            try:
-                mock_api = MockAPI.objects.get(
-                    path=full_path,
-                    method=method,
-                    is_active=True
-                )
-            except MockAPI.DoesNotExist:
-                # 记录未找到的请求
-                self._log_request(
-                    None, request, full_path, method, 404
-                )
-                
-                return JsonResponse({
-                    'error': 'Mock API not found',
-                    'message': f'No active mock found for {method} {full_path}',
-                    'available_mocks': self._get_available_mocks(),
-                    'suggestion': f'You can create a mock for {method} {full_path} in the Mock Server management page.'
-                }, status=404)
+            # 从内存中的路由树查找最具体的匹配Mock API（不查询数据库）
+            routes = get_route_table()
+            matched = routes.match(method, full_path)
+            if matched is None:
+                return self._not_found(routes, method, full_path)
             
-            # 模拟延迟
-            if mock_api.delay_ms > 0:
-                time.sleep(mock_api.delay_ms / 1000.0)
+            mock, params = matched
             
-            # 准备响应头
-            response_headers = mock_api.response_headers or {}
+            # 模拟延迟（固定延迟或按分布随机生成）以及注入的故障
+            plan = mock.plan(request)
+            if plan.delay > 0:
+                time.sleep(plan.delay)
             
-            # 如果没有指定Content-Type，自动推断
-            if 'Content-Type' not in response_headers:
-                response_headers['Content-Type'] = mock_api.get_content_type()
+            # 记录请求日志（放入队列后台批量写入）
+            record_usage(mock.id, request, full_path, method, mock.status_for(plan))
+            return self._respond(mock, params, plan, method, full_path)
             
-            # 创建响应
-            response = HttpResponse(
-                content=mock_api.response_body,
-                status=mock_api.response_status_code,
-                content_type=response_headers.get('Content-Type', 'text/plain')
-            )
-            
-            # 设置自定义响应头
-            for header, value in response_headers.items():
-                if header.lower() != 'content-type':
-                    response[header] = value
+        except Exception as e:
+            return self._server_error(e)
+    
+    def _not_found(self, routes, method, full_path):
+        return JsonResponse({
+            'error': 'Mock API not found',
+            'message': f'No active mock found for {method} {full_path}',
+            'available_mocks': routes.available,
+            'suggestion': f'You can create a mock for {method} {full_path} in the Mock Server management page.'
+        }, status=404)
+    
+    def _respond(self, mock, params, plan, method, full_path):
+        # 响应头、Content-Type和响应体在加载路由表时已生成，路径参数替换其中的 {{参数名}}
+        response = mock.build_response(params, plan, is_async=self.view_is_async)
+        logger.info(
+            f"Mock response: {response.status_code} for {method} {full_path}"
+            + (f" (fault: {plan.fault})" if plan.fault else "")
+        )
+        return response
+    
+    def _server_error(self, error):
+        logger.error(f"Error serving mock API: {str(error)}")
+        return JsonResponse({
+            'error': 'Internal server error',
+            'message': str(error)
+        }, status=500)
+
+
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncServeMockAPIView(ServeMockAPIView):
+    """
+    异步Mock服务视图
+
+    通过 ASGI 部署时使用（MOCK_SERVER_ASYNC=True），模拟延迟时只挂起协程、不占用线程，
+    单个进程可以同时保持大量延迟中的请求。
+    """
+    
+    view_is_async = True
+    
+    async def dispatch(self, request, full_path, *args, **kwargs):
+        """处理所有HTTP方法的Mock请求"""
+        try:
+            full_path = normalize_path(full_path)
+            method = request.method.upper()
             
-            # 记录请求日志
-            self._log_request(
-                mock_api, request, full_path, method, 
-                mock_api.response_status_code
-            )
+            logger.info(f"Mock request: {method} {full_path}")
             
-            logger.info(
-                f"Mock response: {mock_api.response_status_code} for {method} {full_path}"
-            )
+            routes = await aget_route_table()
+            matched = routes.match(method, full_path)
+            if matched is None:
+                return self._not_found(routes, method, full_path)
             
-            return response
+            mock, params = matched
             
-        except Exception as e:
-            logger.error(f"Error serving mock API: {str(e)}")
-            return JsonResponse({
-                'error': 'Internal server error',
-                'message': str(e)
-            }, status=500)
-    
-    def _log_request(self, mock_api, request, path, method, status_code):
-        """记录请求日志"""
-        try:
-            # 获取请求头(排除敏感信息)
-            request_headers = {}
-            for header, value in request.META.items():
-                if header.startswith('HTTP_'):
-                    header_name = header[5:].replace('_', '-').title()
-                    # 排除敏感信息
-                    if header_name.lower() not in ['authorization', 'cookie']:
-                        request_headers[header_name] = value
+            plan = mock.plan(request)
+            if plan.delay > 0:
+                await asyncio.sleep(plan.delay)
             
-            # 获取请求体
-            request_body = ''
-            if hasattr(request, 'body'):
-                try:
-                    request_body = request.body.decode('utf-8')
-                    # 限制日志长度
-                    if len(request_body) > 1000:
-                        request_body = request_body[:1000] + '...[truncated]'
-                except UnicodeDecodeError:
-                    request_body = '[Binary data]'
+            await arecord_usage(mock.id, request, full_path, method, mock.status_for(plan))
+            return self._respond(mock, params, plan, method, full_path)
             
-            MockAPIUsageLog.objects.create(
-                mock_api=mock_api,
-                request_path=path,
-                request_method=method,
-                request_headers=request_headers,
-                request_body=request_body,
-                response_status_code=status_code,
-                client_ip=get_client_ip(request),
-                user_agent=request.META.get('HTTP_USER_AGENT', '')
-            )
         except Exception as e:
-            logger.error(f"Error logging mock request: {str(e)}")
-    
-    def _get_available_mocks(self):
-        """获取可用的Mock API列表"""
-        try:
-            mocks = MockAPI.objects.filter(is_active=True).values(
-                'method', 'path', 'name'
-            )[:10]  # 限制返回数量
-            return [
-                f"{mock['method']} {mock['path']} ({mock['name']})"
-                for mock in mocks
-            ]
-        except Exception:
-            return []
+            return self._server_error(e)
 
 
 class MockAPIViewSet(viewsets.ModelViewSet):
@@ -253,7 +209,9 @@ class MockAPIViewSet(viewsets.ModelViewSet):
                 'requests_today': requests_today,
                 'most_used_mock': most_used_mock,
                 'method_distribution': method_distribution,
-                'status_code_distribution': status_code_distribution
+                'status_code_distribution': status_code_distribution,
+                # 当前进程的使用日志写入情况（采样跳过、队列已满丢弃等）
+                'usage_log': get_usage_log_writer().get_stats()
             }
             
             serializer = MockAPIStatsSerializer(stats_data)
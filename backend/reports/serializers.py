@@ -1,8 +1,18 @@
+from django.db.models import Count, Q
 from rest_framework import serializers
 from api_test.models import TestRun, ApiTestResult
 from testcases.serializers import TestPlanSerializer
 
 
+def percentile_summary(histogram, percents=(50, 90, 95, 99)):
+    """把响应时间分布转换为分位数字典，如 {'count': 10, 'p50': 12.3, ...}"""
+    summary = {'count': histogram.count}
+    for percent in percents:
+        value = histogram.percentile(percent)
+        summary[f"p{percent}".replace('.', '')] = round(value, 2) if value is not None else None
+    return summary
+
+
 class TestRunListSerializer(serializers.ModelSerializer):
     """测试执行记录列表序列化器"""
     duration_display = serializers.ReadOnlyField()
@@ -14,9 +24,11 @@ class TestRunListSerializer(serializers.ModelSerializer):
         model = TestRun
         fields = [
             'id', 'name', 'status', 'test_plan', 'test_plan_name',
+            'planned_cases', 'completed_cases',
             'total_tests', 'passed_tests', 'failed_tests', 'error_tests',
             'success_rate', 'start_time', 'end_time', 'duration_display',
-            'executed_by', 'executed_by_username', 'description'
+            'executed_by', 'executed_by_username', 'description',
+            'body_retention', 'body_bytes_saved'
         ]
 
 
@@ -28,12 +40,16 @@ class ApiTestResultDetailSerializer(serializers.ModelSerializer):
     api_name = serializers.CharField(source='test_case.api.name', read_only=True)
     response_headers_dict = serializers.JSONField(source='get_response_headers', read_only=True)
     assertion_results_list = serializers.JSONField(source='get_assertion_results', read_only=True)
+    response_body = serializers.CharField(source='get_response_body', read_only=True)
     
     class Meta:
         model = ApiTestResult
         fields = [
             'id', 'test_case', 'test_case_name', 'api_method', 'api_url', 'api_name',
-            'status', 'response_code', 'response_time', 'response_body', 
+            'status', 'response_code', 'response_time', 'assertion_time', 'response_body',
+            'response_size', 'response_hash', 'response_truncated',
+            'dns_time', 'connect_time', 'tls_time', 'wait_time', 'transfer_time',
+            'bytes_received', 'connection_reused',
             'response_headers_dict', 'error_message', 'assertion_results_list',
             'executed_at'
         ]
@@ -50,6 +66,7 @@ class TestRunDetailSerializer(serializers.ModelSerializer):
     
     # 统计数据
     avg_response_time = serializers.SerializerMethodField()
+    response_time_percentiles = serializers.SerializerMethodField()
     response_time_distribution = serializers.SerializerMethodField()
     status_distribution = serializers.SerializerMethodField()
     
@@ -57,46 +74,47 @@ class TestRunDetailSerializer(serializers.ModelSerializer):
         model = TestRun
         fields = [
             'id', 'name', 'status', 'test_plan', 'test_plan_detail',
+            'planned_cases', 'completed_cases',
             'total_tests', 'passed_tests', 'failed_tests', 'error_tests',
             'success_rate', 'start_time', 'end_time', 'duration_display',
             'is_running', 'executed_by', 'executed_by_username', 'description',
-            'results', 'avg_response_time', 'response_time_distribution',
-            'status_distribution'
+            'body_retention', 'body_retention_kb', 'body_bytes_saved',
+            'results', 'avg_response_time', 'response_time_percentiles',
+            'response_time_distribution', 'status_distribution'
         ]
     
+    def _latency_histogram(self, obj):
+        """本次执行的响应时间分布（同一次序列化中只合并一次）"""
+        cache = self.context.setdefault('_latency_histograms', {})
+        if obj.pk not in cache:
+            histogram = obj.get_latency_histogram()
+            if not histogram.count:
+                # 没有响应时间分布的历史记录，从测试结果构建
+                for response_time in obj.results.filter(
+                    response_time__isnull=False
+                ).values_list('response_time', flat=True):
+                    histogram.record(response_time)
+            cache[obj.pk] = histogram
+        return cache[obj.pk]
+
     def get_avg_response_time(self, obj):
         """计算平均响应时间"""
-        results = obj.results.filter(response_time__isnull=False)
-        if results.exists():
-            total_time = sum(result.response_time for result in results)
-            return round(total_time / results.count(), 2)
-        return 0
+        histogram = self._latency_histogram(obj)
+        return round(histogram.mean, 2) if histogram.count else 0
+
+    def get_response_time_percentiles(self, obj):
+        """响应时间分位数"""
+        return percentile_summary(self._latency_histogram(obj))
     
     def get_response_time_distribution(self, obj):
-        """响应时间分布统计"""
-        results = obj.results.filter(response_time__isnull=False)
-        distribution = {
-            '0-100ms': 0,
-            '100-500ms': 0,
-            '500-1000ms': 0,
-            '1000-3000ms': 0,
-            '3000ms+': 0
-        }
-        
-        for result in results:
-            time = result.response_time
-            if time <= 100:
-                distribution['0-100ms'] += 1
-            elif time <= 500:
-                distribution['100-500ms'] += 1
-            elif time <= 1000:
-                distribution['500-1000ms'] += 1
-            elif time <= 3000:
-                distribution['1000-3000ms'] += 1
-            else:
-                distribution['3000ms+'] += 1
-        
-        return distribution
+        """响应时间分布统计（按区间精确计数，一次聚合查询）"""
+        return obj.results.filter(response_time__isnull=False).aggregate(**{
+            '0-100ms': Count('id', filter=Q(response_time__lte=100)),
+            '100-500ms': Count('id', filter=Q(response_time__gt=100, response_time__lte=500)),
+            '500-1000ms': Count('id', filter=Q(response_time__gt=500, response_time__lte=1000)),
+            '1000-3000ms': Count('id', filter=Q(response_time__gt=1000, response_time__lte=3000)),
+            '3000ms+': Count('id', filter=Q(response_time__gt=3000)),
+        })
     
     def get_status_distribution(self, obj):
         """状态分布统计"""
@@ -1,10 +1,11 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from .views import TestRunViewSet
+from .views import TestRunViewSet, test_run_progress_stream
 
 router = DefaultRouter()
 router.register(r'test-runs', TestRunViewSet)
 
 urlpatterns = [
+    path('test-runs/<int:pk>/progress/stream/', test_run_progress_stream, name='test-run-progress-stream'),
     path('', include(router.urls)),
 ]
\ No newline at end of file
@@ -1,14 +1,26 @@
+import asyncio
+import json
+
 from django.shortcuts import render, get_object_or_404
-from django.http import HttpResponse
+from django.http import Http404, HttpResponse, StreamingHttpResponse
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
 from django.template.loader import render_to_string
 from django.db import models
+from django.db.models import Avg, Count, Prefetch, Sum
+from django.db.models.functions import TruncHour
+from django.utils import timezone
+from datetime import timedelta
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
-from api_test.models import TestRun, ApiTestResult
+from api_test.models import TestRun, ApiTestResult, ResponseTimeSketch
+from api_test.progress import FINAL_STATUSES, aget_published_progress
+from utils.histogram_utils import LatencyHistogram
 from .serializers import (
     TestRunListSerializer, TestRunDetailSerializer, 
-    TestRunCreateSerializer, ApiTestResultDetailSerializer
+    TestRunCreateSerializer, ApiTestResultDetailSerializer,
+    percentile_summary
 )
 
 
@@ -43,7 +55,13 @@ class TestRunViewSet(viewsets.ModelViewSet):
         if executed_by:
             queryset = queryset.filter(executed_by_id=executed_by)
         
-        return queryset.select_related('test_plan', 'executed_by').prefetch_related('results')
+        queryset = queryset.select_related('test_plan', 'executed_by')
+        if self.action in ('progress', 'statistics'):
+            # 进度和统计查询只需要执行记录本身，避免加载全部结果
+            return queryset
+        return queryset.prefetch_related(
+            Prefetch('results', queryset=ApiTestResult.objects.select_related(*ApiTestResult.BLOB_RELATIONS))
+        )
     
     @action(detail=True, methods=['post'])
     def complete(self, request, pk=None):
@@ -55,10 +73,18 @@ class TestRunViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        # 手动标记时结果可能不是通过执行写入的（手动补录、导入等），按结果重新统计计数
+        test_run.update_statistics()
         test_run.complete()
         serializer = self.get_serializer(test_run)
         return Response(serializer.data)
     
+    @action(detail=True, methods=['get'])
+    def progress(self, request, pk=None):
+        """获取测试执行进度（用于异步执行时轮询）"""
+        test_run = self.get_object()
+        return Response(test_run.get_progress())
+    
     @action(detail=True, methods=['post'])
     def mark_failed(self, request, pk=None):
         """标记测试执行失败"""
@@ -71,6 +97,7 @@ class TestRunViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        test_run.update_statistics()
         test_run.mark_failed(error_message)
         serializer = self.get_serializer(test_run)
         return Response(serializer.data)
@@ -83,7 +110,7 @@ class TestRunViewSet(viewsets.ModelViewSet):
         # 准备报告数据
         context = {
             'test_run': test_run,
-            'results': test_run.results.select_related('test_case__api').all(),
+            'results': test_run.results.select_related('test_case__api', *ApiTestResult.BLOB_RELATIONS).all(),
             'summary': {
                 'total_tests': test_run.total_tests,
                 'passed_tests': test_run.passed_tests,
@@ -108,66 +135,208 @@ class TestRunViewSet(viewsets.ModelViewSet):
         """获取测试执行统计信息"""
         test_run = self.get_object()
         results = test_run.results.all()
+        status_counts = {
+            'total': Count('id'),
+            'passed': Count('id', filter=models.Q(status='passed')),
+            'failed': Count('id', filter=models.Q(status='failed')),
+            'error': Count('id', filter=models.Q(status='error')),
+        }
+        # 分阶段耗时：只统计记录了分阶段耗时的结果（数据驱动汇总结果和旧数据没有）
+        timing_aggregates = {
+            f'avg_{field}': Avg(field) for field in ApiTestResult.TIMING_FIELDS
+        }
+        timing_aggregates.update({
+            'bytes_received': Sum('bytes_received'),
+            'new_connections': Count('id', filter=models.Q(connection_reused=False)),
+            'reused_connections': Count('id', filter=models.Q(connection_reused=True)),
+        })
         
-        # 按API分组统计
-        api_stats = {}
-        for result in results:
-            api_key = f"{result.test_case.api.method} {result.test_case.api.name}"
-            if api_key not in api_stats:
-                api_stats[api_key] = {
-                    'api_method': result.test_case.api.method,
-                    'api_name': result.test_case.api.name,
-                    'api_url': result.test_case.api.url,
-                    'total': 0,
-                    'passed': 0,
-                    'failed': 0,
-                    'error': 0,
-                    'avg_response_time': 0,
-                    'response_times': []
-                }
-            
-            api_stats[api_key]['total'] += 1
-            api_stats[api_key][result.status] += 1
-            if result.response_time:
-                api_stats[api_key]['response_times'].append(result.response_time)
-        
-        # 计算平均响应时间
-        for api_key in api_stats:
-            response_times = api_stats[api_key]['response_times']
-            if response_times:
-                api_stats[api_key]['avg_response_time'] = round(
-                    sum(response_times) / len(response_times), 2
-                )
-            del api_stats[api_key]['response_times']  # 删除原始数据
+        # 按API分组统计：计数由数据库聚合，响应时间分位数来自执行过程中记录的分布
+        histograms = {
+            sketch.api_id: sketch.get_histogram() for sketch in test_run.response_time_sketches.all()
+        }
+        api_rows = results.values(
+            'test_case__api_id', 'test_case__api__method', 'test_case__api__name', 'test_case__api__url'
+        ).annotate(
+            avg_time=Avg('response_time'), **status_counts, **timing_aggregates
+        ).order_by('test_case__api__method', 'test_case__api__name')
         
-        # 时间趋势分析（按小时统计）
-        from django.db.models import Count
-        from django.db.models.functions import TruncHour
+        api_stats = []
+        for row in api_rows:
+            histogram = histograms.get(row['test_case__api_id'], LatencyHistogram())
+            api_stats.append({
+                'api_id': row['test_case__api_id'],
+                'api_method': row['test_case__api__method'],
+                'api_name': row['test_case__api__name'],
+                'api_url': row['test_case__api__url'],
+                'total': row['total'],
+                'passed': row['passed'],
+                'failed': row['failed'],
+                'error': row['error'],
+                'avg_response_time': round(row['avg_time'], 2) if row['avg_time'] is not None else 0,
+                'response_time_percentiles': percentile_summary(histogram),
+                'timing': self._timing_summary(row),
+            })
         
+        # 时间趋势分析（按小时统计）
         hourly_stats = results.annotate(
             hour=TruncHour('executed_at')
-        ).values('hour').annotate(
-            total=Count('id'),
-            passed=Count('id', filter=models.Q(status='passed')),
-            failed=Count('id', filter=models.Q(status='failed')),
-            error=Count('id', filter=models.Q(status='error'))
-        ).order_by('hour')
+        ).values('hour').annotate(**status_counts).order_by('hour')
         
+        overall = LatencyHistogram.merge_all(histograms.values())
         return Response({
-            'api_statistics': list(api_stats.values()),
+            'api_statistics': api_stats,
             'hourly_trends': list(hourly_stats),
             'summary': {
                 'total_apis': len(api_stats),
                 'total_tests': test_run.total_tests,
                 'passed_rate': test_run.success_rate,
-                'avg_response_time': self._calculate_avg_response_time(results),
+                'avg_response_time': (
+                    round(overall.mean, 2) if overall.count else self._calculate_avg_response_time(results)
+                ),
+                'response_time_percentiles': percentile_summary(overall),
+                'timing': self._timing_summary(results.aggregate(**timing_aggregates)),
                 'duration': test_run.duration_display
             }
         })
     
+    @staticmethod
+    def _timing_summary(row):
+        """整理分阶段耗时的聚合结果：各阶段平均耗时(ms)、接收字节数和连接复用情况"""
+        summary = {}
+        for field in ApiTestResult.TIMING_FIELDS:
+            value = row[f'avg_{field}']
+            summary[field] = round(value, 2) if value is not None else None
+        summary['bytes_received'] = row['bytes_received'] or 0
+        summary['new_connections'] = row['new_connections']
+        summary['reused_connections'] = row['reused_connections']
+        return summary
+    
+    @action(detail=False, methods=['get'])
+    def latency_percentiles(self, request):
+        """
+        跨多次执行的响应时间分位数
+
+        合并所选执行记录中各接口的响应时间分布，支持 test_plan、status、executed_by
+        以及 run_ids（逗号分隔）、api_id、days（最近N天）筛选。
+        """
+        test_runs = TestRun.objects.all()
+        for param, lookup in (('test_plan', 'test_plan_id'), ('status', 'status'), ('executed_by', 'executed_by_id')):
+            value = request.query_params.get(param)
+            if value:
+                test_runs = test_runs.filter(**{lookup: value})
+        try:
+            run_ids = request.query_params.get('run_ids')
+            if run_ids:
+                test_runs = test_runs.filter(id__in=[int(run_id) for run_id in run_ids.split(',') if run_id])
+            days = request.query_params.get('days')
+            if days:
+                test_runs = test_runs.filter(start_time__gte=timezone.now() - timedelta(days=int(days)))
+        except ValueError:
+            return Response({'error': 'run_ids 和 days 必须是整数'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        sketches = ResponseTimeSketch.objects.filter(test_run__in=test_runs).select_related('api')
+        api_id = request.query_params.get('api_id')
+        if api_id:
+            sketches = sketches.filter(api_id=api_id)
+        
+        overall = LatencyHistogram()
+        by_api = {}
+        run_ids = set()
+        for sketch in sketches:
+            histogram = sketch.get_histogram()
+            overall.merge(histogram)
+            run_ids.add(sketch.test_run_id)
+            entry = by_api.get(sketch.api_id)
+            if entry is None:
+                entry = by_api[sketch.api_id] = {
+                    'api': sketch.api, 'histogram': LatencyHistogram(), 'runs': 0
+                }
+            entry['histogram'].merge(histogram)
+            entry['runs'] += 1
+        
+        return Response({
+            'runs': len(run_ids),
+            'summary': percentile_summary(overall),
+            'apis': [
+                {
+                    'api_id': api_id,
+                    'api_method': entry['api'].method,
+                    'api_name': entry['api'].name,
+                    'runs': entry['runs'],
+                    'avg_response_time': round(entry['histogram'].mean, 2),
+                    **percentile_summary(entry['histogram']),
+                }
+                for api_id, entry in sorted(by_api.items())
+            ]
+        })
+    
     def _calculate_avg_response_time(self, results):
         """计算平均响应时间"""
-        response_times = [r.response_time for r in results if r.response_time is not None]
-        if response_times:
-            return round(sum(response_times) / len(response_times), 2)
-        return 0
\ No newline at end of file
+        avg_time = results.filter(response_time__isnull=False).aggregate(avg_time=Avg('response_time'))['avg_time']
+        return round(avg_time, 2) if avg_time is not None else 0
+
+
+def _sse_event(event, data, event_id=None):
+    lines = [f'event: {event}']
+    if event_id is not None:
+        lines.append(f'id: {event_id}')
+    lines.append('data: ' + json.dumps(data, cls=DjangoJSONEncoder, ensure_ascii=False))
+    return '\n'.join(lines) + '\n\n'
+
+
+async def _progress_events(test_run):
+    """
+    执行进度事件流
+
+    轮询缓存中发布的进度快照，有变化时推送 progress 事件，执行结束后推送 end 事件并关闭；
+    缓存中没有进度时（执行 worker 与 Web 服务没有共享缓存）低频读取数据库。
+    """
+    loop = asyncio.get_running_loop()
+    interval = getattr(settings, 'API_TEST_PROGRESS_STREAM_INTERVAL', 0.5)
+    fallback_interval = getattr(settings, 'API_TEST_PROGRESS_DB_FALLBACK_INTERVAL', 5)
+    heartbeat_interval = getattr(settings, 'API_TEST_PROGRESS_HEARTBEAT_INTERVAL', 15)
+    deadline = loop.time() + getattr(settings, 'API_TEST_PROGRESS_STREAM_TIMEOUT', 3600)
+
+    progress = test_run.get_progress()
+    last_version = None
+    last_sent = last_db_read = loop.time()
+    yield _sse_event('progress', progress)
+    while progress['status'] not in FINAL_STATUSES and loop.time() < deadline:
+        await asyncio.sleep(interval)
+        now = loop.time()
+        changed = False
+        published = await aget_published_progress(test_run.pk)
+        if published is not None:
+            if published['version'] != last_version:
+                progress, last_version, changed = published, published['version'], True
+        elif now - last_db_read >= fallback_interval:
+            last_db_read = now
+            await test_run.arefresh_from_db()
+            progress, changed = test_run.get_progress(), True
+        if changed:
+            last_sent = now
+            yield _sse_event('progress', progress, last_version)
+        elif now - last_sent >= heartbeat_interval:
+            last_sent = now
+            yield ': keep-alive\n\n'
+    if progress['status'] in FINAL_STATUSES:
+        yield _sse_event('end', {'id': test_run.pk, 'status': progress['status']})
+
+
+async def test_run_progress_stream(request, pk):
+    """
+    以 Server-Sent Events 推送测试执行进度
+
+    浏览器可以直接使用 EventSource 订阅，代替轮询 progress 接口。
+    需要通过 ASGI（test_platform.asgi）部署，每个订阅只占用一个协程。
+    """
+    try:
+        test_run = await TestRun.objects.aget(pk=pk)
+    except TestRun.DoesNotExist:
+        raise Http404('测试执行记录不存在')
+    response = StreamingHttpResponse(_progress_events(test_run), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    # 禁止 Nginx 缓冲事件流
+    response['X-Accel-Buffering'] = 'no'
+    return response
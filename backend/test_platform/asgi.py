@@ -3,6 +3,11 @@ ASGI config for test_platform project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+测试执行进度推送（/api/reports/test-runs/<id>/progress/stream/）是长连接，
+需要通过 ASGI 服务器部署才能在单个进程中同时保持大量订阅，例如：
+    gunicorn test_platform.asgi:application -k uvicorn.workers.UvicornWorker
+同时设置 MOCK_SERVER_ASYNC=True 后，Mock服务的模拟延迟也不再占用线程。
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -104,6 +104,11 @@ else:
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
             'NAME': BASE_DIR / os.getenv('DATABASE_NAME', 'db.sqlite3'),
+            # 测试数据库使用文件：并发执行的测试中多个线程同时读写数据库，
+            # 共享缓存的内存数据库遇到表锁时会立即报错而不是等待
+            'TEST': {
+                'NAME': BASE_DIR / os.getenv('TEST_DATABASE_NAME', 'test_db.sqlite3'),
+            },
         }
     }
 
@@ -152,6 +157,58 @@ MEDIA_ROOT = BASE_DIR / os.getenv('MEDIA_ROOT', 'media')
 # File upload settings
 FILE_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv('FILE_UPLOAD_MAX_MEMORY_SIZE', '10485760'))  # 10MB
 DATA_UPLOAD_MAX_MEMORY_SIZE = int(os.getenv('DATA_UPLOAD_MAX_MEMORY_SIZE', '10485760'))  # 10MB
+TEST_DATA_FILE_MAX_SIZE = int(os.getenv('TEST_DATA_FILE_MAX_SIZE', '104857600'))  # 测试数据文件大小上限，100MB
+
+# API测试执行配置
+API_TEST_DEFAULT_CONCURRENCY = int(os.getenv('API_TEST_DEFAULT_CONCURRENCY', '1'))  # 默认串行执行
+API_TEST_MAX_CONCURRENCY = int(os.getenv('API_TEST_MAX_CONCURRENCY', '32'))  # 单次执行允许的最大并发数
+API_TEST_LOAD_MAX_CONCURRENCY = int(os.getenv('API_TEST_LOAD_MAX_CONCURRENCY', '200'))  # 压测允许的最大并发数
+API_TEST_LOAD_MAX_DURATION = int(os.getenv('API_TEST_LOAD_MAX_DURATION', '3600'))  # 压测允许的最长持续时间（秒）
+API_TEST_HTTP_POOL_MAXSIZE = int(os.getenv('API_TEST_HTTP_POOL_MAXSIZE', '32'))  # 每个目标主机保持的最大连接数
+API_TEST_HTTP_KEEP_ALIVE = os.getenv('API_TEST_HTTP_KEEP_ALIVE', 'True').lower() == 'true'
+API_TEST_HTTP_STALE_RETRIES = int(os.getenv('API_TEST_HTTP_STALE_RETRIES', '1'))  # 复用连接失效时的重试次数
+API_TEST_CONNECT_TIMEOUT = float(os.getenv('API_TEST_CONNECT_TIMEOUT', '10'))  # 建立连接的超时时间（秒）
+API_TEST_REQUEST_TIMEOUT = float(os.getenv('API_TEST_REQUEST_TIMEOUT', '30'))  # 等待响应的超时时间（秒）
+API_TEST_CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('API_TEST_CIRCUIT_FAILURE_THRESHOLD', '5'))  # 连续失败多少次后熔断目标主机
+API_TEST_CIRCUIT_RECOVERY_TIMEOUT = float(os.getenv('API_TEST_CIRCUIT_RECOVERY_TIMEOUT', '30'))  # 熔断后多久重新探测（秒）
+API_TEST_RETRY_MAX = int(os.getenv('API_TEST_RETRY_MAX', '2'))  # 连接失败或超时时单个请求的最大重试次数
+API_TEST_RETRY_BUDGET_RATIO = float(os.getenv('API_TEST_RETRY_BUDGET_RATIO', '0.1'))  # 重试次数占请求数的比例上限
+API_TEST_RETRY_BUDGET_MIN = int(os.getenv('API_TEST_RETRY_BUDGET_MIN', '10'))  # 每次执行额外允许的重试次数
+API_TEST_RETRY_BACKOFF_BASE = float(os.getenv('API_TEST_RETRY_BACKOFF_BASE', '0.2'))  # 重试退避的初始时间（秒）
+API_TEST_RETRY_BACKOFF_MAX = float(os.getenv('API_TEST_RETRY_BACKOFF_MAX', '5'))  # 重试退避的最长时间（秒）
+API_TEST_RESULT_WRITE_MODE = os.getenv('API_TEST_RESULT_WRITE_MODE', 'buffered')  # buffered / immediate
+API_TEST_RESULT_BATCH_SIZE = int(os.getenv('API_TEST_RESULT_BATCH_SIZE', '200'))  # 批量写入的结果条数阈值
+API_TEST_RESULT_FLUSH_INTERVAL = float(os.getenv('API_TEST_RESULT_FLUSH_INTERVAL', '2'))  # 批量写入的时间阈值（秒）
+API_TEST_DATA_CONCURRENCY = int(os.getenv('API_TEST_DATA_CONCURRENCY', '1'))  # 数据驱动测试的默认分片并发数
+API_TEST_DATA_SHARD_SIZE = int(os.getenv('API_TEST_DATA_SHARD_SIZE', '100'))  # 每个分片包含的数据行数
+API_TEST_RESPONSE_CAPTURE_LIMIT = int(os.getenv('API_TEST_RESPONSE_CAPTURE_LIMIT', '1048576'))  # 保存的响应体上限，1MB
+API_TEST_BLOB_COMPRESSION = os.getenv('API_TEST_BLOB_COMPRESSION', 'zlib')  # 结果内容压缩算法：zlib / zstd / none
+API_TEST_BODY_RETENTION = os.getenv('API_TEST_BODY_RETENTION', 'full')  # 响应体保留策略：full / failures_only / truncate_passed
+API_TEST_BODY_RETENTION_KB = int(os.getenv('API_TEST_BODY_RETENTION_KB', '4'))  # truncate_passed 策略下通过结果保留的大小(KB)
+API_TEST_DATA_RESULT_SAMPLE_SIZE = int(os.getenv('API_TEST_DATA_RESULT_SAMPLE_SIZE', '100'))  # 汇总结果中保留的失败行样本数
+
+# 缓存配置：多进程部署（如多个gunicorn worker）时应使用Redis等共享缓存，
+# 环境变量缓存的版本号保存在缓存中，本地内存缓存无法在进程间同步失效
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+ENVIRONMENT_VARIABLE_CACHE_TIMEOUT = int(os.getenv('ENVIRONMENT_VARIABLE_CACHE_TIMEOUT', '3600'))  # 环境变量缓存过期时间（秒）
+# 执行进度通过缓存发布，执行worker与Web服务分属不同进程时同样需要共享缓存
+API_TEST_PROGRESS_PUBLISH_INTERVAL = float(os.getenv('API_TEST_PROGRESS_PUBLISH_INTERVAL', '0.5'))  # 执行中发布进度的最短间隔（秒）
+API_TEST_PROGRESS_STREAM_INTERVAL = float(os.getenv('API_TEST_PROGRESS_STREAM_INTERVAL', '0.5'))  # 进度推送检查更新的间隔（秒）
+API_TEST_PROGRESS_STREAM_TIMEOUT = int(os.getenv('API_TEST_PROGRESS_STREAM_TIMEOUT', '3600'))  # 单个进度推送连接的最长时间（秒），超时后客户端自动重连
+API_TEST_PROGRESS_DB_FALLBACK_INTERVAL = float(os.getenv('API_TEST_PROGRESS_DB_FALLBACK_INTERVAL', '5'))  # 缓存中没有进度时进度推送读取数据库的间隔（秒）
+API_TEST_PROGRESS_HEARTBEAT_INTERVAL = float(os.getenv('API_TEST_PROGRESS_HEARTBEAT_INTERVAL', '15'))  # 进度没有变化时推送心跳注释的间隔（秒），防止代理断开空闲连接
+MOCK_ROUTE_VERSION_CHECK_INTERVAL = float(os.getenv('MOCK_ROUTE_VERSION_CHECK_INTERVAL', '1'))  # Mock路由表检查共享版本号的间隔（秒），其他进程的修改最多延迟该时间生效
+MOCK_SERVER_ASYNC = os.getenv('MOCK_SERVER_ASYNC', 'False').lower() == 'true'  # 通过ASGI部署时启用异步Mock视图
+MOCK_USAGE_LOG_MODE = os.getenv('MOCK_USAGE_LOG_MODE', 'buffered')  # Mock使用日志写入方式：buffered / immediate / off
+MOCK_USAGE_LOG_SAMPLE_RATE = float(os.getenv('MOCK_USAGE_LOG_SAMPLE_RATE', '1'))  # 记录使用日志的请求比例（0~1）
+MOCK_USAGE_LOG_QUEUE_SIZE = int(os.getenv('MOCK_USAGE_LOG_QUEUE_SIZE', '10000'))  # 等待写入的日志上限，超出时丢弃
+MOCK_USAGE_LOG_BATCH_SIZE = int(os.getenv('MOCK_USAGE_LOG_BATCH_SIZE', '500'))  # 批量写入的日志条数
+MOCK_USAGE_LOG_FLUSH_INTERVAL = float(os.getenv('MOCK_USAGE_LOG_FLUSH_INTERVAL', '1'))  # 批量写入的时间阈值（秒）
 
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
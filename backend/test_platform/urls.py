@@ -14,9 +14,13 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path, include, re_path
-from mock_server.views import ServeMockAPIView
+from mock_server.views import AsyncServeMockAPIView, ServeMockAPIView
+
+# 通过 ASGI 部署时使用异步Mock视图，模拟延迟不占用线程
+serve_mock_view = AsyncServeMockAPIView if settings.MOCK_SERVER_ASYNC else ServeMockAPIView
 
 urlpatterns = [
     path('admin/', admin.site.urls),
@@ -30,5 +34,5 @@ urlpatterns = [
     path('api/environments/', include('environments.urls')),  # 新增环境管理API
     path('', include('mock_server.urls')),
     # Mock Server核心服务 - 必须放在最后，因为它会捕获所有/mock/路径
-    re_path(r'^mock/(?P<full_path>.*)$', ServeMockAPIView.as_view(), name='serve_mock_api'),
+    re_path(r'^mock/(?P<full_path>.*)$', serve_mock_view.as_view(), name='serve_mock_api'),
 ]
@@ -0,0 +1,41 @@
+"""
+数据文件元数据回填
+
+为升级前上传、尚未保存元数据的数据文件计算大小、哈希、编码、表头、行数和预览数据：
+
+    python manage.py refresh_data_file_metadata
+    python manage.py refresh_data_file_metadata --all
+"""
+from django.core.management.base import BaseCommand
+
+from testcases.models import TestDataFile
+
+
+class Command(BaseCommand):
+    help = '为已有的数据文件计算并保存元数据'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all', action='store_true',
+            help='重新计算所有数据文件的元数据（默认只处理尚未计算的文件）'
+        )
+
+    def handle(self, *args, **options):
+        data_files = TestDataFile.objects.exclude(file='').order_by('id')
+        if not options['all']:
+            data_files = data_files.filter(content_hash='')
+
+        refreshed = 0
+        skipped = 0
+        for data_file in data_files.iterator():
+            try:
+                data_file.refresh_metadata()
+            except (ValueError, OSError) as e:
+                # 文件缺失或无法解析时保留空的元数据，读取时回退为解析文件
+                skipped += 1
+                self.stdout.write(self.style.WARNING(f'跳过数据文件 #{data_file.id} {data_file.name}: {e}'))
+                continue
+            data_file.save(update_fields=TestDataFile.METADATA_FIELDS)
+            refreshed += 1
+
+        self.stdout.write(self.style.SUCCESS(f'回填完成: {refreshed} 个数据文件，跳过 {skipped} 个'))
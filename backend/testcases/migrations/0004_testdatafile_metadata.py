@@ -0,0 +1,43 @@
+# Generated by Django 4.2.11 on 2026-10-16 22:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testcases', '0003_testdatafile'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testdatafile',
+            name='content_hash',
+            field=models.CharField(blank=True, max_length=64, verbose_name='内容哈希'),
+        ),
+        migrations.AddField(
+            model_name='testdatafile',
+            name='encoding',
+            field=models.CharField(blank=True, max_length=20, verbose_name='文件编码'),
+        ),
+        migrations.AddField(
+            model_name='testdatafile',
+            name='file_size',
+            field=models.BigIntegerField(default=0, verbose_name='文件大小'),
+        ),
+        migrations.AddField(
+            model_name='testdatafile',
+            name='headers',
+            field=models.JSONField(blank=True, default=list, verbose_name='表头'),
+        ),
+        migrations.AddField(
+            model_name='testdatafile',
+            name='preview',
+            field=models.JSONField(blank=True, default=list, verbose_name='预览数据'),
+        ),
+        migrations.AddField(
+            model_name='testdatafile',
+            name='row_count',
+            field=models.IntegerField(default=0, verbose_name='数据行数'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.11 on 2026-10-16 23:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('testcases', '0004_testdatafile_metadata'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='testplan',
+            name='body_retention',
+            field=models.CharField(blank=True, choices=[('full', '保留全部响应体'), ('failures_only', '只保留失败/错误结果的响应体'), ('truncate_passed', '通过的结果只保留前N KB')], default='', help_text='为空时使用系统默认配置 API_TEST_BODY_RETENTION', max_length=20, verbose_name='响应体保留策略'),
+        ),
+        migrations.AddField(
+            model_name='testplan',
+            name='body_retention_kb',
+            field=models.PositiveIntegerField(blank=True, help_text='保留策略为“通过的结果只保留前N KB”时生效，为空时使用系统默认配置', null=True, verbose_name='通过结果保留大小(KB)'),
+        ),
+    ]
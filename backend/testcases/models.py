@@ -2,10 +2,31 @@ from django.db import models
 from django.conf import settings
 from mptt.models import MPTTModel, TreeForeignKey
 import reversion
+import codecs
 import csv
+import hashlib
+import itertools
 import json
+import logging
 import os
 
+logger = logging.getLogger(__name__)
+
+# 流式读取数据文件时每次读取的字节数
+DATA_FILE_CHUNK_SIZE = 64 * 1024
+# 上传时保存的预览数据行数（预览接口最多返回50行）
+DATA_FILE_PREVIEW_ROWS = 50
+# CSV文件依次尝试的编码
+CSV_ENCODINGS = ['utf-8', 'gbk', 'gb2312']
+# JSON解析错误位于缓冲区末尾这么多个字符以内时视为元素被数据块截断（最长的被截断记号是 -Infinity）
+JSON_TRUNCATED_TAIL = 10
+
+
+def get_data_file_max_size():
+    """数据文件大小上限（字节），由 TEST_DATA_FILE_MAX_SIZE 配置"""
+    return getattr(settings, 'TEST_DATA_FILE_MAX_SIZE', 100 * 1024 * 1024)
+
+
 @reversion.register()
 class TestCase(MPTTModel):
     title = models.CharField(max_length=200, unique=True)
@@ -43,6 +64,14 @@ class TestCase(MPTTModel):
     def __str__(self):
         return self.title
 
+# 测试结果响应体保留策略（测试计划和测试执行记录共用）
+BODY_RETENTION_CHOICES = [
+    ('full', '保留全部响应体'),
+    ('failures_only', '只保留失败/错误结果的响应体'),
+    ('truncate_passed', '通过的结果只保留前N KB'),
+]
+
+
 class TestPlan(models.Model):
     name = models.CharField(max_length=200)
     test_cases = models.ManyToManyField(TestCase, related_name='plans', blank=True)
@@ -55,6 +84,14 @@ class TestPlan(models.Model):
         ('completed', '已完成'),
     ]
     status = models.CharField(max_length=10, choices=STATUS_CHOICES, default='pending')
+    body_retention = models.CharField(
+        max_length=20, choices=BODY_RETENTION_CHOICES, blank=True, default='',
+        verbose_name='响应体保留策略', help_text='为空时使用系统默认配置 API_TEST_BODY_RETENTION'
+    )
+    body_retention_kb = models.PositiveIntegerField(
+        null=True, blank=True, verbose_name='通过结果保留大小(KB)',
+        help_text='保留策略为“通过的结果只保留前N KB”时生效，为空时使用系统默认配置'
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -90,9 +127,18 @@ class TestDataFile(models.Model):
         verbose_name='文件类型'
     )
     description = models.TextField(blank=True, verbose_name='文件描述')
+    # 文件元数据，在文件上传或更换时计算一次，读取时不再解析文件
+    file_size = models.BigIntegerField(default=0, verbose_name='文件大小')
+    row_count = models.IntegerField(default=0, verbose_name='数据行数')
+    headers = models.JSONField(default=list, blank=True, verbose_name='表头')
+    encoding = models.CharField(max_length=20, blank=True, verbose_name='文件编码')
+    content_hash = models.CharField(max_length=64, blank=True, verbose_name='内容哈希')
+    preview = models.JSONField(default=list, blank=True, verbose_name='预览数据')
     created_at = models.DateTimeField(auto_now_add=True, verbose_name='创建时间')
     updated_at = models.DateTimeField(auto_now=True, verbose_name='更新时间')
 
+    METADATA_FIELDS = ['file_size', 'row_count', 'headers', 'encoding', 'content_hash', 'preview']
+
     class Meta:
         verbose_name = '测试数据文件'
         verbose_name_plural = '测试数据文件'
@@ -100,8 +146,72 @@ class TestDataFile(models.Model):
     def __str__(self):
         return f"{self.name} ({self.file_type.upper()})"
 
+    def save(self, *args, **kwargs):
+        # 新上传的文件尚未写入存储，此时计算元数据；文件未变化时不重新解析
+        if self.file and not self.file._committed:
+            try:
+                self.refresh_metadata()
+            except ValueError as e:
+                # 上传接口在校验时已经拒绝无法解析的文件，这里只保存空的元数据，读取时解析并报告错误
+                logger.warning(f'数据文件 {self.name} 解析失败，未保存元数据: {e}')
+                self.clear_metadata()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = set(update_fields) | set(self.METADATA_FIELDS)
+        super().save(*args, **kwargs)
+
+    def refresh_metadata(self):
+        """
+        重新计算文件元数据（大小、哈希、编码、表头、行数和预览数据）
+
+        同一个上传文件只解析一次，上传接口校验时计算的结果在保存时直接使用。解析失败时抛出 ValueError。
+        """
+        if not self.file:
+            self.clear_metadata()
+            return
+
+        uploaded = None if self.file._committed else self.file.file
+        cached = getattr(uploaded, '_data_file_metadata', None)
+        if cached is not None and cached[0] == self.file_type:
+            for field, value in cached[1].items():
+                setattr(self, field, value)
+            return
+
+        hasher = hashlib.sha256()
+        file_size = 0
+        for chunk in self._iter_chunks():
+            hasher.update(chunk)
+            file_size += len(chunk)
+
+        # 先检测编码，后续解析直接使用检测结果
+        self.encoding = self._detect_encoding()
+        headers, rows = self.open_rows()
+        preview = []
+        row_count = 0
+        for row in rows:
+            if row_count < DATA_FILE_PREVIEW_ROWS:
+                preview.append(row)
+            row_count += 1
+
+        self.file_size = file_size
+        self.content_hash = hasher.hexdigest()
+        self.headers = headers
+        self.row_count = row_count
+        self.preview = preview
+        if uploaded is not None:
+            uploaded._data_file_metadata = (
+                self.file_type, {field: getattr(self, field) for field in self.METADATA_FIELDS}
+            )
+
+    def clear_metadata(self):
+        self.file_size = self.row_count = 0
+        self.headers, self.preview = [], []
+        self.encoding = self.content_hash = ''
+
     def get_file_size(self):
         """获取文件大小（字节）"""
+        if self.content_hash:
+            return self.file_size
         try:
             return self.file.size
         except (ValueError, OSError):
@@ -127,109 +237,251 @@ class TestDataFile(models.Model):
         Returns:
             dict: 包含headers和rows的字典
         """
-        if not self.file:
-            return {'headers': [], 'rows': []}
-
         try:
-            if self.file_type == 'csv':
-                return self._parse_csv(max_rows)
-            elif self.file_type == 'json':
-                return self._parse_json(max_rows)
-            else:
-                raise ValueError(f"不支持的文件类型: {self.file_type}")
+            headers, rows = self.open_rows(max_rows)
+            return {'headers': headers, 'rows': list(rows)}
         except Exception as e:
             raise ValueError(f"文件解析失败: {str(e)}")
 
-    def _parse_csv(self, max_rows=None):
-        """解析CSV文件"""
-        headers = []
-        rows = []
-        
-        self.file.seek(0)  # 重置文件指针
-        
-        # 尝试不同的编码
-        content = None
-        for encoding in ['utf-8', 'gbk', 'gb2312', 'utf-8-sig']:
+    def open_rows(self, max_rows=None):
+        """
+        以流式方式读取文件内容
+
+        文件按块读取，数据行在迭代时才解析，内存占用与文件大小无关。
+
+        Args:
+            max_rows: 最大读取行数
+
+        Returns:
+            tuple: (headers, rows)，rows 为惰性生成的数据行迭代器，每行与表头对齐
+        """
+        if not self.file:
+            return [], iter(())
+
+        if self.file_type == 'csv':
+            headers, rows = self._open_csv_rows()
+        elif self.file_type == 'json':
+            headers, rows = self._open_json_rows()
+        else:
+            raise ValueError(f"不支持的文件类型: {self.file_type}")
+
+        if max_rows:
+            rows = itertools.islice(rows, max_rows)
+        return headers, rows
+
+    def iter_rows(self, max_rows=None):
+        """逐行迭代数据（不含表头）"""
+        _, rows = self.open_rows(max_rows)
+        yield from rows
+
+    def _iter_chunks(self):
+        """按块读取文件的原始字节"""
+        # 上传过程中的文件由调用方管理，只关闭这里打开的文件
+        should_close = self.file.closed
+        self.file.open('rb')
+        try:
+            while True:
+                chunk = self.file.read(DATA_FILE_CHUNK_SIZE)
+                if not chunk:
+                    return
+                yield chunk
+        finally:
+            if should_close:
+                self.file.close()
+
+    def _detect_encoding(self):
+        """
+        检测文件编码，无法识别时抛出 ValueError
+
+        依次用候选编码流式解码整个文件，返回第一个能完整解码的编码；
+        只检查开头的数据块时，非ASCII字符出现在文件后部的GBK文件会被误判为UTF-8。
+        """
+        chunks = self._iter_chunks()
+        first_chunk = next(chunks, b'')
+        chunks.close()
+        if first_chunk.startswith(codecs.BOM_UTF8):
+            return 'utf-8-sig'
+        encodings = CSV_ENCODINGS if self.file_type == 'csv' else ['utf-8']
+        for encoding in encodings:
+            decoder = codecs.getincrementaldecoder(encoding)()
             try:
-                self.file.seek(0)
-                content = self.file.read().decode(encoding)
-                break
+                for chunk in self._iter_chunks():
+                    decoder.decode(chunk)
+                decoder.decode(b'', final=True)
+                return encoding
             except UnicodeDecodeError:
                 continue
-        
-        if content is None:
+        if self.file_type == 'csv':
             raise ValueError("无法解码文件，请检查文件编码")
-        
-        # 使用csv模块解析
-        from io import StringIO
-        csv_file = StringIO(content)
-        reader = csv.reader(csv_file)
-        
-        # 读取表头
+        raise ValueError("JSON文件编码错误，请使用UTF-8编码")
+
+    def _iter_text(self):
+        """
+        按块解码文件内容
+
+        优先使用上传时检测并保存的编码，没有保存时先检测编码，再用增量解码器逐块解码。
+        """
+        encoding = self.encoding or self._detect_encoding()
+
+        decoder = codecs.getincrementaldecoder(encoding)()
+        try:
+            for chunk in self._iter_chunks():
+                yield decoder.decode(chunk)
+            yield decoder.decode(b'', final=True)
+        except UnicodeDecodeError:
+            raise ValueError(
+                "无法解码文件，请检查文件编码" if self.file_type == 'csv' else "JSON文件编码错误，请使用UTF-8编码"
+            )
+
+    @staticmethod
+    def _iter_lines(texts):
+        """把解码后的文本块切分为行（保留换行符，供csv模块处理带引号的多行字段）"""
+        pending = ''
+        for text in texts:
+            if not text:
+                continue
+            lines = (pending + text).split('\n')
+            pending = lines.pop()
+            for line in lines:
+                yield line + '\n'
+        if pending:
+            yield pending
+
+    def _open_csv_rows(self):
+        """流式解析CSV文件"""
+        texts = self._iter_text()
+        reader = csv.reader(self._iter_lines(texts))
+
         try:
             headers = next(reader)
         except StopIteration:
-            return {'headers': [], 'rows': []}
-        
-        # 读取数据行
-        for i, row in enumerate(reader):
-            if max_rows and i >= max_rows:
-                break
-            # 确保行的长度与表头一致
-            while len(row) < len(headers):
-                row.append('')
-            rows.append(row[:len(headers)])
-        
-        return {'headers': headers, 'rows': rows}
+            return [], iter(())
+        except csv.Error as e:
+            raise ValueError(f"CSV格式错误: {str(e)}")
 
-    def _parse_json(self, max_rows=None):
-        """解析JSON文件"""
-        self.file.seek(0)
-        
-        try:
-            content = self.file.read().decode('utf-8')
-            data = json.loads(content)
-        except UnicodeDecodeError:
-            raise ValueError("JSON文件编码错误，请使用UTF-8编码")
-        except json.JSONDecodeError as e:
-            raise ValueError(f"JSON格式错误: {str(e)}")
-        
-        if not isinstance(data, list):
+        def rows():
+            try:
+                for row in reader:
+                    # 确保行的长度与表头一致
+                    if len(row) < len(headers):
+                        row.extend([''] * (len(headers) - len(row)))
+                    yield row[:len(headers)]
+            except csv.Error as e:
+                raise ValueError(f"CSV格式错误: {str(e)}")
+
+        return headers, rows()
+
+    def _iter_json_items(self):
+        """
+        增量解析顶层JSON数组，逐个返回数组元素
+
+        只在内存中保留当前未解析完的数据块，不会一次性加载整个数组。
+        """
+        decoder = json.JSONDecoder()
+        texts = self._iter_text()
+        buffer = ''
+        pos = 0
+
+        def read_more(min_chars=1):
+            """读取至少 min_chars 个字符，文件已读完时返回 False"""
+            nonlocal buffer, pos
+            parts = []
+            size = 0
+            for text in texts:
+                parts.append(text)
+                size += len(text)
+                if size >= min_chars:
+                    break
+            if not size:
+                return False
+            buffer = buffer[pos:] + ''.join(parts)
+            pos = 0
+            return True
+
+        def skip_whitespace():
+            nonlocal pos
+            while True:
+                while pos < len(buffer) and buffer[pos] in ' \t\r\n':
+                    pos += 1
+                if pos < len(buffer):
+                    return True
+                if not read_more():
+                    return False
+
+        if not skip_whitespace():
+            raise ValueError("JSON格式错误: 文件内容为空")
+        if buffer[pos] != '[':
             raise ValueError("JSON文件必须是对象数组格式")
-        
-        if not data:
-            return {'headers': [], 'rows': []}
-        
-        # 获取所有可能的键作为表头
+        pos += 1
+
+        first = True
+        while True:
+            if not skip_whitespace():
+                raise ValueError("JSON格式错误: 数组没有正确结束")
+            if buffer[pos] == ']':
+                pos += 1
+                break
+            if not first:
+                if buffer[pos] != ',':
+                    raise ValueError("JSON格式错误: 数组元素之间缺少逗号")
+                pos += 1
+                if not skip_whitespace():
+                    raise ValueError("JSON格式错误: 数组没有正确结束")
+
+            while True:
+                try:
+                    item, end = decoder.raw_decode(buffer, pos)
+                except json.JSONDecodeError as e:
+                    # 只有元素被数据块截断时才读取更多内容后重试，其他格式错误直接报告；
+                    # 每次重试至少读入与当前元素等长的内容，跨多个数据块的元素只需重新解析 O(log k) 次
+                    truncated = e.pos >= len(buffer) - JSON_TRUNCATED_TAIL or e.msg.startswith('Unterminated string')
+                    if truncated and read_more(len(buffer) - pos):
+                        continue
+                    raise ValueError(f"JSON格式错误: {str(e)}")
+                # 数字等标量位于数据块末尾时可能不完整
+                if end == len(buffer) and not isinstance(item, (dict, list, str)) and read_more():
+                    continue
+                break
+
+            pos = end
+            first = False
+            yield item
+
+        if skip_whitespace():
+            raise ValueError("JSON格式错误: 数组之后存在多余内容")
+
+    def _open_json_rows(self):
+        """流式解析JSON文件"""
+        # 第一遍扫描收集所有可能的键作为表头，第二遍生成行数据
         headers = set()
-        for item in data:
-            if isinstance(item, dict):
-                headers.update(item.keys())
-            else:
+        for item in self._iter_json_items():
+            if not isinstance(item, dict):
                 raise ValueError("JSON数组中的每个元素必须是对象")
-        
-        headers = sorted(list(headers))
-        
-        # 转换为行数据
-        rows = []
-        for i, item in enumerate(data):
-            if max_rows and i >= max_rows:
-                break
-            row = [str(item.get(header, '')) for header in headers]
-            rows.append(row)
-        
-        return {'headers': headers, 'rows': rows}
+            headers.update(item.keys())
+
+        headers = sorted(headers)
+        if not headers:
+            return [], iter(())
+
+        def rows():
+            for item in self._iter_json_items():
+                yield [str(item.get(header, '')) for header in headers]
+
+        return headers, rows()
 
     def get_data_count(self):
         """获取数据行数"""
+        if self.content_hash:
+            return self.row_count
         try:
-            parsed = self.parse_file()
-            return len(parsed['rows'])
+            return sum(1 for _ in self.iter_rows())
         except:
             return 0
 
     def get_preview_data(self, max_rows=5):
-        """获取预览数据"""
+        """获取预览数据，优先使用上传时保存的预览"""
+        if self.content_hash and max_rows <= DATA_FILE_PREVIEW_ROWS:
+            return {'headers': self.headers, 'rows': self.preview[:max_rows]}
         return self.parse_file(max_rows=max_rows)
 
     def validate_file(self):
@@ -247,10 +499,10 @@ class TestDataFile(models.Model):
         elif self.file_type == 'json' and file_extension not in ['.json']:
             errors.append("JSON文件扩展名必须是.json")
         
-        # 检查文件大小（限制10MB）
-        max_size = 10 * 1024 * 1024  # 10MB
+        # 检查文件大小
+        max_size = get_data_file_max_size()
         if self.get_file_size() > max_size:
-            errors.append(f"文件大小不能超过10MB，当前大小: {self.get_file_size_display()}")
+            errors.append(f"文件大小不能超过{max_size // (1024 * 1024)}MB，当前大小: {self.get_file_size_display()}")
         
         # 尝试解析文件
         try:
@@ -1,5 +1,5 @@
 from rest_framework import serializers
-from .models import TestCase, TestPlan, TestDataFile
+from .models import TestCase, TestPlan, TestDataFile, get_data_file_max_size
 
 class TestCaseSerializer(serializers.ModelSerializer):
     children = serializers.SerializerMethodField()
@@ -23,6 +23,7 @@ class TestCaseSerializer(serializers.ModelSerializer):
                 'file_type': data_file.file_type,
                 'file_size': data_file.get_file_size_display(),
                 'data_count': data_file.get_data_count(),
+                'headers': data_file.headers,
                 'created_at': data_file.created_at,
             }
         except TestDataFile.DoesNotExist:
@@ -37,9 +38,10 @@ class TestDataFileSerializer(serializers.ModelSerializer):
         fields = [
             'id', 'name', 'test_case', 'file', 'file_type', 
             'description', 'file_size_display', 'data_count',
+            'headers', 'encoding', 'content_hash',
             'created_at', 'updated_at'
         ]
-        read_only_fields = ['created_at', 'updated_at']
+        read_only_fields = ['headers', 'encoding', 'content_hash', 'created_at', 'updated_at']
 
     def validate(self, data):
         """验证数据文件"""
@@ -65,10 +67,12 @@ class TestDataFileUploadSerializer(serializers.ModelSerializer):
         if not value:
             raise serializers.ValidationError("请选择文件")
         
-        # 检查文件大小（10MB限制）
-        max_size = 10 * 1024 * 1024
+        # 检查文件大小
+        max_size = get_data_file_max_size()
         if value.size > max_size:
-            raise serializers.ValidationError(f"文件大小不能超过10MB，当前大小: {value.size / (1024*1024):.1f}MB")
+            raise serializers.ValidationError(
+                f"文件大小不能超过{max_size // (1024 * 1024)}MB，当前大小: {value.size / (1024*1024):.1f}MB"
+            )
         
         return value
 
@@ -83,7 +87,15 @@ class TestDataFileUploadSerializer(serializers.ModelSerializer):
                 raise serializers.ValidationError("CSV文件必须以.csv为扩展名")
             elif file_type == 'json' and file_extension != '.json':
                 raise serializers.ValidationError("JSON文件必须以.json为扩展名")
-        
+
+        # 解析文件内容，格式或编码错误时返回400；解析结果在保存时直接使用
+        file_type = data.get('file_type') or getattr(self.instance, 'file_type', None)
+        if data.get('file') and file_type:
+            try:
+                TestDataFile(file=data['file'], file_type=file_type).refresh_metadata()
+            except ValueError as e:
+                raise serializers.ValidationError({'file': [str(e)]})
+
         return data
 
 class TestPlanSerializer(serializers.ModelSerializer):
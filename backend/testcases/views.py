@@ -12,7 +12,7 @@ from .serializers import (
 # Create your views here.
 
 class TestCaseViewSet(viewsets.ModelViewSet):
-    queryset = TestCase.objects.all().select_related('assignee').prefetch_related('plans')
+    queryset = TestCase.objects.all().select_related('assignee', 'data_file').prefetch_related('plans')
     serializer_class = TestCaseSerializer
     permission_classes = []  # 统一权限配置：不限制访问
 
@@ -0,0 +1,99 @@
+"""
+并发执行集成测试
+
+使用内置Mock Server作为被测服务，验证测试计划和批量执行的并发模式
+"""
+
+import time
+
+from django.contrib.auth import get_user_model
+from django.test import LiveServerTestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api_test.models import ApiDefinition, ApiTestCase, TestRun, TestRunJob
+from api_test.views import ApiTestService
+from mock_server.models import MockAPI
+from testcases.models import TestCase as TestCaseModel, TestPlan
+
+User = get_user_model()
+
+
+class ConcurrentExecutionTest(LiveServerTestCase):
+    """并发执行测试"""
+
+    CASE_COUNT = 6
+    DELAY_MS = 200
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='runner', password='testpass123')
+        MockAPI.objects.create(
+            name='慢接口', path='/slow', method='GET',
+            response_body='{"ok": true}', delay_ms=self.DELAY_MS, created_by=self.user
+        )
+        api = ApiDefinition.objects.create(
+            name='慢接口', url=f'{self.live_server_url}/mock/slow', method='GET'
+        )
+        self.api_cases = [
+            ApiTestCase.objects.create(name=f'并发用例 {i}', api=api)
+            for i in range(self.CASE_COUNT)
+        ]
+        plan_case = TestCaseModel.objects.create(title='并发用例')
+        self.plan = TestPlan.objects.create(name='并发计划')
+        self.plan.test_cases.add(plan_case)
+        plan_case.api_test_cases.add(*self.api_cases)
+
+    def test_resolve_concurrency_is_bounded(self):
+        """并发数被限制在允许范围内"""
+        with self.settings(API_TEST_DEFAULT_CONCURRENCY=1, API_TEST_MAX_CONCURRENCY=8):
+            self.assertEqual(ApiTestService.resolve_concurrency(None), 1)
+            self.assertEqual(ApiTestService.resolve_concurrency('4'), 4)
+            self.assertEqual(ApiTestService.resolve_concurrency(100), 8)
+            self.assertEqual(ApiTestService.resolve_concurrency(0), 1)
+            with self.assertRaises(ValueError):
+                ApiTestService.resolve_concurrency('abc')
+
+    def test_execute_test_plan_concurrently(self):
+        """并发执行测试计划，结果写入同一个TestRun且统计正确"""
+        start = time.monotonic()
+        test_run = ApiTestService.execute_test_plan(
+            self.plan, self.user, concurrency=self.CASE_COUNT
+        )
+        elapsed = time.monotonic() - start
+
+        test_run.refresh_from_db()
+        self.assertEqual(test_run.status, 'completed', test_run.error_message)
+        self.assertEqual(test_run.total_tests, self.CASE_COUNT)
+        self.assertEqual(test_run.passed_tests, self.CASE_COUNT)
+        self.assertEqual(test_run.results.count(), self.CASE_COUNT)
+        # 串行执行至少需要 CASE_COUNT * DELAY_MS
+        self.assertLess(elapsed, self.CASE_COUNT * self.DELAY_MS / 1000)
+
+    def test_batch_execute_accepts_concurrency(self):
+        """批量执行接口支持concurrency参数"""
+        client = APIClient()
+        response = client.post('/api-test/api-test-cases/batch_execute/', {
+            'case_ids': [case.id for case in self.api_cases],
+            'concurrency': 3,
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job = TestRunJob.objects.get(id=response.data['job_id'])
+        self.assertEqual(job.payload['concurrency'], 3)
+
+        ApiTestService.process_job(TestRunJob.claim_next('test-worker'))
+
+        test_run = TestRun.objects.get(id=response.data['id'])
+        self.assertEqual(test_run.status, 'completed')
+        self.assertEqual(test_run.passed_tests, self.CASE_COUNT)
+
+    def test_invalid_concurrency_rejected(self):
+        """非法的并发数返回400"""
+        client = APIClient()
+        response = client.post('/api-test/api-test-cases/execute_test_plan/', {
+            'test_plan_id': self.plan.id,
+            'concurrency': 'many',
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(TestRun.objects.exists())
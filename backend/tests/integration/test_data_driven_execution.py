@@ -0,0 +1,120 @@
+"""
+数据驱动测试分片执行集成测试
+
+使用内置Mock Server作为被测服务，验证数据行分片并发执行与流式汇总
+"""
+
+import json
+import shutil
+import tempfile
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.test import LiveServerTestCase, override_settings
+
+from api_test.models import ApiDefinition, ApiTestCase, TestRun
+from api_test.views import ApiTestService
+from environments.models import Environment, EnvironmentUsageLog
+from mock_server.models import MockAPI
+from testcases.models import TestCase as TestCaseModel, TestDataFile
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT, API_TEST_DATA_SHARD_SIZE=4, API_TEST_DATA_RESULT_SAMPLE_SIZE=3)
+class DataDrivenShardingTest(LiveServerTestCase):
+    """数据驱动分片执行测试"""
+
+    ROW_COUNT = 16
+    FAILED_ROWS = {3, 7, 11, 12, 15}
+    DELAY_MS = 100
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='runner', password='testpass123')
+        MockAPI.objects.create(
+            name='慢接口', path='/slow', method='GET',
+            response_body='{"ok": true}', delay_ms=self.DELAY_MS, created_by=self.user
+        )
+        api = ApiDefinition.objects.create(
+            name='数据驱动接口', url=f'{self.live_server_url}/mock/{{{{path}}}}', method='GET'
+        )
+        self.api_case = ApiTestCase.objects.create(name='数据驱动用例', api=api)
+
+        lines = ['path']
+        for row in range(1, self.ROW_COUNT + 1):
+            lines.append('missing' if row in self.FAILED_ROWS else 'slow')
+        plan_case = TestCaseModel.objects.create(title='数据驱动用例')
+        self.api_case.data_test_case = plan_case
+        self.api_case.save()
+        data_file = TestDataFile(name='rows.csv', test_case=plan_case, file_type='csv')
+        data_file.file.save('rows.csv', ContentFile('\n'.join(lines).encode('utf-8')), save=False)
+        data_file.save()
+
+    def _summary(self, test_run):
+        summary = test_run.results.get(response_code__isnull=True)
+        return summary, json.loads(summary.get_response_body())
+
+    def test_rows_run_concurrently_in_shards(self):
+        """数据行分片并发执行，汇总统计由流式结果合并得到"""
+        test_run = TestRun.objects.create(name='数据驱动', executed_by=self.user)
+
+        start = time.monotonic()
+        ApiTestService.run_test_cases(test_run, [self.api_case], self.user, data_concurrency=4)
+        elapsed = time.monotonic() - start
+
+        test_run.refresh_from_db()
+        self.assertEqual(test_run.status, 'completed', test_run.error_message)
+        # 每个数据行一条结果，外加一条汇总结果
+        self.assertEqual(test_run.results.count(), self.ROW_COUNT + 1)
+        passed_rows = self.ROW_COUNT - len(self.FAILED_ROWS)
+        self.assertLess(elapsed, passed_rows * self.DELAY_MS / 1000)
+
+        summary, body = self._summary(test_run)
+        self.assertEqual(summary.status, 'failed')
+        self.assertEqual(body['data_driven_summary']['total_tests'], self.ROW_COUNT)
+        self.assertEqual(body['data_driven_summary']['passed'], passed_rows)
+        self.assertEqual(body['data_driven_summary']['failed'], len(self.FAILED_ROWS))
+        # 只保留有限数量的失败行样本
+        self.assertEqual(len(body['individual_results']), 3)
+        self.assertEqual(body['omitted_results'], len(self.FAILED_ROWS) - 3)
+        for sample in body['individual_results']:
+            self.assertIn(sample['row'], self.FAILED_ROWS)
+
+    def test_serial_execution_matches_sharded(self):
+        """串行执行与分片执行得到相同的汇总统计"""
+        test_run = TestRun.objects.create(name='数据驱动串行', executed_by=self.user)
+        ApiTestService.run_test_cases(test_run, [self.api_case], self.user)
+
+        _, body = self._summary(test_run)
+        self.assertEqual(body['data_driven_summary']['total_tests'], self.ROW_COUNT)
+        self.assertEqual(body['data_driven_summary']['failed'], len(self.FAILED_ROWS))
+
+    def test_environment_usage_logged_once_per_run(self):
+        """选择环境时整个执行只记录一条汇总的使用日志"""
+        environment = Environment.objects.create(name='测试环境', created_by=self.user)
+        environment.variables.create(key='token', value='abc')
+        test_run = TestRun.objects.create(name='数据驱动环境', executed_by=self.user)
+
+        ApiTestService.run_test_cases(
+            test_run, [self.api_case], self.user, environment=environment, data_concurrency=4
+        )
+
+        log = EnvironmentUsageLog.objects.get(environment=environment)
+        self.assertEqual(log.context['test_run_id'], test_run.id)
+        self.assertEqual(log.context['case_count'], 1)
+        self.assertEqual(log.context['row_count'], self.ROW_COUNT)
+        self.assertEqual([api['id'] for api in log.context['apis']], [self.api_case.api_id])
+
+    def test_resolve_data_concurrency_uses_own_default(self):
+        """数据分片并发数使用独立的默认值"""
+        with self.settings(API_TEST_DATA_CONCURRENCY=4, API_TEST_MAX_CONCURRENCY=8):
+            self.assertEqual(ApiTestService.resolve_data_concurrency(None), 4)
+            self.assertEqual(ApiTestService.resolve_data_concurrency(20), 8)
@@ -0,0 +1,130 @@
+"""
+异步队列执行集成测试
+
+验证执行接口入队后立即返回、worker领取执行以及进度查询
+"""
+
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import LiveServerTestCase
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api_test.models import ApiDefinition, ApiTestCase, ApiTestResult, TestRun, TestRunJob
+from mock_server.models import MockAPI
+from testcases.models import TestCase as TestCaseModel, TestPlan
+
+User = get_user_model()
+
+
+class QueuedExecutionTest(LiveServerTestCase):
+    """队列执行测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='runner', password='testpass123')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        MockAPI.objects.create(
+            name='健康检查', path='/health', method='GET',
+            response_body='{"status": "ok"}', created_by=self.user
+        )
+        api = ApiDefinition.objects.create(
+            name='健康检查', url=f'{self.live_server_url}/mock/health', method='GET'
+        )
+        api_cases = [ApiTestCase.objects.create(name=f'队列用例 {i}', api=api) for i in range(3)]
+
+        plan_case = TestCaseModel.objects.create(title='队列用例')
+        self.plan = TestPlan.objects.create(name='队列计划')
+        self.plan.test_cases.add(plan_case)
+        plan_case.api_test_cases.add(*api_cases)
+
+    def test_execute_test_plan_returns_accepted(self):
+        """执行测试计划立即返回202和TestRun ID"""
+        response = self.client.post('/api-test/api-test-cases/execute_test_plan/', {
+            'test_plan_id': self.plan.id,
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        test_run = TestRun.objects.get(id=response.data['id'])
+        self.assertEqual(test_run.status, 'queued')
+        self.assertEqual(test_run.results.count(), 0)
+        self.assertEqual(TestRunJob.objects.get(test_run=test_run).status, 'pending')
+
+    def test_worker_executes_queued_job(self):
+        """worker领取并执行任务，进度接口反映执行结果"""
+        response = self.client.post('/api-test/api-test-cases/execute_test_plan/', {
+            'test_plan_id': self.plan.id,
+            'concurrency': 2,
+        }, format='json')
+        run_id = response.data['id']
+
+        progress = self.client.get(f'/api/reports/test-runs/{run_id}/progress/').data
+        self.assertEqual(progress['status'], 'queued')
+        self.assertIsNone(progress['eta_seconds'])
+
+        call_command('run_test_worker', '--once', stdout=open('/dev/null', 'w'))
+
+        job = TestRunJob.objects.get(test_run_id=run_id)
+        self.assertEqual(job.status, 'completed')
+        self.assertEqual(job.attempts, 1)
+
+        progress = self.client.get(f'/api/reports/test-runs/{run_id}/progress/').data
+        self.assertEqual(progress['status'], 'completed')
+        self.assertEqual(progress['done'], 3)
+        self.assertEqual(progress['total'], 3)
+        self.assertEqual(progress['passed'], 3)
+        self.assertEqual(progress['eta_seconds'], 0)
+
+    def test_job_claimed_only_once(self):
+        """同一个任务只能被一个worker领取"""
+        self.client.post('/api-test/api-test-cases/execute_test_plan/', {
+            'test_plan_id': self.plan.id,
+        }, format='json')
+
+        self.assertIsNotNone(TestRunJob.claim_next('worker-a'))
+        self.assertIsNone(TestRunJob.claim_next('worker-b'))
+
+    def test_requeue_uses_heartbeat(self):
+        """执行时间超过阈值但心跳正常的任务不会被重新入队"""
+        self.client.post('/api-test/api-test-cases/execute_test_plan/', {
+            'test_plan_id': self.plan.id,
+        }, format='json')
+        job = TestRunJob.claim_next('worker-a')
+        long_ago = timezone.now() - timedelta(seconds=600)
+        TestRunJob.objects.filter(id=job.id).update(claimed_at=long_ago)
+
+        self.assertTrue(job.heartbeat())
+        self.assertEqual(TestRunJob.requeue_stale(60), 0)
+
+        TestRunJob.objects.filter(id=job.id).update(heartbeat_at=long_ago)
+        self.assertEqual(TestRunJob.requeue_stale(60), 1)
+        self.assertFalse(job.heartbeat())
+
+    def test_reclaimed_job_replaces_previous_results(self):
+        """重新领取的任务清除上一次未完成执行写入的结果"""
+        response = self.client.post('/api-test/api-test-cases/execute_test_plan/', {
+            'test_plan_id': self.plan.id,
+        }, format='json')
+        run_id = response.data['id']
+        ApiTestResult.objects.create(
+            test_case=ApiTestCase.objects.first(), test_run_id=run_id, status='passed'
+        )
+
+        call_command('run_test_worker', '--once', stdout=open('/dev/null', 'w'))
+
+        test_run = TestRun.objects.get(id=run_id)
+        self.assertEqual(test_run.results.count(), 3)
+        self.assertEqual(test_run.total_tests, 3)
+
+    def test_unknown_test_plan_rejected(self):
+        """不存在的测试计划返回400且不入队"""
+        response = self.client.post('/api-test/api-test-cases/execute_test_plan/', {
+            'test_plan_id': 99999,
+        }, format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(TestRunJob.objects.exists())
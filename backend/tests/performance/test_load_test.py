@@ -0,0 +1,106 @@
+"""
+压力测试集成测试
+
+使用内置Mock Server作为被测服务，验证负载阶段、加权用例、延迟直方图和队列执行
+"""
+
+from django.contrib.auth import get_user_model
+from django.test import LiveServerTestCase
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from api_test.models import ApiDefinition, ApiTestCase, LoadTestCase, LoadTestRun, TestRunJob
+from api_test.views import ApiTestService
+from mock_server.models import MockAPI
+
+User = get_user_model()
+
+
+class LoadTestRunTest(LiveServerTestCase):
+    """压测执行测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='runner', password='testpass123')
+        MockAPI.objects.create(
+            name='健康检查', path='/health', method='GET',
+            response_body='{"status": "ok"}', created_by=self.user
+        )
+        health = ApiDefinition.objects.create(name='健康检查', url=f'{self.live_server_url}/mock/health')
+        missing = ApiDefinition.objects.create(name='不存在', url=f'{self.live_server_url}/mock/missing')
+        self.health_case = ApiTestCase.objects.create(name='健康检查', api=health)
+        self.missing_case = ApiTestCase.objects.create(name='不存在', api=missing)
+
+    def _load_test(self, cases, **options):
+        load_test = LoadTestRun.objects.create(name='压测', created_by=self.user, **options)
+        for test_case, weight in cases:
+            LoadTestCase.objects.create(load_test=load_test, test_case=test_case, weight=weight)
+        return load_test
+
+    def test_rps_mode_follows_ramp_up_stages(self):
+        """固定速率模式按阶段爬升，按秒记录吞吐量"""
+        load_test = self._load_test(
+            [(self.health_case, 1)], mode='rps', concurrency=8,
+            stages=[{'duration': 1, 'target': 20}, {'duration': 1, 'target': 20}]
+        )
+        ApiTestService.execute_load_test(load_test)
+
+        load_test.refresh_from_db()
+        self.assertEqual(load_test.status, 'completed', load_test.error_message)
+        # 第一秒从0爬升到20（约10个请求），第二秒保持20
+        self.assertGreaterEqual(load_test.total_requests, 20)
+        self.assertLessEqual(load_test.total_requests, 35)
+        self.assertEqual(load_test.error_requests, 0)
+        self.assertEqual([item['second'] for item in load_test.timeline][:2], [0, 1])
+        self.assertLess(load_test.timeline[0]['requests'], load_test.timeline[1]['requests'])
+
+    def test_weighted_mix_with_request_count(self):
+        """固定并发模式按权重混合用例，达到请求总数后停止"""
+        load_test = self._load_test(
+            [(self.health_case, 3), (self.missing_case, 1)], mode='concurrency', concurrency=4, request_count=80
+        )
+        ApiTestService.execute_load_test(load_test)
+
+        load_test.refresh_from_db()
+        self.assertEqual(load_test.total_requests, 80)
+        self.assertEqual(set(load_test.errors_by_type), {'HTTP 404'})
+        self.assertGreater(load_test.error_requests, 5)
+        self.assertLess(load_test.error_requests, 40)
+        self.assertLessEqual(load_test.latency_min, load_test.latency_p50)
+        self.assertLessEqual(load_test.latency_p50, load_test.latency_p90)
+        self.assertLessEqual(load_test.latency_p90, load_test.latency_p99)
+        self.assertLessEqual(load_test.latency_p99, load_test.latency_p999)
+        self.assertLessEqual(load_test.latency_p999, load_test.latency_max)
+        self.assertEqual(load_test.latency_histogram['count'], 80)
+
+    def test_run_through_queue(self):
+        """通过接口创建压测并由worker执行"""
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        response = client.post('/api-test/load-tests/', {
+            'name': '接口压测',
+            'mode': 'rps',
+            'target_rps': 50,
+            'request_count': 10,
+            'cases': [{'test_case': self.health_case.id, 'weight': 1}],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+
+        response = client.post(f"/api-test/load-tests/{response.data['id']}/run/")
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job = TestRunJob.claim_next('test-worker')
+        ApiTestService.process_job(job)
+
+        job.refresh_from_db()
+        self.assertEqual(job.status, 'completed', job.error_message)
+        response = client.get(f"/api-test/load-tests/{job.load_test_id}/")
+        self.assertEqual(response.data['status'], 'completed')
+        self.assertEqual(response.data['total_requests'], 10)
+
+    def test_validation_requires_stop_condition(self):
+        """没有持续时间、请求总数或负载阶段时拒绝创建"""
+        client = APIClient()
+        response = client.post('/api-test/load-tests/', {
+            'name': '无限压测', 'mode': 'rps', 'target_rps': 10,
+            'cases': [{'test_case': self.health_case.id, 'weight': 1}],
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
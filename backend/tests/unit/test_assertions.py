@@ -0,0 +1,85 @@
+"""
+断言执行计划单元测试
+"""
+
+import json
+import unittest
+from unittest import mock
+
+from api_test.assertions import AssertionPlan, ResponseView
+
+
+class FakeResponse:
+    """记录解码和解析次数的响应对象"""
+
+    def __init__(self, body, headers=None):
+        self.body = body
+        self.headers = headers or {}
+        self.text_reads = 0
+        self.json_reads = 0
+
+    @property
+    def text(self):
+        self.text_reads += 1
+        return self.body
+
+    def json(self):
+        self.json_reads += 1
+        return json.loads(self.body)
+
+
+class AssertionPlanTest(unittest.TestCase):
+    """断言编译与执行"""
+
+    def test_response_parsed_once_for_all_assertions(self):
+        response = FakeResponse(json.dumps({'data': {'items': [{'id': 1}, {'id': 2}]}, 'msg': 'ok'}))
+        plan = AssertionPlan(
+            [{'type': 'json_path', 'field': 'data.items.1.id', 'expected': 2}] * 10
+            + [{'type': 'contains', 'expected': '"msg"'}] * 10
+            + [{'type': 'not_contains', 'expected': 'error'}, {'type': 'regex', 'expected': r'"id": \d'}]
+        )
+
+        results, elapsed = plan.evaluate(ResponseView(response))
+
+        self.assertTrue(all(result['passed'] for result in results), results)
+        self.assertEqual(len(results), 22)
+        self.assertEqual(response.json_reads, 1)
+        self.assertEqual(response.text_reads, 1)
+        self.assertGreaterEqual(elapsed, 0)
+
+    def test_json_path_results(self):
+        view = ResponseView(FakeResponse('{"a": {"b": [10, 20]}}'))
+        plan = AssertionPlan([
+            {'type': 'json_path', 'field': 'a.b.0', 'expected': 10},
+            {'type': 'json_path', 'field': 'a.b.5', 'expected': 10},
+            {'type': 'json_path', 'field': 'a.x.y', 'expected': None},
+        ])
+        results, _ = plan.evaluate(view)
+        self.assertEqual([result['passed'] for result in results], [True, False, True])
+        self.assertIsNone(results[1]['actual'])
+
+    def test_invalid_json_is_parsed_once(self):
+        response = FakeResponse('not json')
+        plan = AssertionPlan([{'type': 'json_path', 'field': 'a', 'expected': 1}] * 3)
+        results, _ = plan.evaluate(ResponseView(response))
+        self.assertFalse(any(result['passed'] for result in results))
+        self.assertIn('JSON路径断言执行失败', results[0]['message'])
+        self.assertEqual(response.json_reads, 1)
+
+    def test_header_assertion(self):
+        view = ResponseView(FakeResponse('', headers={'X-Trace': 'abc'}))
+        results, _ = AssertionPlan([{'type': 'header', 'header_name': 'X-Trace', 'expected': 'abc'}]).evaluate(view)
+        self.assertTrue(results[0]['passed'])
+
+    def test_invalid_assertions_fail_without_raising(self):
+        plan = AssertionPlan([{'type': 'unknown', 'expected': 1}, {'type': 'regex', 'expected': '('}])
+        results, _ = plan.evaluate(ResponseView(FakeResponse('')))
+        self.assertIn('不支持的断言类型', results[0]['message'])
+        self.assertIn('断言配置错误', results[1]['message'])
+
+    def test_regex_compiled_once(self):
+        with mock.patch('api_test.assertions.re.compile', wraps=__import__('re').compile) as compile_mock:
+            plan = AssertionPlan([{'type': 'regex', 'expected': r'\d+'}])
+            for body in ['a1', 'b2', 'c3']:
+                plan.evaluate(ResponseView(FakeResponse(body)))
+        self.assertEqual(compile_mock.call_count, 1)
@@ -0,0 +1,97 @@
+"""
+测试结果内容存储单元测试
+"""
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from api_test.blob_store import compress, decompress, store_result_blobs
+from api_test.models import ApiDefinition, ApiTestCase, ApiTestResult, ResultBlob, TestRun
+from api_test.serializers import ApiTestResultSerializer
+
+
+class BlobStoreTest(TestCase):
+    """内容存储测试"""
+
+    BODY = json.dumps({'items': [{'id': i, 'name': f'用户{i}'} for i in range(50)]}, ensure_ascii=False)
+
+    def setUp(self):
+        api = ApiDefinition.objects.create(name='用户列表', url='http://example.com/users')
+        self.test_case = ApiTestCase.objects.create(name='用户列表用例', api=api)
+        self.test_run = TestRun.objects.create(name='内容存储测试')
+
+    def _result(self, body=BODY):
+        return ApiTestResult(
+            test_case=self.test_case, test_run=self.test_run, status='passed',
+            response_body=body, response_headers='{"Content-Type": "application/json"}'
+        )
+
+    def test_compress_round_trip(self):
+        """压缩后可以还原，压缩没有收益时不压缩"""
+        raw = self.BODY.encode('utf-8')
+        data, compression = compress(raw, 'zlib')
+        self.assertEqual(compression, 'zlib')
+        self.assertLess(len(data), len(raw))
+        self.assertEqual(decompress(data, compression), raw)
+
+        self.assertEqual(compress(b'x', 'zlib'), (b'x', 'none'))
+
+    def test_identical_bodies_are_stored_once(self):
+        """相同内容只写入一次，结果只保存引用"""
+        results = [self._result() for _ in range(3)]
+        self.assertEqual(store_result_blobs(results), 1)
+        ApiTestResult.objects.bulk_create(results)
+        # 再次写入已存在的内容不会新增
+        self.assertEqual(store_result_blobs([self._result()]), 0)
+
+        self.assertEqual(ResultBlob.objects.count(), 1)
+        blob = ResultBlob.objects.get()
+        self.assertEqual(blob.size, len(self.BODY.encode('utf-8')))
+        self.assertLess(blob.stored_size, blob.size)
+
+        result = ApiTestResult.objects.first()
+        self.assertEqual(result.response_body, '')
+        self.assertEqual(result.get_response_body(), self.BODY)
+        # 短内容保持内联
+        self.assertIsNone(result.response_headers_blob_id)
+        self.assertEqual(result.get_response_headers(), {'Content-Type': 'application/json'})
+
+    @override_settings(API_TEST_BLOB_COMPRESSION='none')
+    def test_save_stores_content(self):
+        """单条保存同样写入内容存储"""
+        result = self._result()
+        result.save()
+        result = ApiTestResult.objects.get(pk=result.pk)
+        self.assertEqual(result.response_body_blob.compression, 'none')
+        self.assertEqual(result.get_response_body(), self.BODY)
+
+    def test_serializer_reads_content_transparently(self):
+        """接口返回的数据格式不变"""
+        result = self._result()
+        result.save()
+        data = ApiTestResultSerializer(result).data
+        self.assertEqual(data['response_body'], self.BODY)
+        self.assertEqual(json.loads(data['response_headers']), {'Content-Type': 'application/json'})
+        self.assertNotIn('response_body_blob', data)
+
+    def test_migrate_command_moves_inline_content(self):
+        """迁移命令把历史内联内容移入内容存储，并清理未引用的内容"""
+        legacy = self._result()
+        # 模拟迁移前写入的历史数据（绕过 save 中的内容存储）
+        ApiTestResult.objects.bulk_create([legacy])
+        legacy = ApiTestResult.objects.get()
+        self.assertEqual(legacy.response_body, self.BODY)
+        orphan = ResultBlob(sha256='0' * 64, size=0)
+        orphan.set_raw(b'')
+        orphan.compress('none')
+        orphan.save()
+
+        call_command('migrate_result_blobs', '--batch-size', '1', '--prune', stdout=StringIO())
+
+        legacy.refresh_from_db()
+        self.assertEqual(legacy.response_body, '')
+        self.assertIsNotNone(legacy.response_body_blob_id)
+        self.assertEqual(legacy.get_response_body(), self.BODY)
+        self.assertFalse(ResultBlob.objects.filter(sha256='0' * 64).exists())
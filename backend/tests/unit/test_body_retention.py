@@ -0,0 +1,80 @@
+"""
+响应体保留策略单元测试
+"""
+from django.test import TestCase, override_settings
+
+from api_test.models import ApiDefinition, ApiTestCase, ApiTestResult, TestRun
+from api_test.result_sink import BufferedResultSink
+from api_test.retention import BodyRetentionPolicy, resolve_body_retention
+from testcases.models import TestPlan
+
+
+class BodyRetentionTest(TestCase):
+    """响应体保留策略测试"""
+
+    BODY = '用户' * 1000  # 6000字节
+
+    def setUp(self):
+        api = ApiDefinition.objects.create(name='用户列表', url='http://example.com/users')
+        self.test_case = ApiTestCase.objects.create(name='用户列表用例', api=api)
+
+    def _result(self, result_status, test_run=None, response_code=200):
+        return ApiTestResult(
+            test_case=self.test_case, test_run=test_run, status=result_status,
+            response_code=response_code, response_body=self.BODY,
+            response_headers='{"Content-Type": "application/json"}'
+        )
+
+    def test_failures_only_drops_passed_bodies(self):
+        """只保留失败结果的响应体"""
+        policy = BodyRetentionPolicy('failures_only')
+        passed, failed = self._result('passed'), self._result('failed')
+
+        self.assertEqual(policy.apply(passed), 6000)
+        self.assertEqual(policy.apply(failed), 0)
+        self.assertEqual(passed.response_body, '')
+        self.assertTrue(passed.response_truncated)
+        self.assertEqual(passed.response_headers, '{"Content-Type": "application/json"}')
+        self.assertEqual(failed.response_body, self.BODY)
+
+    def test_truncate_passed_keeps_prefix(self):
+        """通过的结果只保留前N KB，不截断半个字符"""
+        policy = BodyRetentionPolicy('truncate_passed', 1)
+        result = self._result('passed')
+
+        saved = policy.apply(result)
+        # 1024字节处是半个字符，实际保留1023字节
+        self.assertEqual(result.response_body, '用户' * 170 + '用')
+        self.assertEqual(saved, 6000 - 1023)
+
+    def test_summary_results_are_kept(self):
+        """没有响应码的结果（数据驱动汇总）不受影响"""
+        policy = BodyRetentionPolicy('failures_only')
+        summary = self._result('passed', response_code=None)
+        self.assertEqual(policy.apply(summary), 0)
+        self.assertEqual(summary.response_body, self.BODY)
+
+    def test_sink_reports_bytes_saved(self):
+        """保留策略节省的字节数累计到执行记录"""
+        test_run = TestRun.objects.create(name='保留策略', body_retention='failures_only')
+        sink = BufferedResultSink(test_run, batch_size=100, flush_interval=3600)
+        for result_status in ('passed', 'passed', 'failed'):
+            sink.add(self._result(result_status, test_run))
+        sink.close()
+
+        test_run.refresh_from_db()
+        self.assertEqual(test_run.body_bytes_saved, 12000)
+        bodies = {result.status: result.get_response_body() for result in test_run.results.all()}
+        self.assertEqual(bodies, {'passed': '', 'failed': self.BODY})
+
+    @override_settings(API_TEST_BODY_RETENTION='truncate_passed', API_TEST_BODY_RETENTION_KB=8)
+    def test_resolve_body_retention(self):
+        """显式指定 > 测试计划 > 系统配置"""
+        self.assertEqual(resolve_body_retention(), ('truncate_passed', 8))
+
+        plan = TestPlan.objects.create(name='回归', body_retention='failures_only')
+        self.assertEqual(resolve_body_retention(test_plan=plan), ('failures_only', 8))
+        self.assertEqual(resolve_body_retention('full', '2', plan), ('full', 2))
+
+        with self.assertRaises(ValueError):
+            resolve_body_retention('keep_nothing')
@@ -0,0 +1,124 @@
+"""
+测试数据文件元数据单元测试
+"""
+
+import hashlib
+import shutil
+import tempfile
+from io import StringIO
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from testcases.models import TestCase as TestCaseModel, TestDataFile
+from testcases.serializers import TestCaseSerializer, TestDataFileSerializer, TestDataFileUploadSerializer
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+CSV_CONTENT = '名称,值\n' + ''.join(f'行{i},{i}\n' for i in range(60))
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class DataFileMetadataTest(TestCase):
+    """数据文件元数据在上传时计算，读取时不再解析文件"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.test_case = TestCaseModel.objects.create(title='数据驱动用例')
+        self.content = CSV_CONTENT.encode('gbk')
+        self.data_file = TestDataFile.objects.create(
+            name='rows.csv',
+            test_case=self.test_case,
+            file=SimpleUploadedFile('rows.csv', self.content),
+            file_type='csv',
+        )
+
+    def test_metadata_computed_on_upload(self):
+        data_file = TestDataFile.objects.get(id=self.data_file.id)
+        self.assertEqual(data_file.row_count, 60)
+        self.assertEqual(data_file.headers, ['名称', '值'])
+        self.assertEqual(data_file.encoding, 'gbk')
+        self.assertEqual(data_file.file_size, len(self.content))
+        self.assertEqual(data_file.content_hash, hashlib.sha256(self.content).hexdigest())
+        self.assertEqual(len(data_file.preview), 50)
+        self.assertEqual(data_file.preview[0], ['行0', '0'])
+
+    def test_reads_do_not_touch_file(self):
+        data_file = TestDataFile.objects.get(id=self.data_file.id)
+        with mock.patch.object(TestDataFile, '_iter_chunks', side_effect=AssertionError('文件被读取')):
+            self.assertEqual(data_file.get_data_count(), 60)
+            self.assertEqual(data_file.get_preview_data(max_rows=3)['rows'], [['行0', '0'], ['行1', '1'], ['行2', '2']])
+            self.assertEqual(TestDataFileSerializer(data_file).data['data_count'], 60)
+            test_case = TestCaseModel.objects.select_related('data_file').get(id=self.test_case.id)
+            self.assertEqual(TestCaseSerializer(test_case).data['data_file']['data_count'], 60)
+
+    def test_metadata_not_recomputed_when_file_unchanged(self):
+        data_file = TestDataFile.objects.get(id=self.data_file.id)
+        with mock.patch.object(TestDataFile, 'refresh_metadata') as refresh:
+            data_file.description = '更新描述'
+            data_file.save()
+        refresh.assert_not_called()
+
+    def test_metadata_recomputed_when_file_replaced(self):
+        data_file = TestDataFile.objects.get(id=self.data_file.id)
+        data_file.file = SimpleUploadedFile('new.csv', b'a,b\n1,2\n')
+        data_file.save()
+
+        data_file.refresh_from_db()
+        self.assertEqual(data_file.row_count, 1)
+        self.assertEqual(data_file.headers, ['a', 'b'])
+        self.assertEqual(data_file.encoding, 'utf-8')
+
+    def test_refresh_command_backfills_missing_metadata(self):
+        """升级前上传的文件通过管理命令回填元数据"""
+        TestDataFile.objects.filter(id=self.data_file.id).update(
+            row_count=0, headers=[], preview=[], encoding='', content_hash='', file_size=0
+        )
+        call_command('refresh_data_file_metadata', stdout=StringIO())
+
+        data_file = TestDataFile.objects.get(id=self.data_file.id)
+        self.assertEqual(data_file.row_count, 60)
+        self.assertEqual(data_file.content_hash, hashlib.sha256(self.content).hexdigest())
+
+    def test_upload_rejects_unparseable_file(self):
+        """格式错误或不是UTF-8编码的JSON文件在上传时返回400"""
+        for content in [b'[{"a": 1}, {"b": ', '[{"名称": "值"}]'.encode('gbk')]:
+            response = self.client.post('/api/testcases/datafiles/', {
+                'name': 'broken.json', 'file_type': 'json',
+                'file': SimpleUploadedFile('broken.json', content),
+            })
+            self.assertEqual(response.status_code, 400, content)
+            self.assertIn('file', response.json())
+        self.assertEqual(TestDataFile.objects.count(), 1)
+
+    def test_upload_parses_file_once(self):
+        """上传接口校验时解析的结果在保存时直接使用"""
+        upload = SimpleUploadedFile('new.csv', b'a,b\n1,2\n')
+        serializer = TestDataFileUploadSerializer(data={'name': 'new.csv', 'file_type': 'csv', 'file': upload})
+        self.assertTrue(serializer.is_valid(), serializer.errors)
+
+        other = TestCaseModel.objects.create(title='另一个用例')
+        with mock.patch.object(TestDataFile, '_iter_chunks', side_effect=AssertionError('文件被重新解析')):
+            data_file = serializer.save(test_case=other)
+        data_file.refresh_from_db()
+        self.assertEqual(data_file.row_count, 1)
+        self.assertEqual(data_file.headers, ['a', 'b'])
+
+    def test_save_keeps_unparseable_file(self):
+        """直接保存无法解析的文件时不抛出异常，只保存空的元数据"""
+        data_file = TestDataFile.objects.get(id=self.data_file.id)
+        data_file.file_type = 'json'
+        data_file.file = SimpleUploadedFile('broken.json', b'[{"a": 1}, {"b": ')
+        with self.assertLogs('testcases.models', 'WARNING'):
+            data_file.save()
+
+        data_file.refresh_from_db()
+        self.assertEqual(data_file.content_hash, '')
+        with self.assertRaises(ValueError):
+            data_file.get_preview_data()
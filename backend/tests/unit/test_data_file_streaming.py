@@ -0,0 +1,112 @@
+"""
+测试数据文件流式解析单元测试
+"""
+
+import codecs
+import json
+from unittest import mock
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase
+
+from testcases.models import TestDataFile
+
+
+def make_data_file(content, file_type='csv'):
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    return TestDataFile(
+        name=f'data.{file_type}',
+        file=SimpleUploadedFile(f'data.{file_type}', content),
+        file_type=file_type,
+    )
+
+
+@mock.patch('testcases.models.DATA_FILE_CHUNK_SIZE', 7)
+class CsvStreamingTest(SimpleTestCase):
+    """CSV流式解析（使用很小的数据块覆盖跨块边界的情况）"""
+
+    def test_rows_are_aligned_to_headers(self):
+        data_file = make_data_file('name,age\n张三,20\n李四\n王五,30,extra\n')
+        headers, rows = data_file.open_rows()
+        self.assertEqual(headers, ['name', 'age'])
+        self.assertEqual(list(rows), [['张三', '20'], ['李四', ''], ['王五', '30']])
+
+    def test_gbk_encoding_detected(self):
+        data_file = make_data_file('名称,值\n测试,1\n'.encode('gbk'))
+        self.assertEqual(data_file.parse_file(), {'headers': ['名称', '值'], 'rows': [['测试', '1']]})
+
+    def test_gbk_detected_past_first_chunk(self):
+        """非ASCII字符只出现在文件后部时仍按GBK解码"""
+        content = 'name,value\n' + ''.join(f'row{i},{i}\n' for i in range(200)) + '中文,2\n'
+        data_file = make_data_file(content.encode('gbk'))
+        rows = list(data_file.iter_rows())
+        self.assertEqual(len(rows), 201)
+        self.assertEqual(rows[-1], ['中文', '2'])
+
+        data_file.refresh_metadata()
+        self.assertEqual(data_file.encoding, 'gbk')
+
+    def test_utf8_bom_is_stripped(self):
+        data_file = make_data_file(codecs.BOM_UTF8 + b'key,value\na,1\n')
+        self.assertEqual(data_file.parse_file()['headers'], ['key', 'value'])
+
+    def test_quoted_multiline_field(self):
+        data_file = make_data_file('key,value\r\n"a","line1\r\nline2"\r\nb,2\r\n')
+        self.assertEqual(list(data_file.iter_rows()), [['a', 'line1\r\nline2'], ['b', '2']])
+
+    def test_max_rows_limits_rows(self):
+        lines = ['id'] + [str(i) for i in range(100)]
+        data_file = make_data_file('\n'.join(lines))
+        self.assertEqual(data_file.parse_file(max_rows=3)['rows'], [['0'], ['1'], ['2']])
+        self.assertEqual(data_file.get_data_count(), 100)
+
+    def test_empty_file(self):
+        self.assertEqual(make_data_file('').parse_file(), {'headers': [], 'rows': []})
+
+    def test_undecodable_file(self):
+        with self.assertRaisesMessage(ValueError, '无法解码文件'):
+            make_data_file(b'\xff\xfe\xfa\xfb,\x81\n').parse_file()
+
+
+@mock.patch('testcases.models.DATA_FILE_CHUNK_SIZE', 5)
+class JsonStreamingTest(SimpleTestCase):
+    """JSON数组增量解析"""
+
+    def test_rows_use_union_of_keys(self):
+        items = [{'b': 1, 'a': '中文'}, {'c': [1, 2]}, {'a': 12345678}]
+        data_file = make_data_file(json.dumps(items, ensure_ascii=False, indent=2), 'json')
+        headers, rows = data_file.open_rows()
+        self.assertEqual(headers, ['a', 'b', 'c'])
+        self.assertEqual(list(rows), [['中文', '1', ''], ['', '', '[1, 2]'], ['12345678', '', '']])
+
+    def test_empty_array(self):
+        self.assertEqual(make_data_file(' [ ] ', 'json').parse_file(), {'headers': [], 'rows': []})
+
+    def test_top_level_must_be_array(self):
+        with self.assertRaisesMessage(ValueError, '对象数组格式'):
+            make_data_file('{"a": 1}', 'json').parse_file()
+
+    def test_items_must_be_objects(self):
+        with self.assertRaisesMessage(ValueError, '每个元素必须是对象'):
+            make_data_file('[{"a": 1}, 2]', 'json').parse_file()
+
+    def test_malformed_array(self):
+        for content in ['[{"a": 1} {"a": 2}]', '[{"a": 1}', '[{"a": 1}] x', '[{"a": }]']:
+            with self.subTest(content=content):
+                with self.assertRaisesMessage(ValueError, 'JSON格式错误'):
+                    make_data_file(content, 'json').parse_file()
+
+    def test_items_spanning_many_chunks(self):
+        items = [{'text': '中' * 300 + '\\u4e2d', 'flag': True, 'value': -1.5e3}, {'text': 'x', 'flag': None}]
+        data_file = make_data_file(json.dumps(items), 'json')
+        self.assertEqual(list(data_file.iter_rows()), [['True', '中' * 300 + '\\u4e2d', '-1500.0'], ['None', 'x', '']])
+
+    def test_malformed_item_does_not_read_rest_of_file(self):
+        """元素格式错误时立即报告，不会把剩余的文件读入内存"""
+        content = '[{"a": 1}, {"a": 1 2}, ' + ', '.join(['{"a": 1}'] * 1000) + ']'
+        data_file = make_data_file(content, 'json')
+        data_file.encoding = 'utf-8'
+        with self.assertRaisesMessage(ValueError, 'JSON格式错误'):
+            list(data_file.iter_rows())
+        self.assertLess(data_file.file.tell(), 100)
@@ -0,0 +1,65 @@
+"""
+环境变量版本缓存单元测试
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from environments.models import Environment
+from utils.cache_utils import cache_environment_variables, get_environment_version
+
+User = get_user_model()
+
+
+class EnvironmentVariableCacheTest(TestCase):
+    """环境变量缓存测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='runner', password='testpass123')
+        self.environment = Environment.objects.create(name='测试环境', created_by=self.user)
+        self.variable = self.environment.variables.create(key='host', value='example.com')
+
+    def test_cached_reads_do_not_query(self):
+        """缓存命中后不再查询数据库"""
+        self.assertEqual(cache_environment_variables(self.environment.id), {'host': 'example.com'})
+        with self.assertNumQueries(0):
+            self.assertEqual(cache_environment_variables(self.environment.id), {'host': 'example.com'})
+
+    def test_save_and_delete_bump_version(self):
+        """变量保存、删除后版本号递增，立即读取到新值"""
+        cache_environment_variables(self.environment.id)
+        version = get_environment_version(self.environment.id)
+
+        self.variable.value = 'changed.com'
+        self.variable.save()
+        self.assertGreater(get_environment_version(self.environment.id), version)
+        self.assertEqual(cache_environment_variables(self.environment.id), {'host': 'changed.com'})
+
+        self.environment.variables.create(key='token', value='abc')
+        self.variable.delete()
+        self.assertEqual(cache_environment_variables(self.environment.id), {'token': 'abc'})
+
+    def test_commit_bumps_version_again(self):
+        """事务提交后再次递增版本号，提交前被其他进程重新缓存的旧变量随之失效"""
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.variable.value = 'changed.com'
+            self.variable.save()
+        version = get_environment_version(self.environment.id)
+
+        self.assertEqual(len(callbacks), 1)
+        callbacks[0]()
+        self.assertGreater(get_environment_version(self.environment.id), version)
+
+    def test_replace_variables_sees_edits(self):
+        """替换变量接口使用缓存，修改后立即生效"""
+        client = APIClient()
+        client.force_authenticate(user=self.user)
+        url = f'/api/environments/environments/{self.environment.id}/replace_variables/'
+
+        response = client.post(url, {'text': 'http://{{host}}/users'}, format='json')
+        self.assertEqual(response.data['replaced_text'], 'http://example.com/users')
+
+        self.variable.value = 'changed.com'
+        self.variable.save()
+        response = client.post(url, {'text': 'http://{{host}}/users'}, format='json')
+        self.assertEqual(response.data['replaced_text'], 'http://changed.com/users')
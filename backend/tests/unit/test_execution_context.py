@@ -0,0 +1,51 @@
+"""
+执行上下文单元测试
+"""
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+
+from api_test.execution import ExecutionContext
+from api_test.models import ApiDefinition, ApiTestCase
+from environments.models import Environment, EnvironmentUsageLog
+
+User = get_user_model()
+
+
+class EnvironmentSnapshotTest(TestCase):
+    """环境变量快照测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='runner', password='testpass123')
+        self.environment = Environment.objects.create(name='测试环境', created_by=self.user)
+        self.environment.variables.create(key='host', value='example.com')
+        api = ApiDefinition.objects.create(name='用户列表', url='http://{{host}}/users')
+        self.test_case = ApiTestCase.objects.create(name='用户列表用例', api=api)
+
+    def test_snapshot_is_resolved_once(self):
+        """同一次执行中环境变量只查询一次，快照只读"""
+        context = ExecutionContext()
+        with self.assertNumQueries(1):
+            first = context.get_environment_snapshot(self.environment)
+            second = context.get_environment_snapshot(self.environment)
+        self.assertIs(first, second)
+        self.assertEqual(dict(first.variables), {'host': 'example.com'})
+        with self.assertRaises(TypeError):
+            first.variables['host'] = 'other.com'
+
+        # 执行过程中修改环境变量不影响已生成的快照
+        self.environment.variables.update(value='changed.com')
+        self.assertEqual(context.get_environment_snapshot(self.environment).variables['host'], 'example.com')
+        context.close()
+
+    def test_usage_is_logged_on_close(self):
+        """使用情况在执行结束时汇总写入一条日志"""
+        with ExecutionContext() as context:
+            for row_number in range(1, 4):
+                context.record_environment_usage(self.environment, self.user, self.test_case, row_number)
+            self.assertEqual(EnvironmentUsageLog.objects.count(), 0)
+
+        log = EnvironmentUsageLog.objects.get()
+        self.assertEqual(log.action, 'api_test')
+        self.assertEqual(log.context['case_count'], 1)
+        self.assertEqual(log.context['row_count'], 3)
+        self.assertEqual(log.context['apis'][0]['url'], 'http://{{host}}/users')
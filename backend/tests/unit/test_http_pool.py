@@ -0,0 +1,73 @@
+"""
+HTTP连接池单元测试
+"""
+
+from unittest import TestCase
+
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+
+from api_test.http_pool import SessionPool, StaleConnectionRetry
+
+
+class SessionPoolTest(TestCase):
+    """SessionPool测试"""
+
+    def setUp(self):
+        self.pool = SessionPool(pool_maxsize=4, keep_alive=True, stale_retries=1)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_session_reused_per_host_and_environment(self):
+        """同一环境下同一主机复用会话，不同主机或环境使用独立会话"""
+        session = self.pool.get_session('https://api.example.com/users/1', environment=1)
+
+        self.assertIs(session, self.pool.get_session('https://API.example.com/orders', environment=1))
+        self.assertIsNot(session, self.pool.get_session('https://other.example.com/', environment=1))
+        self.assertIsNot(session, self.pool.get_session('https://api.example.com/users/1', environment=2))
+        self.assertIsNot(session, self.pool.get_session('http://api.example.com/users/1', environment=1))
+
+    def test_session_does_not_keep_cookies(self):
+        """复用的会话不保存响应Cookie"""
+        session = self.pool.get_session('https://api.example.com/')
+        self.assertFalse(session.cookies.get_policy().set_ok(None, None))
+
+    def test_keep_alive_disabled(self):
+        """关闭keep-alive时请求携带 Connection: close"""
+        pool = SessionPool(keep_alive=False)
+        session = pool.get_session('https://api.example.com/')
+        self.assertEqual(session.headers['Connection'], 'close')
+        pool.close()
+
+    def test_close_releases_sessions(self):
+        """关闭后重新获取会创建新会话"""
+        session = self.pool.get_session('https://api.example.com/')
+        self.pool.close()
+        self.assertIsNot(session, self.pool.get_session('https://api.example.com/'))
+
+
+class StaleConnectionRetryTest(TestCase):
+    """失效连接重试策略测试"""
+
+    def setUp(self):
+        self.retry = StaleConnectionRetry(total=1, connect=0, read=1, status=0, other=0)
+
+    def test_retries_idempotent_request_on_dropped_connection(self):
+        """复用连接被关闭时幂等请求重试一次"""
+        error = ProtocolError('Connection aborted.', ConnectionResetError())
+        retry = self.retry.increment('GET', '/users', error=error)
+        self.assertIsInstance(retry, StaleConnectionRetry)
+        with self.assertRaises(MaxRetryError):
+            retry.increment('GET', '/users', error=error)
+
+    def test_does_not_retry_non_idempotent_request(self):
+        """POST请求不重试"""
+        error = ProtocolError('Connection aborted.', ConnectionResetError())
+        with self.assertRaises(ProtocolError):
+            self.retry.increment('POST', '/users', error=error)
+
+    def test_does_not_retry_connection_refused(self):
+        """连接被拒绝不属于失效连接，不重试"""
+        error = NewConnectionError(None, 'Connection refused')
+        with self.assertRaises(MaxRetryError):
+            self.retry.increment('GET', '/users', error=error)
@@ -0,0 +1,101 @@
+"""
+请求分阶段计时单元测试
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import TestCase
+
+from django.test import TestCase as DjangoTestCase
+from rest_framework.test import APIClient
+
+from api_test.http_pool import SessionPool
+from api_test.http_timing import measure
+from api_test.models import ApiDefinition, ApiTestCase, ApiTestResult, TestRun
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        body = b'x' * 1024
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class PhaseTimingTest(TestCase):
+    """连接阶段计时测试"""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.url = f'http://localhost:{cls.server.server_port}/ping'
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        self.pool = SessionPool(keep_alive=True)
+
+    def tearDown(self):
+        self.pool.close()
+
+    def test_new_connection_records_dns_and_connect(self):
+        """新建连接时记录DNS解析和TCP连接耗时，复用连接时为 0"""
+        with measure() as first:
+            self.pool.request('GET', self.url, timeout=5).content
+        self.assertFalse(first.connection_reused)
+        self.assertGreater(first.dns, 0)
+        self.assertGreater(first.connect, 0)
+        self.assertEqual(first.tls, 0)
+
+        with measure() as second:
+            self.pool.request('GET', self.url, timeout=5).content
+        self.assertTrue(second.connection_reused)
+        self.assertEqual(second.setup, 0)
+
+    def test_requests_outside_measure_not_timed(self):
+        """没有在 measure() 中发送的请求正常执行"""
+        response = self.pool.request('GET', self.url, timeout=5)
+        self.assertEqual(len(response.content), 1024)
+
+
+class TimingStatisticsTest(DjangoTestCase):
+    """统计接口汇总分阶段耗时"""
+
+    def test_statistics_average_phases(self):
+        api = ApiDefinition.objects.create(name='用户列表', url='http://example.com/users')
+        test_case = ApiTestCase.objects.create(name='用户列表用例', api=api)
+        test_run = TestRun.objects.create(name='分阶段')
+        ApiTestResult.objects.create(
+            test_case=test_case, test_run=test_run, status='passed', response_time=40,
+            dns_time=4, connect_time=6, tls_time=0, wait_time=20, transfer_time=10,
+            bytes_received=1000, connection_reused=False
+        )
+        ApiTestResult.objects.create(
+            test_case=test_case, test_run=test_run, status='passed', response_time=20,
+            dns_time=0, connect_time=0, tls_time=0, wait_time=16, transfer_time=4,
+            bytes_received=500, connection_reused=True
+        )
+        # 没有分阶段耗时的结果不参与平均
+        ApiTestResult.objects.create(test_case=test_case, test_run=test_run, status='error')
+
+        response = APIClient().get(f'/api/reports/test-runs/{test_run.id}/statistics/')
+
+        timing = response.data['api_statistics'][0]['timing']
+        self.assertEqual(timing['dns_time'], 2)
+        self.assertEqual(timing['wait_time'], 18)
+        self.assertEqual(timing['transfer_time'], 7)
+        self.assertEqual(timing['bytes_received'], 1500)
+        self.assertEqual(timing['new_connections'], 1)
+        self.assertEqual(timing['reused_connections'], 1)
+        self.assertEqual(response.data['summary']['timing'], timing)
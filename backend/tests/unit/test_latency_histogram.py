@@ -0,0 +1,43 @@
+"""
+延迟直方图单元测试
+"""
+import random
+
+from django.test import SimpleTestCase
+
+from utils.histogram_utils import LatencyHistogram
+
+
+class LatencyHistogramTest(SimpleTestCase):
+    """延迟直方图测试"""
+
+    def test_percentiles_within_relative_accuracy(self):
+        """分位数估计值的相对误差不超过精度"""
+        rng = random.Random(7)
+        values = sorted(rng.lognormvariate(3, 1) for _ in range(10000))
+        histogram = LatencyHistogram()
+        for value in values:
+            histogram.record(value)
+
+        for percent in (50, 90, 99, 99.9):
+            exact = values[int(len(values) * percent / 100) - 1]
+            self.assertAlmostEqual(histogram.percentile(percent) / exact, 1, delta=0.011)
+        self.assertEqual(histogram.count, 10000)
+        self.assertEqual(histogram.max, values[-1])
+
+    def test_merge_and_serialization(self):
+        """合并后的直方图与整体记录的结果一致，序列化后可还原"""
+        whole, first, second = LatencyHistogram(), LatencyHistogram(), LatencyHistogram()
+        for value in range(1, 1001):
+            whole.record(value)
+            (first if value % 2 else second).record(value)
+
+        merged = LatencyHistogram.from_dict(first.to_dict()).merge(second)
+        self.assertEqual(merged.to_dict(), whole.to_dict())
+        self.assertEqual(merged.percentile(99), whole.percentile(99))
+
+    def test_zero_and_empty(self):
+        histogram = LatencyHistogram()
+        self.assertIsNone(histogram.percentile(50))
+        histogram.record(0)
+        self.assertEqual(histogram.percentile(50), 0.0)
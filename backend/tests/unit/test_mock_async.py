@@ -0,0 +1,65 @@
+"""
+异步Mock视图单元测试
+"""
+import asyncio
+import json
+import time
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, TestCase, override_settings
+
+from mock_server import routing
+from mock_server.models import MockAPI, MockAPIUsageLog
+from mock_server.views import AsyncServeMockAPIView
+
+User = get_user_model()
+
+
+@override_settings(MOCK_ROUTE_VERSION_CHECK_INTERVAL=3600, MOCK_USAGE_LOG_MODE='off')
+class AsyncServeMockAPIViewTest(TestCase):
+    """异步Mock视图测试"""
+
+    def setUp(self):
+        cache.clear()
+        routing.invalidate_routes()
+        self.user = User.objects.create_user(username='mocker', password='testpass123')
+        MockAPI.objects.create(
+            name='慢接口', path='/slow/{id}', method='GET', created_by=self.user,
+            response_body='{"id": "{{id}}"}', delay_ms=200
+        )
+        self.view = AsyncServeMockAPIView.as_view()
+        self.factory = AsyncRequestFactory()
+
+    async def serve(self, path):
+        return await self.view(self.factory.get(f'/mock/{path}'), full_path=path)
+
+    async def test_delays_do_not_block_each_other(self):
+        """并发的延迟请求同时等待，总耗时接近单个请求的延迟"""
+        await sync_to_async(routing.get_route_table)()
+
+        started = time.monotonic()
+        responses = await asyncio.gather(*(self.serve(f'slow/{i}') for i in range(50)))
+        elapsed = time.monotonic() - started
+
+        self.assertLess(elapsed, 2.0)
+        self.assertEqual([response.status_code for response in responses], [200] * 50)
+        self.assertEqual(responses[7]['Content-Type'], 'application/json')
+        self.assertEqual(responses[7].content, b'{"id": "7"}')
+
+    async def test_not_found(self):
+        response = await self.serve('missing')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(json.loads(response.content)['available_mocks'], ['GET /slow/{id} (慢接口)'])
+
+    @override_settings(MOCK_USAGE_LOG_MODE='immediate')
+    async def test_usage_logged(self):
+        """立即写入模式下在线程中保存使用日志"""
+        await MockAPI.objects.filter(path='/slow/{id}').aupdate(delay_ms=0)
+        routing.invalidate_routes()
+
+        response = await self.serve('slow/1')
+        self.assertEqual(response.status_code, 200)
+        count = await MockAPIUsageLog.objects.filter(request_path='/slow/1').acount()
+        self.assertEqual(count, 1)
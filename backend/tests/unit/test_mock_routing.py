@@ -0,0 +1,149 @@
+"""
+Mock路由表单元测试
+"""
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from mock_server import routing
+from mock_server.models import MockAPI
+from mock_server.routing import RouteTrie, parse_path_pattern
+
+User = get_user_model()
+
+
+@override_settings(MOCK_ROUTE_VERSION_CHECK_INTERVAL=3600, MOCK_USAGE_LOG_MODE='immediate')
+class MockRouteTableTest(TestCase):
+    """Mock路由表测试"""
+
+    def setUp(self):
+        cache.clear()
+        routing.invalidate_routes()
+        self.user = User.objects.create_user(username='mocker', password='testpass123')
+        self.mock_api = MockAPI.objects.create(
+            name='用户详情', path='/users/1', method='GET', created_by=self.user,
+            response_body='{"id": 1, "name": "张三"}', response_headers={'X-Mock': 'yes'}
+        )
+
+    def test_hit_does_not_query_route(self):
+        """路由表加载后命中Mock只写入使用日志，不再查询Mock"""
+        self.client.get('/mock/users/1')
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/mock/users/1/')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(response['X-Mock'], 'yes')
+        self.assertEqual(response.json(), {'id': 1, 'name': '张三'})
+        self.assertEqual(self.mock_api.usage_logs.count(), 2)
+
+    def test_save_and_delete_invalidate_routes(self):
+        """Mock修改、停用后立即生效"""
+        self.client.get('/mock/users/1')
+
+        self.mock_api.response_status_code = 201
+        self.mock_api.save()
+        self.assertEqual(self.client.get('/mock/users/1').status_code, 201)
+
+        self.mock_api.is_active = False
+        self.mock_api.save()
+        response = self.client.get('/mock/users/1')
+        self.assertEqual(response.status_code, 404)
+        self.assertEqual(response.json()['available_mocks'], [])
+
+    def test_other_process_reloads_on_version_change(self):
+        """其他进程修改Mock后递增共享版本号，本进程在下次检查时重新加载"""
+        table = routing.get_route_table()
+        self.assertIs(routing.get_route_table(), table)
+
+        # 模拟其他进程：数据已变化但本进程的路由表没有被直接清除
+        MockAPI.objects.filter(pk=self.mock_api.pk).update(response_status_code=500)
+        routing.bump_routes_version()
+        with override_settings(MOCK_ROUTE_VERSION_CHECK_INTERVAL=0):
+            reloaded = routing.get_route_table()
+        self.assertIsNot(reloaded, table)
+        self.assertEqual(reloaded.match('GET', '/users/1')[0].status_code, 500)
+
+    def test_commit_notifies_other_processes(self):
+        """事务提交后再次递增版本号"""
+        with mock.patch('mock_server.signals.invalidate_routes') as invalidate:
+            with self.captureOnCommitCallbacks(execute=True):
+                self.mock_api.save()
+        self.assertEqual(invalidate.call_count, 2)
+
+
+class RouteTrieTest(SimpleTestCase):
+    """路径模板匹配测试"""
+
+    def setUp(self):
+        self.trie = RouteTrie()
+        for method, path in [
+            ('GET', '/users/me'),
+            ('GET', '/users/{id:\\d+}'),
+            ('GET', '/users/{name}'),
+            ('POST', '/users/{id}'),
+            ('GET', '/users/{id}/orders/*'),
+            ('GET', '/static/**'),
+            ('GET', '/'),
+        ]:
+            self.trie.insert(parse_path_pattern(path), method, path)
+
+    def match(self, method, path):
+        found = self.trie.match(method, path)
+        return found and (found[0], found[1])
+
+    def test_most_specific_match(self):
+        """静态段优先于带正则的参数，带正则的参数优先于普通参数"""
+        self.assertEqual(self.match('GET', '/users/me'), ('/users/me', {}))
+        self.assertEqual(self.match('GET', '/users/42'), ('/users/{id:\\d+}', {'id': '42'}))
+        self.assertEqual(self.match('GET', '/users/alice'), ('/users/{name}', {'name': 'alice'}))
+        self.assertEqual(self.match('GET', '/'), ('/', {}))
+
+    def test_backtracks_on_method(self):
+        """更具体的模板方法不匹配时尝试其他模板"""
+        self.assertEqual(self.match('POST', '/users/me'), ('/users/{id}', {'id': 'me'}))
+        self.assertIsNone(self.match('DELETE', '/users/1'))
+
+    def test_wildcards(self):
+        """* 匹配一段，** 匹配剩余的一段或多段"""
+        self.assertEqual(self.match('GET', '/users/7/orders/99'), ('/users/{id}/orders/*', {'id': '7'}))
+        self.assertIsNone(self.match('GET', '/users/7/orders/99/items'))
+        self.assertEqual(self.match('GET', '/static/js/app.js')[0], '/static/**')
+        self.assertIsNone(self.match('GET', '/static'))
+
+    def test_invalid_patterns(self):
+        for path in ['/files/**/name', '/users/{id:[}', '/users/{id}/{id}', '/users/{id']:
+            with self.assertRaises(ValueError):
+                parse_path_pattern(path)
+
+
+@override_settings(MOCK_ROUTE_VERSION_CHECK_INTERVAL=3600, MOCK_USAGE_LOG_MODE='off')
+class PathParameterResponseTest(TestCase):
+    """路径参数替换测试"""
+
+    def setUp(self):
+        cache.clear()
+        routing.invalidate_routes()
+        self.user = User.objects.create_user(username='mocker', password='testpass123')
+
+    def test_params_rendered_into_response(self):
+        MockAPI.objects.create(
+            name='订单详情', path='/users/{user_id}/orders/{order_id:\\d+}', method='GET', created_by=self.user,
+            response_body='{"user": "{{user_id}}", "order": {{order_id}}}', response_headers={'X-Order': '{{order_id}}'}
+        )
+
+        response = self.client.get('/mock/users/u1/orders/1001')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json(), {'user': 'u1', 'order': 1001})
+        self.assertEqual(response['X-Order'], '1001')
+        self.assertEqual(self.client.get('/mock/users/u1/orders/abc').status_code, 404)
+
+    def test_invalid_template_rejected(self):
+        response = self.client.post('/api/mock-server/mocks/', {
+            'name': '无效', 'path': '/users/{id:[}', 'method': 'GET', 'response_body': '{}'
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('path', response.json())
@@ -0,0 +1,202 @@
+"""
+Mock网络状况模拟单元测试
+"""
+import random
+import statistics
+import threading
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import AsyncRequestFactory, RequestFactory, SimpleTestCase, TestCase, override_settings
+
+from mock_server import routing
+from mock_server.models import MockAPI, MockAPIUsageLog
+from mock_server.simulation import MockBehavior, MockConnectionDropped, parse_latency
+from mock_server.views import AsyncServeMockAPIView
+
+User = get_user_model()
+
+
+class LatencyDistributionTest(SimpleTestCase):
+    """延迟分布测试"""
+
+    def samples(self, config, count=5000):
+        rng = random.Random(1)
+        distribution = parse_latency(config)
+        return sorted(distribution.sample(rng) for _ in range(count))
+
+    def test_distributions(self):
+        self.assertEqual(set(self.samples({'type': 'fixed', 'ms': 30}, 10)), {30})
+
+        uniform = self.samples({'type': 'uniform', 'min_ms': 50, 'max_ms': 150})
+        self.assertGreaterEqual(uniform[0], 50)
+        self.assertLessEqual(uniform[-1], 150)
+
+        normal = self.samples({'type': 'normal', 'mean_ms': 10, 'stddev_ms': 20})
+        self.assertEqual(normal[0], 0)
+        self.assertAlmostEqual(statistics.median(normal), 10, delta=2)
+
+        lognormal = self.samples({'type': 'lognormal', 'median_ms': 80, 'sigma': 0.6, 'max_ms': 500})
+        self.assertAlmostEqual(statistics.median(lognormal), 80, delta=5)
+        self.assertGreater(lognormal[int(len(lognormal) * 0.99)], 250)
+        self.assertLessEqual(lognormal[-1], 500)
+
+    def test_percentiles(self):
+        """按指定的分位数生成延迟"""
+        samples = self.samples({'type': 'percentile', 'percentiles': {'50': 20, '90': 100, '99': 400, '100': 1000}})
+        self.assertEqual(samples[0], 20)
+        self.assertLessEqual(samples[-1], 1000)
+        for percentile, value in [(0.5, 20), (0.9, 100), (0.99, 400)]:
+            below = sum(1 for sample in samples if sample <= value) / len(samples)
+            self.assertAlmostEqual(below, percentile, delta=0.02)
+
+    def test_invalid_config(self):
+        self.assertIsNone(parse_latency({}))
+        for config in [
+            {'type': 'gamma'},
+            {'type': 'fixed'},
+            {'type': 'uniform', 'min_ms': 100, 'max_ms': 10},
+            {'type': 'uniform', 'min_ms': 100, 'max_ms': 60000},
+            {'type': 'normal', 'mean_ms': '100', 'stddev_ms': 10},
+            {'type': 'lognormal', 'median_ms': 0, 'sigma': 1},
+            {'type': 'percentile', 'percentiles': {'50': 100, '90': 10}},
+            {'type': 'percentile', 'percentiles': {'150': 100}},
+            [100],
+        ]:
+            with self.assertRaises(ValueError, msg=config):
+                parse_latency(config)
+
+
+class MockBehaviorTest(SimpleTestCase):
+    """随机种子和故障注入测试"""
+
+    def behavior(self, **kwargs):
+        options = {'latency': parse_latency({'type': 'lognormal', 'median_ms': 50, 'sigma': 1}), 'seed': 42}
+        options.update(kwargs)
+        return MockBehavior(1, **options)
+
+    def plans(self, behavior, count=50):
+        """模拟压测工具在 X-Mock-Seed 中发送请求序号"""
+        return [behavior.plan(str(n), 'GET /mock/simulated?') for n in range(count)]
+
+    def test_seed_reproducible(self):
+        """同一种子下相同请求的结果固定，与进程内状态无关（每次新建相当于其他worker或Mock重新保存后）"""
+        first = self.plans(self.behavior())
+        self.assertEqual(self.plans(self.behavior()), first)
+        self.assertEqual(len(set(first)), len(first))
+        self.assertNotEqual(self.plans(self.behavior(seed=7)), first)
+
+    def test_seed_independent_of_order(self):
+        """多个线程以任意顺序命中时，每个请求的结果与顺序命中相同"""
+        behavior = self.behavior()
+        expected = dict(enumerate(self.plans(behavior, 200)))
+        plans = {}
+
+        def hit(offset):
+            for n in range(offset, 200, 4):
+                plans[n] = behavior.plan(str(n), 'GET /mock/simulated?')
+
+        threads = [threading.Thread(target=hit, args=(offset,)) for offset in reversed(range(4))]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(plans, expected)
+
+    def test_request_key(self):
+        """同一种子下相同的请求结果相同，路径或查询参数不同时结果不同"""
+        behavior = self.behavior()
+        plans = [behavior.plan(None, key) for key in ('GET /mock/a?', 'GET /mock/a?', 'GET /mock/a?page=2')]
+        self.assertEqual(plans[0], plans[1])
+        self.assertNotEqual(plans[0], plans[2])
+
+    def test_request_seed_without_mock_seed(self):
+        """没有配置种子时只有带 X-Mock-Seed 的请求结果固定"""
+        behavior = self.behavior(seed=None)
+        self.assertEqual(behavior.plan('abc'), behavior.plan('abc'))
+        self.assertNotEqual(len({behavior.plan() for _ in range(20)}), 1)
+
+    def test_fault_rates(self):
+        behavior = self.behavior(latency=None, delay_ms=10, error_rate=0.2, drop_rate=0.1)
+        faults = [plan.fault for plan in self.plans(behavior, 5000)]
+        self.assertAlmostEqual(faults.count('drop') / len(faults), 0.1, delta=0.02)
+        self.assertAlmostEqual(faults.count('error') / len(faults), 0.18, delta=0.02)
+        self.assertEqual(behavior.plan().delay, 0.01)
+
+
+@override_settings(MOCK_ROUTE_VERSION_CHECK_INTERVAL=3600, MOCK_USAGE_LOG_MODE='immediate')
+class SimulatedResponseTest(TestCase):
+    """模拟故障和限速的Mock响应测试"""
+
+    def setUp(self):
+        cache.clear()
+        routing.invalidate_routes()
+        self.user = User.objects.create_user(username='mocker', password='testpass123')
+        self.body = '{"data": "%s"}' % ('x' * 2490)
+
+    def create_mock(self, **kwargs):
+        return MockAPI.objects.create(
+            name='模拟', path='/simulated', method='GET', created_by=self.user, response_body=self.body, **kwargs
+        )
+
+    def test_injected_error(self):
+        self.create_mock(error_rate=1, error_status_code=502)
+        response = self.client.get('/mock/simulated')
+        self.assertEqual(response.status_code, 502)
+        self.assertEqual(response.json()['error'], 'Injected fault')
+        self.assertEqual(MockAPIUsageLog.objects.get().response_status_code, 502)
+
+    def test_bandwidth_throttled(self):
+        """200kbps 即 25000字节/秒，2500字节的响应体约需0.1秒"""
+        self.create_mock(bandwidth_kbps=200)
+        started = time.monotonic()
+        response = self.client.get('/mock/simulated')
+        content = b''.join(response.streaming_content)
+        self.assertGreaterEqual(time.monotonic() - started, 0.08)
+        self.assertEqual(content.decode(), self.body)
+        self.assertEqual(response['Content-Length'], str(len(self.body)))
+
+    def test_dropped_connection(self):
+        """中断连接时只发送一半响应体"""
+        self.create_mock(drop_rate=1)
+        response = self.client.get('/mock/simulated')
+        self.assertEqual(response['Content-Length'], str(len(self.body)))
+        received = []
+        with self.assertRaises(MockConnectionDropped):
+            for chunk in response.streaming_content:
+                received.append(chunk)
+        self.assertEqual(len(b''.join(received)), len(self.body) // 2)
+
+    def test_request_seed_header(self):
+        """请求头 X-Mock-Seed 相同时延迟相同"""
+        self.create_mock(latency={'type': 'uniform', 'min_ms': 0, 'max_ms': 1000})
+        mock, _ = routing.get_route_table().match('GET', '/simulated')
+        factory = RequestFactory()
+        plans = [mock.plan(factory.get('/mock/simulated', HTTP_X_MOCK_SEED=seed)) for seed in ('1', '1', '2')]
+        self.assertEqual(plans[0], plans[1])
+        self.assertNotEqual(plans[0], plans[2])
+
+    def test_invalid_latency_rejected(self):
+        response = self.client.post('/api/mock-server/mocks/', {
+            'name': '无效', 'path': '/invalid', 'method': 'GET', 'response_body': '{}',
+            'latency': {'type': 'uniform', 'min_ms': 10}, 'drop_rate': 2
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('latency', response.json())
+        self.assertIn('drop_rate', response.json())
+
+    async def test_async_view_throttled(self):
+        """异步视图限速发送时同样按速率分块"""
+        await MockAPI.objects.acreate(
+            name='模拟', path='/simulated', method='GET', created_by=self.user, response_body=self.body,
+            bandwidth_kbps=200
+        )
+        routing.invalidate_routes()
+        with self.settings(MOCK_USAGE_LOG_MODE='off'):
+            request = AsyncRequestFactory().get('/mock/simulated')
+            response = await AsyncServeMockAPIView.as_view()(request, full_path='simulated')
+            started = time.monotonic()
+            content = b''.join([chunk async for chunk in response.streaming_content])
+        self.assertGreaterEqual(time.monotonic() - started, 0.08)
+        self.assertEqual(content.decode(), self.body)
@@ -0,0 +1,111 @@
+"""
+Mock使用日志写入单元测试
+"""
+import time
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, override_settings
+
+from mock_server import routing
+from mock_server.models import MockAPI, MockAPIUsageLog
+from mock_server.usage_log import MAX_LOGGED_BODY, UsageLogWriter, build_usage_log, capture_usage
+
+User = get_user_model()
+
+
+@override_settings(MOCK_ROUTE_VERSION_CHECK_INTERVAL=3600, MOCK_USAGE_LOG_MODE='buffered')
+class UsageLogWriterTest(TestCase):
+    """使用日志批量写入测试"""
+
+    def setUp(self):
+        cache.clear()
+        routing.invalidate_routes()
+        user = User.objects.create_user(username='mocker', password='testpass123')
+        self.mock_api = MockAPI.objects.create(name='健康检查', path='/health', method='GET', created_by=user)
+        # 不启动后台线程，由测试在当前线程中写入
+        self.writer = UsageLogWriter(queue_size=3, batch_size=2, flush_interval=3600)
+        patcher = mock.patch('mock_server.usage_log.get_usage_log_writer', return_value=self.writer)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_hit_only_enqueues(self):
+        """命中Mock时不访问数据库，日志批量写入"""
+        self.client.get('/mock/health')
+        with self.assertNumQueries(0):
+            self.client.get('/mock/health', HTTP_AUTHORIZATION='Bearer secret', HTTP_X_TRACE='abc')
+        self.assertEqual(MockAPIUsageLog.objects.count(), 0)
+
+        self.writer.flush()
+        logs = list(MockAPIUsageLog.objects.order_by('id'))
+        self.assertEqual(len(logs), 2)
+        self.assertEqual(logs[1].request_headers['X-Trace'], 'abc')
+        self.assertNotIn('Authorization', logs[1].request_headers)
+        self.assertEqual(self.writer.get_stats()['written'], 2)
+
+    def test_overflow_dropped(self):
+        """队列已满时丢弃新日志并计数"""
+        for _ in range(5):
+            self.client.get('/mock/health')
+        stats = self.writer.get_stats()
+        self.assertEqual(stats['queued'], 3)
+        self.assertEqual(stats['dropped'], 2)
+        self.assertEqual(stats['pending'], 3)
+
+    @override_settings(MOCK_USAGE_LOG_SAMPLE_RATE=0.5)
+    def test_sampling(self):
+        with mock.patch('mock_server.usage_log.random.random', side_effect=[0.2, 0.7, 0.4]):
+            for _ in range(3):
+                self.client.get('/mock/health')
+        stats = self.writer.get_stats()
+        self.assertEqual(stats['queued'], 2)
+        self.assertEqual(stats['sampled_out'], 1)
+
+    def test_logs_of_deleted_mock_discarded(self):
+        """排队期间Mock被删除时，对应的日志在写入时丢弃"""
+        request = RequestFactory().get('/mock/health')
+        self.writer.submit(capture_usage(self.mock_api.pk, request, '/health', 'GET', 200))
+        self.writer.submit(capture_usage(self.mock_api.pk + 100, request, '/gone', 'GET', 200))
+        self.writer.flush()
+
+        self.assertEqual(MockAPIUsageLog.objects.count(), 1)
+        self.assertEqual(self.writer.get_stats()['dropped'], 1)
+
+    def test_formatting_done_by_writer(self):
+        """请求线程只保存原始数据，请求头和请求体在写入时格式化"""
+        factory = RequestFactory()
+        long_body = ('中' * (MAX_LOGGED_BODY + 10)).encode('utf-8')
+        cases = [
+            (b'{"a": 1}', '{"a": 1}'),
+            (long_body, '中' * MAX_LOGGED_BODY + '...[truncated]'),
+            (long_body * 2, '中' * MAX_LOGGED_BODY + '...[truncated]'),
+            (b'\xff\xfe', '[Binary data]'),
+        ]
+        for body, expected in cases:
+            request = factory.post('/mock/health', body, content_type='application/json', HTTP_X_TRACE='abc')
+            captured = capture_usage(self.mock_api.pk, request, '/health', 'POST', 200)
+            self.assertIsInstance(captured.meta, dict)
+            usage_log = build_usage_log(captured)
+            self.assertEqual(usage_log.request_body, expected)
+            self.assertEqual(usage_log.request_headers['X-Trace'], 'abc')
+
+    def test_stop_waits_for_writer_thread(self):
+        """退出时先等待后台线程写完当前批次，再写入剩余的日志"""
+        writer = UsageLogWriter(queue_size=10, batch_size=2, flush_interval=3600)
+        batches = []
+
+        def slow_write(batch):
+            time.sleep(0.05)
+            batches.append(list(batch))
+
+        request = RequestFactory().get('/mock/health')
+        with mock.patch.object(writer, '_write', side_effect=slow_write):
+            writer.start()
+            for _ in range(3):
+                writer.submit(capture_usage(self.mock_api.pk, request, '/health', 'GET', 200))
+            writer.stop()
+
+        self.assertFalse(writer._thread.is_alive())
+        self.assertEqual(sum(len(batch) for batch in batches), 3)
+        self.assertEqual(writer.get_stats()['pending'], 0)
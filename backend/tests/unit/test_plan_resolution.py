@@ -0,0 +1,128 @@
+"""
+测试计划用例解析单元测试
+"""
+
+import importlib
+import shutil
+import tempfile
+
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+
+from api_test.models import ApiDefinition, ApiTestCase, TestRun
+from api_test.views import ApiTestService
+from testcases.models import TestCase as TestCaseModel, TestDataFile, TestPlan
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class PlanResolutionTest(TestCase):
+    """通过关联表解析测试计划的可执行用例"""
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+
+    def setUp(self):
+        self.api = ApiDefinition.objects.create(name='接口', url='http://example.com', method='GET')
+        self.plan = TestPlan.objects.create(name='计划')
+        self.api_cases = []
+        for i in range(5):
+            test_case = TestCaseModel.objects.create(title=f'功能用例 {i}')
+            TestDataFile.objects.create(
+                name='rows.csv', test_case=test_case, file_type='csv',
+                file=SimpleUploadedFile('rows.csv', b'a\n1\n')
+            )
+            self.plan.test_cases.add(test_case)
+            api_case = ApiTestCase.objects.create(name=f'接口用例 {i}', api=self.api, data_test_case=test_case)
+            api_case.test_cases.add(test_case)
+            self.api_cases.append(api_case)
+        # 已禁用的用例仍然解析出来，执行时记录为错误结果
+        self.inactive = ApiTestCase.objects.create(name='禁用用例', api=self.api, is_active=False)
+        self.inactive.test_cases.add(self.plan.test_cases.first())
+        # 关联到多个计划用例的接口用例只执行一次
+        self.api_cases[0].test_cases.add(*self.plan.test_cases.all())
+
+    def _data_file(self, test_case):
+        TestDataFile.objects.create(
+            name='rows.csv', test_case=test_case, file_type='csv',
+            file=SimpleUploadedFile('rows.csv', b'a\n1\n')
+        )
+
+    def test_resolves_cases_with_constant_queries(self):
+        with self.assertNumQueries(1):
+            cases = ApiTestService.resolve_test_plan_cases(self.plan)
+            data_files = {case.id: ApiTestService.get_data_file(case) for case in cases}
+            apis = [case.api.url for case in cases]
+
+        self.assertCountEqual(data_files, [case.id for case in self.api_cases] + [self.inactive.id])
+        self.assertIsNone(data_files.pop(self.inactive.id))
+        self.assertTrue(all(data_files.values()))
+        self.assertEqual(len(apis), 6)
+
+    def test_inactive_case_recorded_as_error(self):
+        """计划中已禁用的用例仍计入计划用例数，并产生“测试用例已禁用”的错误结果"""
+        user = User.objects.create_user(username='runner', password='testpass123')
+        plan = TestPlan.objects.create(name='禁用用例计划')
+        test_case = self.inactive.test_cases.get()
+        plan.test_cases.add(test_case)
+        ApiTestCase.objects.filter(is_active=True).update(is_active=False)
+        test_run = ApiTestService.execute_test_plan(plan, user, test_run=TestRun.objects.create(
+            name='计划执行', test_plan=plan, executed_by=user
+        ))
+
+        self.assertEqual(test_run.planned_cases, test_case.api_test_cases.count())
+        error = test_run.results.get(test_case=self.inactive)
+        self.assertEqual(error.status, 'error')
+        self.assertEqual(error.error_message, '测试用例已禁用')
+
+    def test_plan_link_does_not_select_data_file(self):
+        """只用于测试计划的关联不会让接口用例变成数据驱动测试"""
+        login = TestCaseModel.objects.create(title='登录')
+        self._data_file(login)
+        api_case = ApiTestCase.objects.create(name='登录成功', api=self.api)
+        api_case.test_cases.add(login)
+
+        self.assertIsNone(ApiTestService.get_data_file(api_case))
+
+    def test_backfill_follows_name_matching(self):
+        ApiTestCase.test_cases.through.objects.all().delete()
+        login = TestCaseModel.objects.create(title='登录')
+        self._data_file(login)
+        data_case = TestCaseModel.objects.create(title='用户列表-数据驱动')
+        self._data_file(data_case)
+        login_api_case = ApiTestCase.objects.create(name='登录成功', api=self.api)
+        list_api_case = ApiTestCase.objects.create(name='用户列表', api=self.api)
+
+        links = importlib.import_module('api_test.migrations.0009_apitestcase_test_cases')
+        links.backfill_test_case_links(apps, None)
+        data_links = importlib.import_module('api_test.migrations.0017_apitestcase_data_test_case')
+        data_links.backfill_data_test_case(apps, None)
+
+        login_api_case.refresh_from_db()
+        list_api_case.refresh_from_db()
+        # 测试计划方向的关联不决定数据文件，数据文件方向的匹配不加入测试计划
+        self.assertEqual(list(login_api_case.test_cases.all()), [login])
+        self.assertIsNone(login_api_case.data_test_case)
+        self.assertEqual(list(list_api_case.test_cases.all()), [])
+        self.assertEqual(list_api_case.data_test_case, data_case)
+
+    def test_data_backfill_removes_mixed_links(self):
+        """清除之前的迁移按数据文件规则写入测试计划关联表的记录"""
+        data_case = TestCaseModel.objects.create(title='用户列表-数据驱动')
+        self._data_file(data_case)
+        list_api_case = ApiTestCase.objects.create(name='用户列表', api=self.api)
+        list_api_case.test_cases.add(data_case)
+
+        data_links = importlib.import_module('api_test.migrations.0017_apitestcase_data_test_case')
+        data_links.backfill_data_test_case(apps, None)
+
+        list_api_case.refresh_from_db()
+        self.assertEqual(list(list_api_case.test_cases.all()), [])
+        self.assertEqual(list_api_case.data_test_case, data_case)
@@ -0,0 +1,95 @@
+"""
+执行进度发布与推送单元测试
+"""
+import json
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.test import APIClient
+
+from api_test.execution import ExecutionContext
+from api_test.models import ApiDefinition, ApiTestCase, ApiTestResult, TestRun
+from api_test.progress import get_published_progress, publish_progress
+
+User = get_user_model()
+
+
+def _parse_events(chunks):
+    events = []
+    for chunk in chunks:
+        chunk = chunk.decode() if isinstance(chunk, bytes) else chunk
+        if chunk.startswith(':'):
+            continue
+        fields = dict(line.split(': ', 1) for line in chunk.strip().split('\n'))
+        events.append((fields['event'], json.loads(fields['data'])))
+    return events
+
+
+@override_settings(API_TEST_PROGRESS_PUBLISH_INTERVAL=0, API_TEST_PROGRESS_STREAM_INTERVAL=0.01)
+class ProgressPublishTest(TestCase):
+    """执行进度发布测试"""
+
+    def setUp(self):
+        cache.clear()
+        api = ApiDefinition.objects.create(name='用户列表', url='http://example.com/users')
+        self.test_case = ApiTestCase.objects.create(name='用户列表用例', api=api)
+        self.test_run = TestRun.objects.create(name='进度', planned_cases=3)
+
+    def test_counters_published_while_running(self):
+        """结果写入后计数立即更新并发布，不需要等到执行结束"""
+        with ExecutionContext(self.test_run, write_mode='immediate') as context:
+            for status in ('passed', 'failed'):
+                context.sink.add(ApiTestResult(test_case=self.test_case, test_run=self.test_run, status=status))
+            context.progress.case_completed()
+
+            progress = get_published_progress(self.test_run.pk)
+            self.assertEqual(progress['results'], 2)
+            self.assertEqual(progress['passed'], 1)
+            self.assertEqual(progress['failed'], 1)
+            self.assertEqual(progress['done'], 1)
+            self.assertEqual(TestRun.objects.get(pk=self.test_run.pk).total_tests, 2)
+
+    def test_complete_does_not_rescan_results(self):
+        """结束时只读取已累加的计数，不再聚合全部结果"""
+        TestRun.objects.filter(pk=self.test_run.pk).update(total_tests=5, passed_tests=5)
+        with self.assertNumQueries(2):
+            self.test_run.complete()
+        self.assertEqual(self.test_run.total_tests, 5)
+        self.assertEqual(get_published_progress(self.test_run.pk)['status'], 'completed')
+
+    def test_manual_complete_recounts_results(self):
+        """手动标记完成、失败时按结果重新统计，不依赖执行过程中累加的计数"""
+        client = APIClient()
+        client.force_authenticate(User.objects.create_user(username='tester', password='testpass123'))
+        for test_run, action in [(self.test_run, 'complete'), (TestRun.objects.create(name='手动'), 'mark_failed')]:
+            TestRun.objects.filter(pk=test_run.pk).update(status='running')
+            for status in ('passed', 'failed'):
+                ApiTestResult.objects.create(test_case=self.test_case, test_run=test_run, status=status)
+
+            response = client.post(f'/api/reports/test-runs/{test_run.pk}/{action}/')
+            self.assertEqual(response.status_code, 200)
+            test_run.refresh_from_db()
+            self.assertEqual((test_run.total_tests, test_run.passed_tests, test_run.failed_tests), (2, 1, 1))
+            self.assertEqual(get_published_progress(test_run.pk)['results'], 2)
+
+    async def test_stream_pushes_until_completed(self):
+        """进度推送在进度变化时发送事件，执行结束后关闭"""
+        await sync_to_async(publish_progress)(await sync_to_async(self.test_run.get_progress)())
+        response = await self.async_client.get(f'/api/reports/test-runs/{self.test_run.pk}/progress/stream/')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        stream = aiter(response.streaming_content)
+        chunks = [await anext(stream), await anext(stream)]
+        await sync_to_async(self.test_run.complete)()
+        chunks.extend([chunk async for chunk in stream])
+
+        events = _parse_events(chunks)
+        self.assertEqual([event for event, _ in events], ['progress', 'progress', 'progress', 'end'])
+        self.assertEqual(events[-2][1]['status'], 'completed')
+        self.assertEqual(events[-1][1], {'id': self.test_run.pk, 'status': 'completed'})
+
+    async def test_stream_missing_run(self):
+        response = await self.async_client.get('/api/reports/test-runs/999999/progress/stream/')
+        self.assertEqual(response.status_code, 404)
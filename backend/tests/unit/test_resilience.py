@@ -0,0 +1,132 @@
+"""
+熔断与重试预算单元测试
+"""
+import socket
+import time
+from unittest import TestCase, mock
+
+import requests
+from django.contrib.auth import get_user_model
+from django.test import TestCase as DjangoTestCase, override_settings
+from urllib3.exceptions import MaxRetryError, NewConnectionError, ProtocolError
+
+from api_test.execution import ExecutionContext
+from api_test.models import ApiDefinition, ApiTestCase, TestRun
+from api_test.resilience import CircuitBreaker, RetryBudget, is_safe_to_retry
+from api_test.views import ApiTestService
+
+User = get_user_model()
+
+
+def _closed_port():
+    """一个当前没有监听的本地端口"""
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+class CircuitBreakerTest(TestCase):
+    """熔断器状态转换测试"""
+
+    def test_opens_after_consecutive_failures(self):
+        """连续失败达到阈值后熔断，中间有成功时重新计数"""
+        breaker = CircuitBreaker(failure_threshold=3, recovery_timeout=60)
+        breaker.record_failure()
+        breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.record_failure()
+        self.assertTrue(breaker.allow())
+
+        breaker.record_failure()
+        self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+        self.assertFalse(breaker.allow())
+
+    def test_half_open_probe(self):
+        """恢复时间过后只放行一个探测请求，探测结果决定是否恢复"""
+        breaker = CircuitBreaker(failure_threshold=1, recovery_timeout=60)
+        breaker.record_failure()
+
+        with mock.patch('api_test.resilience.time.monotonic', return_value=time.monotonic() + 61):
+            self.assertTrue(breaker.allow())
+            self.assertEqual(breaker.state, CircuitBreaker.HALF_OPEN)
+            self.assertFalse(breaker.allow())
+            breaker.record_failure()
+            self.assertEqual(breaker.state, CircuitBreaker.OPEN)
+
+        with mock.patch('api_test.resilience.time.monotonic', return_value=time.monotonic() + 200):
+            self.assertTrue(breaker.allow())
+            breaker.record_success()
+            self.assertEqual(breaker.state, CircuitBreaker.CLOSED)
+            self.assertTrue(breaker.allow())
+
+
+class RetryBudgetTest(TestCase):
+    """重试预算测试"""
+
+    def test_budget_bounds_retries(self):
+        """重试次数不超过初始额度加请求数的比例"""
+        budget = RetryBudget(ratio=0.5, min_retries=1, max_retries=3, backoff_base=0.1, backoff_max=1)
+        for _ in range(4):
+            budget.record_request()
+        granted = sum(budget.try_acquire() for _ in range(10))
+        self.assertEqual(granted, 3)
+
+    def test_backoff_grows_with_jitter(self):
+        """退避时间在指数上限内随机分布，且不超过最长退避时间"""
+        budget = RetryBudget(backoff_base=0.1, backoff_max=1)
+        for attempt, limit in enumerate([0.1, 0.2, 0.4, 0.8, 1, 1]):
+            for _ in range(20):
+                self.assertTrue(0 <= budget.backoff(attempt) <= limit)
+
+    def test_non_idempotent_retried_only_when_not_sent(self):
+        """POST 只在连接没有建立时重试"""
+        refused = requests.exceptions.ConnectionError(
+            MaxRetryError(None, '/', NewConnectionError(None, 'Connection refused'))
+        )
+        dropped = requests.exceptions.ConnectionError(ProtocolError('Connection aborted.'))
+        read_timeout = requests.exceptions.ReadTimeout()
+
+        self.assertTrue(is_safe_to_retry('POST', refused))
+        self.assertTrue(is_safe_to_retry('POST', requests.exceptions.ConnectTimeout()))
+        self.assertFalse(is_safe_to_retry('POST', dropped))
+        self.assertFalse(is_safe_to_retry('POST', read_timeout))
+        self.assertTrue(is_safe_to_retry('GET', read_timeout))
+        self.assertFalse(is_safe_to_retry('GET', ValueError()))
+
+
+class ExecutorResilienceTest(DjangoTestCase):
+    """执行器熔断与重试测试"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='runner', password='testpass123')
+        api = ApiDefinition.objects.create(name='不可用服务', url=f'http://127.0.0.1:{_closed_port()}/health')
+        self.test_cases = [ApiTestCase.objects.create(name=f'用例{i}', api=api) for i in range(6)]
+
+    @override_settings(API_TEST_CIRCUIT_FAILURE_THRESHOLD=2, API_TEST_RETRY_MAX=0)
+    def test_remaining_cases_fail_fast_after_circuit_opens(self):
+        """目标主机熔断后剩余用例不再发送请求"""
+        test_run = TestRun.objects.create(name='熔断')
+        with ExecutionContext(test_run) as context, \
+                mock.patch.object(context.session_pool, 'request', wraps=context.session_pool.request) as request:
+            results = ApiTestService.execute_test_cases(self.test_cases, self.user, test_run, context=context)
+
+        self.assertEqual(request.call_count, 2)
+        self.assertTrue(all(result.status == 'error' for result in results))
+        self.assertIn('连接错误', results[1].error_message)
+        self.assertIn('跳过请求', results[2].error_message)
+        test_run.refresh_from_db()
+        self.assertEqual(test_run.error_tests, 6)
+
+    @override_settings(
+        API_TEST_CIRCUIT_FAILURE_THRESHOLD=10, API_TEST_RETRY_MAX=2, API_TEST_RETRY_BACKOFF_BASE=0.001
+    )
+    def test_connection_failures_retried_within_budget(self):
+        """连接失败按最大重试次数重试，重试消耗预算"""
+        with ExecutionContext() as context:
+            context.retry_budget._balance = 3
+            with mock.patch.object(context.session_pool, 'request', wraps=context.session_pool.request) as request:
+                ApiTestService.execute_test_cases(self.test_cases[:2], self.user, context=context)
+
+        # 第一个用例重试 2 次，第二个用例只剩 1 次额度（加上两个请求存入的 0.2）
+        self.assertEqual(request.call_count, 3 + 2)
@@ -0,0 +1,104 @@
+"""
+响应体捕获单元测试
+"""
+
+import hashlib
+import json
+import unittest
+from unittest import mock
+
+from api_test.assertions import AssertionPlan, ResponseView
+from api_test.response_capture import ResponseCapture
+
+
+class FakeStreamResponse:
+    """按块返回响应体的响应对象"""
+
+    def __init__(self, body, chunk_size=10, encoding='utf-8'):
+        self.body = body
+        self.chunk_size = chunk_size
+        self.status_code = 200
+        self.headers = {'Content-Type': 'application/json'}
+        self.encoding = encoding
+        self.closed = False
+
+    def iter_content(self, chunk_size=None):
+        for start in range(0, len(self.body), self.chunk_size):
+            yield self.body[start:start + self.chunk_size]
+
+    def close(self):
+        self.closed = True
+
+
+class ResponseCaptureTest(unittest.TestCase):
+    """流式捕获响应体"""
+
+    BODY = json.dumps({'items': list(range(200)), 'name': '完整响应'}, ensure_ascii=False).encode('utf-8')
+
+    def test_small_body_is_kept_completely(self):
+        response = FakeStreamResponse(self.BODY)
+        capture = ResponseCapture(response, capture_limit=len(self.BODY))
+        self.assertFalse(capture.truncated)
+        self.assertEqual(capture.size, len(self.BODY))
+        self.assertEqual(capture.content_hash, hashlib.sha256(self.BODY).hexdigest())
+        self.assertEqual(capture.captured_text, self.BODY.decode('utf-8'))
+        self.assertEqual(capture.json()['name'], '完整响应')
+        self.assertTrue(response.closed)
+
+    def test_large_body_keeps_prefix_and_full_hash(self):
+        capture = ResponseCapture(FakeStreamResponse(self.BODY), capture_limit=25)
+        self.assertTrue(capture.truncated)
+        self.assertEqual(len(capture.captured), 25)
+        self.assertEqual(capture.size, len(self.BODY))
+        self.assertEqual(capture.content_hash, hashlib.sha256(self.BODY).hexdigest())
+        self.assertTrue(self.BODY.decode('utf-8').startswith(capture.captured_text))
+        self.assertFalse(capture.has_full_body)
+
+    def test_prefix_does_not_end_with_broken_character(self):
+        body = '中文内容'.encode('utf-8')
+        capture = ResponseCapture(FakeStreamResponse(body, chunk_size=4), capture_limit=4)
+        self.assertEqual(capture.captured_text, '中')
+
+    def test_assertions_read_full_body_from_spool(self):
+        capture = ResponseCapture(FakeStreamResponse(self.BODY, chunk_size=7), capture_limit=16, keep_body=True)
+        self.assertTrue(capture.truncated)
+        self.assertTrue(capture.has_full_body)
+
+        plan = AssertionPlan([
+            {'type': 'contains', 'expected': '完整响应'},
+            {'type': 'not_contains', 'expected': 'missing'},
+            {'type': 'json_path', 'field': 'items.199', 'expected': 199},
+            {'type': 'regex', 'expected': r'"name": "\w+"'},
+        ])
+        self.assertTrue(plan.needs_body)
+        results, _ = plan.evaluate(ResponseView(capture))
+        self.assertTrue(all(result['passed'] for result in results), results)
+        self.assertEqual(results[0]['actual'], f'响应体长度: {len(self.BODY)}')
+        capture.close()
+
+    def test_header_only_plan_does_not_need_body(self):
+        self.assertFalse(AssertionPlan([{'type': 'header', 'header_name': 'X', 'expected': '1'}]).needs_body)
+
+    def test_spool_closed_when_assertions_raise(self):
+        """断言过程中出错时同样关闭临时文件"""
+        with self.assertRaises(RuntimeError):
+            with ResponseCapture(FakeStreamResponse(self.BODY), capture_limit=16, keep_body=True) as capture:
+                self.assertIsNotNone(capture._spool)
+                raise RuntimeError('断言出错')
+        self.assertIsNone(capture._spool)
+
+    def test_spool_closed_when_reading_fails(self):
+        response = FakeStreamResponse(self.BODY)
+        spools = []
+
+        def broken_iter_content(chunk_size=None):
+            yield self.BODY[:10]
+            raise ConnectionError('连接中断')
+
+        response.iter_content = broken_iter_content
+        with mock.patch('api_test.response_capture.tempfile.SpooledTemporaryFile') as spool_class:
+            spool_class.side_effect = lambda **kwargs: spools.append(mock.Mock()) or spools[-1]
+            with self.assertRaises(ConnectionError):
+                ResponseCapture(response, capture_limit=16, keep_body=True)
+        spools[0].close.assert_called_once()
+        self.assertTrue(response.closed)
@@ -0,0 +1,99 @@
+"""
+响应时间分布单元测试
+"""
+from django.test import TestCase
+from rest_framework.test import APIClient
+
+from api_test.models import ApiDefinition, ApiTestCase, ApiTestResult, ResponseTimeSketch, TestRun
+from api_test.result_sink import BufferedResultSink, ImmediateResultSink
+
+
+class ResponseTimeSketchTest(TestCase):
+    """响应时间分布测试"""
+
+    def setUp(self):
+        users = ApiDefinition.objects.create(name='用户列表', url='http://example.com/users')
+        orders = ApiDefinition.objects.create(name='订单列表', url='http://example.com/orders')
+        self.users_case = ApiTestCase.objects.create(name='用户列表用例', api=users)
+        self.orders_case = ApiTestCase.objects.create(name='订单列表用例', api=orders)
+        self.client = APIClient()
+
+    def _run(self, name, response_times):
+        """执行记录：用户接口使用给定的响应时间，订单接口固定 1000ms"""
+        test_run = TestRun.objects.create(name=name)
+        sink = BufferedResultSink(test_run, batch_size=7, flush_interval=3600)
+        for response_time in response_times:
+            sink.add(ApiTestResult(
+                test_case=self.users_case, test_run=test_run, status='passed', response_time=response_time
+            ))
+            sink.add(ApiTestResult(
+                test_case=self.orders_case, test_run=test_run, status='failed', response_time=1000
+            ))
+        # 没有响应时间的结果（如请求失败、数据驱动汇总）不计入分布
+        sink.add(ApiTestResult(test_case=self.users_case, test_run=test_run, status='error'))
+        sink.close()
+        return test_run
+
+    def test_sketches_updated_as_results_are_written(self):
+        """结果分批写入时按接口累计分布"""
+        test_run = self._run('分布', range(1, 101))
+
+        sketches = {sketch.api_id: sketch for sketch in test_run.response_time_sketches.all()}
+        self.assertEqual(sketches[self.users_case.api_id].count, 100)
+        self.assertEqual(sketches[self.orders_case.api_id].count, 100)
+
+        histogram = test_run.get_latency_histogram(api=self.users_case.api)
+        self.assertAlmostEqual(histogram.percentile(99), 99, delta=1)
+        self.assertAlmostEqual(test_run.avg_response_time, (50.5 + 1000) / 2)
+
+    def test_immediate_sink_saves_sketches_on_close(self):
+        """立即写入模式下逐条写入结果，响应时间分布只在结束时写入一次"""
+        test_run = TestRun.objects.create(name='立即写入')
+        sink = ImmediateResultSink(test_run)
+        for response_time in range(1, 11):
+            sink.add(ApiTestResult(
+                test_case=self.users_case, test_run=test_run, status='passed', response_time=response_time
+            ))
+        self.assertFalse(test_run.response_time_sketches.exists())
+
+        sink.close()
+        self.assertEqual(test_run.response_time_sketches.get().count, 10)
+
+    def test_distribution_counts_are_exact(self):
+        """区间分布按结果精确计数，边界值不会因分布的桶误差落入相邻区间"""
+        test_run = self._run('边界', [100, 100.5, 500, 1000, 3000, 3000.5])
+        detail = self.client.get(f'/api/reports/test-runs/{test_run.id}/').data
+        self.assertEqual(detail['response_time_distribution'], {
+            '0-100ms': 1, '100-500ms': 2, '500-1000ms': 7, '1000-3000ms': 1, '3000ms+': 1,
+        })
+
+    def test_statistics_expose_percentiles(self):
+        """统计接口按接口返回分位数"""
+        test_run = self._run('统计', range(1, 101))
+        response = self.client.get(f'/api/reports/test-runs/{test_run.id}/statistics/')
+
+        stats = {item['api_name']: item for item in response.data['api_statistics']}
+        self.assertEqual(stats['用户列表']['total'], 101)
+        self.assertEqual(stats['用户列表']['error'], 1)
+        self.assertAlmostEqual(stats['用户列表']['response_time_percentiles']['p50'], 50, delta=1)
+        self.assertEqual(stats['订单列表']['response_time_percentiles']['p99'], 1000)
+        self.assertEqual(response.data['summary']['response_time_percentiles']['count'], 200)
+
+        detail = self.client.get(f'/api/reports/test-runs/{test_run.id}/').data
+        self.assertEqual(sum(detail['response_time_distribution'].values()), 200)
+        self.assertEqual(detail['response_time_distribution']['500-1000ms'], 100)
+
+    def test_percentiles_across_runs(self):
+        """跨多次执行的分位数由合并分布得到"""
+        first = self._run('第一次', [10] * 50)
+        second = self._run('第二次', [30] * 50)
+
+        response = self.client.get(
+            '/api/reports/test-runs/latency_percentiles/',
+            {'run_ids': f'{first.id},{second.id}', 'api_id': self.users_case.api_id}
+        )
+        self.assertEqual(response.data['runs'], 2)
+        self.assertEqual(response.data['summary']['count'], 100)
+        self.assertAlmostEqual(response.data['summary']['p50'], 10, delta=0.2)
+        self.assertAlmostEqual(response.data['summary']['p95'], 30, delta=0.5)
+        self.assertEqual(ResponseTimeSketch.objects.count(), 4)
@@ -0,0 +1,93 @@
+"""
+测试结果写入器单元测试
+"""
+
+from unittest import mock
+
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+
+from api_test.error_handlers import TestExecutionError
+from api_test.models import ApiDefinition, ApiTestCase, ApiTestResult, TestRun
+from api_test.result_sink import BufferedResultSink, ImmediateResultSink, create_result_sink
+
+
+class ResultSinkTest(TestCase):
+    """ResultSink测试"""
+
+    def setUp(self):
+        api = ApiDefinition.objects.create(name='用户列表', url='http://example.com/users')
+        self.test_case = ApiTestCase.objects.create(name='用户列表用例', api=api)
+        self.test_run = TestRun.objects.create(name='写入测试')
+
+    def _result(self, result_status):
+        return ApiTestResult(test_case=self.test_case, test_run=self.test_run, status=result_status)
+
+    def test_immediate_sink_saves_each_result(self):
+        """逐条写入模式下结果立即保存并更新计数"""
+        sink = ImmediateResultSink(self.test_run)
+        result = sink.add(self._result('passed'))
+
+        self.assertIsNotNone(result.pk)
+        self.test_run.refresh_from_db()
+        self.assertEqual(self.test_run.total_tests, 1)
+        self.assertEqual(self.test_run.passed_tests, 1)
+
+    def test_buffered_sink_flushes_by_count(self):
+        """达到数量阈值时批量写入"""
+        sink = BufferedResultSink(self.test_run, batch_size=3, flush_interval=3600)
+        sink.add(self._result('passed'))
+        sink.add(self._result('failed'))
+        self.assertEqual(ApiTestResult.objects.count(), 0)
+
+        with self.assertNumQueries(4):  # 事务开始/结束 + bulk_create + 计数更新
+            sink.add(self._result('error'))
+
+        self.assertEqual(ApiTestResult.objects.count(), 3)
+        self.test_run.refresh_from_db()
+        self.assertEqual(
+            (self.test_run.total_tests, self.test_run.passed_tests,
+             self.test_run.failed_tests, self.test_run.error_tests),
+            (3, 1, 1, 1)
+        )
+
+    def test_buffered_sink_flushes_by_interval(self):
+        """超过时间阈值时写入"""
+        sink = BufferedResultSink(self.test_run, batch_size=100, flush_interval=0)
+        sink.add(self._result('passed'))
+        self.assertEqual(ApiTestResult.objects.count(), 1)
+
+    def test_close_flushes_remaining_results(self):
+        """关闭写入器时写入剩余结果"""
+        sink = BufferedResultSink(self.test_run, batch_size=100, flush_interval=3600)
+        for _ in range(5):
+            sink.add(self._result('passed'))
+        sink.close()
+
+        self.test_run.refresh_from_db()
+        self.assertEqual(self.test_run.passed_tests, 5)
+        self.assertEqual(self.test_run.results.count(), 5)
+
+    def test_failed_batch_fails_run(self):
+        """某一批写入失败时继续执行，结束时报告丢弃的条数"""
+        sink = BufferedResultSink(self.test_run, batch_size=2, flush_interval=3600)
+        with mock.patch.object(ApiTestResult.objects, 'bulk_create', side_effect=OperationalError('database is locked')):
+            sink.add(self._result('passed'))
+            sink.add(self._result('passed'))
+        sink.add(self._result('failed'))
+
+        with self.assertRaisesMessage(TestExecutionError, '2 条测试结果写入失败'):
+            sink.close()
+        self.test_run.refresh_from_db()
+        self.assertEqual(self.test_run.total_tests, 1)
+        self.assertEqual(self.test_run.results.count(), 1)
+
+    @override_settings(API_TEST_RESULT_BATCH_SIZE=50)
+    def test_create_result_sink_by_write_mode(self):
+        """根据执行记录的写入模式选择写入器"""
+        self.assertIsInstance(create_result_sink(None), ImmediateResultSink)
+        self.assertIsInstance(create_result_sink(self.test_run, 'immediate'), ImmediateResultSink)
+
+        sink = create_result_sink(self.test_run)
+        self.assertIsInstance(sink, BufferedResultSink)
+        self.assertEqual(sink.batch_size, 50)
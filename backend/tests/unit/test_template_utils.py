@@ -0,0 +1,72 @@
+"""
+变量替换模板单元测试
+"""
+
+import unittest
+
+from utils.template_utils import TemplateCache, compile_template, render_template
+
+
+class CompiledTemplateTest(unittest.TestCase):
+    """模板编译与渲染"""
+
+    def test_renders_nested_structures(self):
+        template = compile_template({
+            'url': 'http://{{host}}/users/{{id}}',
+            'headers': {'Authorization': 'Bearer {{token}}'},
+            'body': [{'name': '{{name}}', 'age': 18}, None],
+        })
+        variables = {'host': 'example.com', 'id': 7, 'token': 'abc', 'name': '张三'}
+        self.assertEqual(template.render(variables), {
+            'url': 'http://example.com/users/7',
+            'headers': {'Authorization': 'Bearer abc'},
+            'body': [{'name': '张三', 'age': 18}, None],
+        })
+
+    def test_render_does_not_share_state(self):
+        template = compile_template({'items': ['{{a}}']})
+        first = template.render({'a': 1})
+        first['items'].append('changed')
+        self.assertEqual(template.render({'a': 2}), {'items': ['2']})
+
+    def test_missing_variables_are_kept(self):
+        self.assertEqual(render_template('{{a}}-{{b}}', {'a': 1}), '1-{{b}}')
+
+    def test_legacy_single_brace_syntax(self):
+        self.assertEqual(render_template('/api/{id}?q={{q}}', {'id': 5, 'q': 'x'}), '/api/5?q=x')
+        self.assertEqual(render_template('{"a": 1}', {'a': 2}), '{"a": 1}')
+        self.assertEqual(render_template('{{my-var}}', {'my-var': 'v'}), '{v}')
+
+    def test_non_legacy_mode_ignores_single_brace(self):
+        template = compile_template('{id}/{{name}}/{{name}}', legacy=False)
+        self.assertEqual(template.render({'id': 1, 'name': 'n'}), '{id}/n/n')
+        self.assertEqual(template.variable_names, ['name', 'name'])
+
+    def test_dict_keys_are_not_replaced(self):
+        self.assertEqual(render_template({'{{k}}': '{{k}}'}, {'k': 'v'}), {'{{k}}': 'v'})
+
+
+class TemplateCacheTest(unittest.TestCase):
+    """模板缓存"""
+
+    def test_compiles_once_per_key(self):
+        cache = TemplateCache(maxsize=2)
+        calls = []
+
+        def factory():
+            calls.append(1)
+            return compile_template('{{a}}')
+
+        first = cache.get_or_compile(('case', 1), factory)
+        self.assertIs(cache.get_or_compile(('case', 1), factory), first)
+        self.assertEqual(len(calls), 1)
+
+    def test_evicts_least_recently_used(self):
+        cache = TemplateCache(maxsize=2)
+        cache.get_or_compile('a', lambda: 'A')
+        cache.get_or_compile('b', lambda: 'B')
+        cache.get_or_compile('a', lambda: 'A2')
+        cache.get_or_compile('c', lambda: 'C')
+        self.assertEqual(len(cache), 2)
+        self.assertEqual(cache.get_or_compile('a', lambda: 'A3'), 'A')
+        self.assertEqual(cache.get_or_compile('b', lambda: 'B2'), 'B2')
@@ -6,11 +6,19 @@
 from .cache_utils import (
     cache_response, cache_queryset_count, 
     cache_user_permissions, cache_environment_variables,
+    get_environment_version, invalidate_environment_variables,
     CacheStats, cache_short, cache_medium, cache_long
 )
+from .histogram_utils import LatencyHistogram
+from .template_utils import (
+    CompiledTemplate, TemplateCache, compile_template, render_template
+)
 
 __all__ = [
     'cache_response', 'cache_queryset_count',
     'cache_user_permissions', 'cache_environment_variables', 
-    'CacheStats', 'cache_short', 'cache_medium', 'cache_long'
+    'get_environment_version', 'invalidate_environment_variables',
+    'CacheStats', 'cache_short', 'cache_medium', 'cache_long',
+    'LatencyHistogram',
+    'CompiledTemplate', 'TemplateCache', 'compile_template', 'render_template'
 ]
\ No newline at end of file
@@ -7,6 +7,7 @@ from django.core.cache import cache
 from django.conf import settings
 import hashlib
 import json
+import time
 from functools import wraps
 
 
@@ -122,28 +123,63 @@ def cache_user_permissions(user_id, timeout=600):
     return permissions
 
 
-def cache_environment_variables(environment_id, timeout=300):
+ENV_VARS_VERSION_KEY = 'env_vars:version:{environment_id}'
+ENV_VARS_KEY = 'env_vars:{environment_id}:{version}'
+
+
+def get_environment_version(environment_id):
     """
-    缓存环境变量
-    
+    获取环境变量的版本号
+
+    版本号保存在配置的缓存后端中，多个进程共享。版本号不存在（首次使用或被淘汰）时
+    以当前时间初始化，保证不会与淘汰前的版本号重复而读到旧数据。
+    """
+    key = ENV_VARS_VERSION_KEY.format(environment_id=environment_id)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate_environment_variables(environment_id):
+    """环境或环境变量变更后递增版本号，所有进程随后读取到新版本"""
+    key = ENV_VARS_VERSION_KEY.format(environment_id=environment_id)
+    try:
+        return cache.incr(key)
+    except ValueError:
+        version = time.time_ns()
+        cache.set(key, version, None)
+        return version
+
+
+def cache_environment_variables(environment_id, timeout=None):
+    """
+    获取环境变量字典（带版本的缓存）
+
+    缓存键包含环境的版本号，环境变量的保存和删除会通过信号递增版本号，
+    修改立即对所有进程可见；过期时间只用于回收不再使用的旧版本。
+
     Args:
         environment_id: 环境ID
-        timeout: 缓存超时时间（秒），默认5分钟
+        timeout: 缓存超时时间（秒），默认使用 ENVIRONMENT_VARIABLE_CACHE_TIMEOUT
     """
-    cache_key = f"env_vars:{environment_id}"
+    if timeout is None:
+        timeout = getattr(settings, 'ENVIRONMENT_VARIABLE_CACHE_TIMEOUT', 3600)
+    cache_key = ENV_VARS_KEY.format(
+        environment_id=environment_id, version=get_environment_version(environment_id)
+    )
     
     cached_vars = cache.get(cache_key)
     if cached_vars is not None:
         return cached_vars
     
-    try:
-        from environments.models import Environment
-        environment = Environment.objects.prefetch_related('variables').get(id=environment_id)
-        variables = {var.key: var.value for var in environment.variables.all()}
-        cache.set(cache_key, variables, timeout)
-        return variables
-    except Environment.DoesNotExist:
-        return {}
+    from environments.models import EnvironmentVariable
+    variables = dict(
+        EnvironmentVariable.objects.filter(environment_id=environment_id).values_list('key', 'value')
+    )
+    cache.set(cache_key, variables, timeout)
+    return variables
 
 
 class CacheStats:
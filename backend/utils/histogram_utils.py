@@ -0,0 +1,143 @@
+"""
+延迟直方图工具
+按对数分桶统计延迟分布，桶边界只与精度有关，任意两个直方图可以直接合并
+"""
+
+import math
+
+# 默认相对误差 1%：任意分位数的估计值与真实值相差不超过 1%
+DEFAULT_RELATIVE_ACCURACY = 0.01
+
+# 小于该值（毫秒）的延迟统一计入零值桶
+MIN_TRACKED_VALUE = 0.001
+
+
+class LatencyHistogram:
+    """
+    对数分桶的延迟直方图
+
+    第 i 个桶覆盖 (gamma^(i-1), gamma^i]，gamma = (1 + a) / (1 - a)，a 为相对精度；
+    桶的代表值取区间的调和中点，保证估计值的相对误差不超过 a。
+    只保存非空桶，内存占用与数据量无关，只与延迟的动态范围有关。
+    """
+
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.buckets = {}
+        self.zero_count = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def record(self, value, count=1):
+        """记录一个延迟值（毫秒）"""
+        if value <= MIN_TRACKED_VALUE:
+            self.zero_count += count
+        else:
+            index = math.ceil(math.log(value) / self._log_gamma)
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """合并另一个直方图（相对精度必须相同）"""
+        if other.relative_accuracy != self.relative_accuracy:
+            raise ValueError('只能合并相对精度相同的直方图')
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        self.total += other.total
+        for value in (other.min, other.max):
+            if value is None:
+                continue
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+        return self
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else None
+
+    def _bucket_value(self, index):
+        return 2 * self.gamma ** index / (self.gamma + 1)
+
+    def percentile(self, percent):
+        """
+        估计分位数
+
+        Args:
+            percent: 百分位，如 99.9
+
+        Returns:
+            float: 延迟估计值（毫秒），没有数据时返回 None
+        """
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(self.count * percent / 100))
+        seen = self.zero_count
+        if seen >= rank:
+            return 0.0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen >= rank:
+                # 估计值不会超出实际观测到的范围
+                return min(max(self._bucket_value(index), self.min), self.max)
+        return self.max
+
+    def percentiles(self, percents=(50, 90, 99, 99.9)):
+        return {percent: self.percentile(percent) for percent in percents}
+
+    def to_dict(self):
+        """
+        转换为可JSON序列化的紧凑格式
+
+        桶计数按下标连续存为一个数组（offset 为第一个桶的下标），
+        1% 精度下 1ms~60s 的范围最多约 550 个整数。
+        """
+        data = {
+            'accuracy': self.relative_accuracy,
+            'zero_count': self.zero_count,
+            'count': self.count,
+            'total': self.total,
+            'min': self.min,
+            'max': self.max,
+            'offset': 0,
+            'counts': [],
+        }
+        if self.buckets:
+            offset = min(self.buckets)
+            data['offset'] = offset
+            data['counts'] = [self.buckets.get(index, 0) for index in range(offset, max(self.buckets) + 1)]
+        return data
+
+    @classmethod
+    def from_dict(cls, data):
+        histogram = cls(data.get('accuracy', DEFAULT_RELATIVE_ACCURACY))
+        offset = data.get('offset', 0)
+        histogram.buckets = {
+            offset + position: count for position, count in enumerate(data.get('counts') or []) if count
+        }
+        histogram.zero_count = data.get('zero_count', 0)
+        histogram.count = data.get('count', 0)
+        histogram.total = data.get('total', 0.0)
+        histogram.min = data.get('min')
+        histogram.max = data.get('max')
+        return histogram
+
+    @classmethod
+    def merge_all(cls, histograms):
+        """合并多个直方图，没有数据时返回空直方图"""
+        merged = cls()
+        for histogram in histograms:
+            merged.merge(histogram)
+        return merged
@@ -0,0 +1,111 @@
+"""
+变量替换模板工具
+把包含 {{variable}} 占位符的字符串、字典和列表预先编译为替换计划，之后每次渲染只需一次遍历
+"""
+
+import re
+import threading
+from collections import OrderedDict
+
+# {{variable}} 占位符；legacy 模式下同时识别旧的 {variable} 格式
+PLACEHOLDER_PATTERN = re.compile(r'\{\{(\w+)\}\}')
+LEGACY_PLACEHOLDER_PATTERN = re.compile(r'\{\{(\w+)\}\}|\{([^{}]+)\}')
+
+
+class CompiledTemplate:
+    """
+    编译后的模板
+
+    字符串被切分为字面量和占位符片段，字典和列表按结构递归编译；
+    渲染时未提供的变量保持原样输出。字典的键不参与替换。
+    """
+
+    def __init__(self, data, legacy=True):
+        self.legacy = legacy
+        self.variable_names = []
+        self._render = self._compile(data)
+
+    def render(self, variables=None):
+        """使用给定变量渲染模板，返回新的数据（不会修改编译时的数据）"""
+        return self._render(variables or {})
+
+    def _compile(self, data):
+        if isinstance(data, dict):
+            items = [(key, self._compile(value)) for key, value in data.items()]
+            return lambda variables: {key: render(variables) for key, render in items}
+        if isinstance(data, list):
+            renders = [self._compile(item) for item in data]
+            return lambda variables: [render(variables) for render in renders]
+        if isinstance(data, str):
+            return self._compile_string(data)
+        return lambda variables: data
+
+    def _compile_string(self, text):
+        pattern = LEGACY_PLACEHOLDER_PATTERN if self.legacy else PLACEHOLDER_PATTERN
+        parts = []
+        position = 0
+        for match in pattern.finditer(text):
+            if match.start() > position:
+                parts.append(text[position:match.start()])
+            name = match.group(1) or match.group(2)
+            if match.group(1):
+                self.variable_names.append(name)
+            parts.append((name, match.group(0)))
+            position = match.end()
+
+        if not parts:
+            return lambda variables: text
+        if position < len(text):
+            parts.append(text[position:])
+
+        def render(variables):
+            return ''.join(
+                part if isinstance(part, str)
+                else (str(variables[part[0]]) if part[0] in variables else part[1])
+                for part in parts
+            )
+        return render
+
+
+def compile_template(data, legacy=True):
+    """编译模板数据（字符串、字典或列表）"""
+    return CompiledTemplate(data, legacy=legacy)
+
+
+def render_template(data, variables, legacy=True):
+    """一次性编译并渲染模板，适用于不会重复渲染的数据"""
+    return CompiledTemplate(data, legacy=legacy).render(variables)
+
+
+class TemplateCache:
+    """
+    线程安全的LRU模板缓存
+
+    缓存键应包含被编译对象的版本信息（如 updated_at），对象更新后自然使用新的缓存项。
+    """
+
+    def __init__(self, maxsize=512):
+        self.maxsize = maxsize
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_compile(self, key, factory):
+        """获取缓存的编译结果，不存在时调用 factory 编译并缓存"""
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                return self._items[key]
+        value = factory()
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self):
+        return len(self._items)